@@ -0,0 +1,145 @@
+"""抓包后端吞吐基准：scapy 后端（逐包 recvfrom） vs Linux TPACKET_V3 环形缓冲区
+
+子进程通过 AF_PACKET 套接字把同一份合成流量重放到真实接口上（默认 lo），
+主进程分别用两种后端打开句柄，在抓包引擎的 select 循环中读取：
+read 模式只计数（衡量后端本身的读取开销），full 模式完整执行解析、重组和检测（持续监控，不在检测到后停止）。
+统计送达报文数、内核丢包、墙钟吞吐和每个报文的 CPU 耗时（发送进程的 CPU 不计入）。
+需要 Linux 和 root 权限。
+
+用法:
+    python benchmarks/bench_backends.py --interface lo --background-mb 20 --runs 3 --output backends.json
+    python benchmarks/bench_backends.py --interface lo --pps 50000
+"""
+import argparse
+import multiprocessing
+import socket
+import threading
+import time
+
+from common import NullLogger, write_results
+from traffic import traffic_mix
+
+from core.backend import ScapyBackend, TpacketBackend
+from core.capture import PacketCapture
+from core.capture_filter import CaptureFilter, FILTER_OFF
+from core.rtmp_classifier import NARROW_WHITELIST
+
+# 发送结束后没有新报文的时间超过该值（秒）即认为已读完
+IDLE_SECONDS = 0.5
+IDLE_POLL = 0.01
+
+
+def replay(interface, frames, pps, ready, start):
+    """发送进程：按给定包速率（0 为尽可能快）把帧写到接口上"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
+    sock.bind((interface, 0))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 << 20)
+    ready.set()
+    start.wait()
+    begin = time.perf_counter()
+    for index, frame in enumerate(frames):
+        if pps and index % 100 == 0:
+            delay = begin + index / pps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        while True:
+            try:
+                sock.send(frame)
+                break
+            except BlockingIOError:
+                time.sleep(0.0001)
+    sock.close()
+
+
+def run_backend(backend, interface, frames, pps, mode):
+    capture = PacketCapture(NullLogger())
+    capture.capture_filter = CaptureFilter(FILTER_OFF)
+    capture.monitor = True
+    capture.narrowing = NARROW_WHITELIST
+    capture.queue_size = 0
+    capture.wake_pipe = None
+    capture.is_capturing = True
+    capture.interface_status[interface] = True
+    changes = []
+    capture.add_change_callback(lambda server, key: changes.append(key))
+    stats = capture._prepare_interface(interface)
+    if mode == "read":
+        def count_frame(frame, linktype, interface, python_filter=False):
+            stats.delivered += 1
+            stats.bytes += len(frame)
+
+        capture._frame_callback = count_frame
+
+    handle, stats.bpf = backend.open(interface, capture.capture_filter, NullLogger())
+    capture.open_handles[handle] = interface
+    loop = threading.Thread(target=capture._capture_loop, args=({handle: interface},), daemon=True)
+    loop.start()
+
+    ready = multiprocessing.Event()
+    start = multiprocessing.Event()
+    sender = multiprocessing.Process(target=replay, args=(interface, frames, pps, ready, start), daemon=True)
+    sender.start()
+    ready.wait()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    start.set()
+    sender.join()
+
+    # 等待句柄中剩余的报文读完，吞吐按最后一次收到报文的时间计算
+    last = stats.delivered
+    last_time = time.perf_counter()
+    while time.perf_counter() - last_time < IDLE_SECONDS:
+        time.sleep(IDLE_POLL)
+        if stats.delivered != last:
+            last = stats.delivered
+            last_time = time.perf_counter()
+    wall = last_time - wall_start
+    cpu = time.process_time() - cpu_start
+    capture.interface_status[interface] = False
+    capture.is_capturing = False
+    loop.join()
+    return {
+        "backend": backend.name,
+        "mode": mode,
+        "sent": len(frames),
+        "delivered": stats.delivered,
+        "kernel_received": stats.kernel_received,
+        "kernel_dropped": stats.kernel_dropped,
+        "wall_seconds": wall,
+        "pps": stats.delivered / wall if wall > 0 else 0.0,
+        "cpu_us_per_packet": cpu / stats.delivered * 1e6 if stats.delivered else 0.0,
+        "changes": len(changes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interface", default="lo", help="重放和抓包的接口")
+    parser.add_argument("--background-mb", type=float, default=20, help="背景流量大小（MB）")
+    parser.add_argument("--pps", type=int, default=0, help="发送包速率，0 为尽可能快")
+    parser.add_argument("--runs", type=int, default=3, help="每种组合的轮数（取吞吐最高的一轮）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    if not TpacketBackend.available():
+        parser.error("TPACKET_V3 后端只支持 Linux")
+    frames = [frame for frame, _ in traffic_mix(args.background_mb)]
+    results = []
+    print(f"{'后端':<10}{'模式':<6}{'发送':>9}{'送达':>9}{'内核丢弃':>10}{'包/秒':>10}{'CPU微秒/包':>12}{'检测':>6}")
+    for mode in ("read", "full"):
+        for backend in (ScapyBackend(), TpacketBackend()):
+            runs = [run_backend(backend, args.interface, frames, args.pps, mode) for _ in range(args.runs)]
+            best = dict(max(runs, key=lambda run: run["pps"]))
+            best["runs"] = runs
+            results.append(best)
+            print(
+                f"{best['backend']:<10}{mode:<6}{best['sent']:>9}{best['delivered']:>9}"
+                f"{best['kernel_dropped'] if best['kernel_dropped'] is not None else '-':>10}"
+                f"{best['pps']:>10.0f}{best['cpu_us_per_packet']:>12.2f}{best['changes']:>6}"
+            )
+
+    write_results(args.output, "backends", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""抓包核心的吞吐与检测延迟基准，结果输出为 JSON 以便逐次对比
+
+用法:
+    python benchmarks/bench_capture.py --background-mb 50 --rtmp-offset 0.5 --output result.json
+    python benchmarks/bench_capture.py --rate 20000 --path scapy
+"""
+import argparse
+import json
+import threading
+import time
+
+import psutil
+
+from common import NullLogger, write_results
+from traffic import traffic_mix
+
+from core.capture import PacketCapture
+from core.frame import DLT_EN10MB
+
+INTERFACE = "bench"
+
+
+class RssSampler:
+    """后台线程定期采样进程 RSS，记录峰值"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+        return self.peak
+
+    def _run(self):
+        while self._running:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+
+def _paced(items, rate):
+    """按指定的包速率输出（rate<=0 时不限速）"""
+    if not rate or rate <= 0:
+        yield from items
+        return
+    start = time.perf_counter()
+    for index, item in enumerate(items):
+        # 每 64 个包校准一次，避免频繁 sleep 的开销
+        if index % 64 == 0:
+            delay = index / rate - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        yield item
+
+
+def _make_feeder(capture, path):
+    """返回处理单个帧的函数"""
+    if path == "scapy":
+        from scapy.layers.l2 import Ether
+
+        def feed(frame):
+            capture._packet_callback(Ether(frame), INTERFACE)
+        return feed
+
+    def feed(frame):
+        capture._frame_callback(frame, DLT_EN10MB, INTERFACE, True)
+    return feed
+
+
+def generator_overhead(config):
+    """单独测量生成流量本身的 CPU 时间，从结果中扣除"""
+    start = time.process_time()
+    for _ in traffic_mix(config["background_mb"], config["rtmp_offset"], config["payload_size"], config["udp_ratio"]):
+        pass
+    return time.process_time() - start
+
+
+def run_scenario(config):
+    """运行一个场景，返回结果字典"""
+    capture = PacketCapture(NullLogger())
+    capture.interface_status[INTERFACE] = True
+    capture._prepare_interface(INTERFACE)
+
+    detected = {}
+
+    def on_detect(server_address, stream_code):
+        detected["at"] = time.perf_counter()
+
+    capture.add_callback(on_detect)
+    feed = _make_feeder(capture, config["path"])
+    traffic = traffic_mix(
+        config["background_mb"], config["rtmp_offset"], config["payload_size"], config["udp_ratio"]
+    )
+
+    sampler = RssSampler()
+    baseline_rss = sampler.peak
+    sampler.start()
+    packets = 0
+    total_bytes = 0
+    last_rtmp_fed = None
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for frame, is_rtmp in _paced(traffic, config["rate"]):
+        if is_rtmp and "at" not in detected:
+            last_rtmp_fed = time.perf_counter()
+        feed(frame)
+        packets += 1
+        total_bytes += len(frame)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    peak_rss = sampler.stop()
+
+    cpu_net = max(cpu - config.get("generator_cpu", 0.0), 0.0)
+    latency = None
+    if "at" in detected and last_rtmp_fed is not None:
+        latency = (detected["at"] - last_rtmp_fed) * 1000
+    return {
+        "packets": packets,
+        "bytes": total_bytes,
+        "wall_seconds": wall,
+        "pps": packets / wall if wall > 0 else 0.0,
+        "cpu_us_per_packet": cpu_net / packets * 1e6 if packets else 0.0,
+        "rss_baseline_mb": baseline_rss / 1048576,
+        "peak_rss_mb": peak_rss / 1048576,
+        "detected": "at" in detected,
+        "detect_latency_ms": latency,
+        "server_address": capture.server_address,
+        "stream_code": capture.stream_code,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--background-mb", type=float, default=50, help="背景流量大小（MB）")
+    parser.add_argument("--rate", type=float, default=0, help="包速率（包/秒），0 表示不限速")
+    parser.add_argument("--rtmp-offset", type=float, default=0.5, help="RTMP 交互在背景流量中的位置（0~1）")
+    parser.add_argument("--payload-size", type=int, default=1200, help="背景报文负载大小")
+    parser.add_argument("--udp-ratio", type=float, default=0.3, help="背景中 UDP 报文比例")
+    parser.add_argument("--path", choices=("fast", "scapy"), default="fast", help="处理路径")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    config = {
+        "background_mb": args.background_mb,
+        "rate": args.rate,
+        "rtmp_offset": args.rtmp_offset,
+        "payload_size": args.payload_size,
+        "udp_ratio": args.udp_ratio,
+        "path": args.path,
+    }
+    config["generator_cpu"] = generator_overhead(config)
+    report = write_results(args.output, "capture", config, run_scenario(config))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""RTMP 命令检测基准：块流命令解析器 vs 重组 + 字节匹配
+
+构造一条完整的客户端方向字节流（C0+C1、C2、设置块大小、connect、FCPublish、publish，
+之后是按 4096 字节分块的音视频消息），按 MSS 切成 TCP 报文，分别用两种方式逐个输入：
+regex 为原有路径（TcpReassembler.feed + StreamKeyDetector.scan），
+parser 为 RtmpCommandParser.feed（按块头长度跳过媒体数据，只解码命令消息）。
+统计每个报文、每字节的耗时，以及取出的推流地址和推流码是否与发送的完全一致。
+--reorder 按比例交换相邻报文，检查乱序时两种方式是否仍能得到结果。
+
+用法:
+    python benchmarks/bench_command_parser.py --media 2000 --runs 5 --output command_parser.json
+    python benchmarks/bench_command_parser.py --stream-key live_8a7b6c --reorder 0.05
+"""
+import argparse
+import random
+import time
+
+from common import write_results
+from traffic import (
+    DEFAULT_SERVER,
+    DEFAULT_STREAM_KEY,
+    SERVER_PORT,
+    rtmp_command,
+    rtmp_media,
+    rtmp_set_chunk_size,
+)
+
+from core.detector import StreamKeyDetector
+from core.reassembly import TcpReassembler
+from core.rtmp_parser import RtmpCommandParser
+
+MSS = 1448
+CHUNK_SIZE = 4096
+FLOW_KEY = ("192.168.1.10", 52000, "101.200.10.20", SERVER_PORT)
+
+
+def client_stream(server, stream_key, media):
+    """客户端方向的完整字节流，返回 (字节流, 媒体数据开始的偏移)"""
+    app = server.split("/", 3)[3]
+    handshake = b"\x03" + bytes(8) + random.randbytes(1528) + random.randbytes(1536)
+    commands = (
+        rtmp_set_chunk_size(CHUNK_SIZE)
+        + rtmp_command(
+            "connect", 1,
+            {"app": app, "type": "nonprivate", "flashVer": "FMLE/3.0 (compatible; FMSc/1.0)",
+             "swfUrl": server, "tcUrl": server},
+            chunk_size=CHUNK_SIZE,
+        )
+        + rtmp_command("releaseStream", 2, None, stream_key, chunk_size=CHUNK_SIZE)
+        + rtmp_command("FCPublish", 3, None, stream_key, chunk_size=CHUNK_SIZE)
+        + rtmp_command("createStream", 4, None, chunk_size=CHUNK_SIZE)
+        + rtmp_command("publish", 5, None, stream_key, "live", csid=8, stream_id=1, chunk_size=CHUNK_SIZE)
+    )
+    prefix = handshake + commands
+    return prefix + rtmp_media(media, chunk_size=CHUNK_SIZE), len(prefix)
+
+
+def segments(stream, seq, reorder):
+    """按 MSS 切成 (序列号, 负载)，按比例交换相邻报文"""
+    result = [(seq + offset, stream[offset:offset + MSS]) for offset in range(0, len(stream), MSS)]
+    if reorder:
+        index = 0
+        while index < len(result) - 1:
+            if random.random() < reorder:
+                result[index], result[index + 1] = result[index + 1], result[index]
+                index += 1
+            index += 1
+    return result
+
+
+def run_regex(items):
+    reassembler = TcpReassembler()
+    detector = StreamKeyDetector()
+    server = key = None
+    for seq, payload in items:
+        window = reassembler.feed(FLOW_KEY, seq, payload)
+        if window is None:
+            continue
+        found_server, found_key = detector.scan(window)
+        server = found_server or server
+        key = found_key or key
+    return server, key, False
+
+
+def run_parser(items):
+    parser = RtmpCommandParser(items[0][0] if items else 0)
+    server = key = None
+    for seq, payload in items:
+        found_server, found_key = parser.feed(seq, payload)
+        server = found_server or server
+        key = found_key or key
+    return server, key, parser.failed
+
+
+def measure(func, items, runs):
+    best = None
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(items)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="connect 中的 tcUrl")
+    parser.add_argument("--stream-key", default=DEFAULT_STREAM_KEY, help="FCPublish / publish 中的推流码")
+    parser.add_argument("--media", type=int, default=2000, help="推流开始后的音视频消息数")
+    parser.add_argument("--reorder", type=float, default=0.0, help="交换相邻报文的比例")
+    parser.add_argument("--runs", type=int, default=5, help="轮数（取最快的一轮）")
+    parser.add_argument("--seed", type=int, default=1, help="随机数种子")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    stream, command_bytes = client_stream(args.server, args.stream_key, args.media)
+    items = segments(stream, 1000, args.reorder)
+    # 只含握手和命令的部分（检测阶段）与完整字节流分别计时
+    command_items = [item for item in items if item[0] - 1000 < command_bytes]
+
+    results = []
+    print(f"报文 {len(items)} 个，{len(stream) / 1e6:.1f} MB（命令阶段 {len(command_items)} 个报文）")
+    print(f"{'方式':<8}{'命令阶段(微秒)':>16}{'微秒/报文':>12}{'纳秒/字节':>12}{'推流地址':>10}{'推流码':>8}{'失步':>6}")
+    for name, func in (("regex", run_regex), ("parser", run_parser)):
+        command_seconds, _ = measure(func, command_items, args.runs)
+        seconds, (server, key, failed) = measure(func, items, args.runs)
+        result = {
+            "mode": name,
+            "segments": len(items),
+            "bytes": len(stream),
+            "command_phase_us": command_seconds * 1e6,
+            "us_per_segment": seconds / len(items) * 1e6,
+            "ns_per_byte": seconds / len(stream) * 1e9,
+            "server": server,
+            "stream_key": key,
+            "server_exact": server == args.server,
+            "stream_key_exact": key == args.stream_key,
+            "failed": failed,
+        }
+        results.append(result)
+        print(
+            f"{name:<8}{result['command_phase_us']:>16.1f}{result['us_per_segment']:>12.2f}"
+            f"{result['ns_per_byte']:>12.2f}{'一致' if result['server_exact'] else '不一致':>10}"
+            f"{'一致' if result['stream_key_exact'] else '不一致':>8}{'是' if failed else '否':>6}"
+        )
+
+    write_results(args.output, "command_parser", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""检测锁争用基准：多个线程同时向同一个 PacketCapture 回放不同接口的流量
+
+每个线程代表一个接口，按顺序输入若干次推流会话（每次推流码都不同，持续监控模式下每次都会发布一次变化），
+会话之间夹杂背景流量。日志的 info 和变化回调带固定延迟，模拟从检测线程直接写 Tk 控件和界面回调的耗时。
+统计全部线程回放完成的墙钟时间、总包速率和结果锁的争用情况（获取次数、需要等待的次数、累计等待时间）。
+可以指定一个 git 版本作为对照（git archive 导出到临时目录，在子进程中用同一份流量测量）。
+
+用法:
+    python benchmarks/bench_contention.py --threads 4 --sessions 20 --log-ms 0.5 --callback-ms 2
+    python benchmarks/bench_contention.py --baseline HEAD~1 --output contention.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT_DIR, NullLogger, write_results
+from traffic import SERVER_IP, CLIENT_IP, SERVER_PORT, rtmp_publish_session, rtmp_server_handshake, tcp_frame, background_frames
+
+DEFAULT_SERVER = "rtmp://push-rtmp-l1.douyincdn.com/third"
+
+
+class SlowLogger(NullLogger):
+    """info 带固定延迟的日志对象（模拟跨线程写 Tk 控件）"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def info(self, message):
+        if self.delay:
+            time.sleep(self.delay)
+
+
+class CountingLock:
+    """包装 PacketCapture.lock，统计获取次数、需要等待的次数和累计等待时间（新旧版本统一测量）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+
+    def __enter__(self):
+        if not self._lock.acquire(False):
+            start = time.perf_counter()
+            self._lock.acquire()
+            self.contended += 1
+            self.wait_seconds += time.perf_counter() - start
+        self.acquired += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._lock.release()
+        return False
+
+
+def interface_frames(index, sessions, background):
+    """一个接口上的流量：多次推流会话（推流码各不相同），之间夹杂背景报文"""
+    frames = []
+    noise = background_frames(background)
+    for number in range(sessions):
+        port = 40000 + number
+        stream_key = f"stream-{index:03d}{number:06d}?expire=1735689600&sign=0123456789abcdef"
+        seq = 1
+        c0c1, c2, *commands = rtmp_publish_session(DEFAULT_SERVER, stream_key)
+        frames.append(tcp_frame(c0c1, sport=port, seq=seq))
+        seq += len(c0c1)
+        frames.append(tcp_frame(rtmp_server_handshake(), src=SERVER_IP, dst=CLIENT_IP, sport=SERVER_PORT, dport=port))
+        for payload in [c2] + commands:
+            frames.append(tcp_frame(payload, sport=port, seq=seq))
+            seq += len(payload)
+        frames.extend(noise)
+    return frames
+
+
+def run_worker(args):
+    """在 --tree 指定的源码目录中测量，结果以 JSON 输出到标准输出"""
+    if args.tree:
+        sys.path.insert(0, args.tree)
+    from core.capture import PacketCapture
+    from core.capture_filter import CaptureFilter
+    from core.frame import DLT_EN10MB
+
+    capture = PacketCapture(SlowLogger(args.log_ms / 1000))
+    capture.capture_filter = CaptureFilter()
+    capture.monitor = True
+    interfaces = [f"bench{index}" for index in range(args.threads)]
+    for interface in interfaces:
+        capture._prepare_interface(interface)
+    lock = capture.lock = CountingLock()
+    changes = []
+
+    def on_change(server, key):
+        time.sleep(args.callback_ms / 1000)
+        changes.append(key)
+
+    capture.add_change_callback(on_change)
+    traffic = {interface: interface_frames(index, args.sessions, args.background) for index, interface in enumerate(interfaces)}
+    barrier = threading.Barrier(len(interfaces) + 1)
+    elapsed = {}
+
+    def replay(interface):
+        frames = traffic[interface]
+        barrier.wait()
+        start = time.perf_counter()
+        for frame in frames:
+            capture._frame_callback(frame, DLT_EN10MB, interface, True)
+        elapsed[interface] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=replay, args=(interface,)) for interface in interfaces]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    packets = sum(len(frames) for frames in traffic.values())
+    json.dump(
+        {
+            "packets": packets,
+            "wall_seconds": wall,
+            "pps": packets / wall if wall > 0 else 0.0,
+            "slowest_thread_seconds": max(elapsed.values()),
+            "changes": len(changes),
+            "expected_changes": args.threads * args.sessions,
+            "lock_acquired": lock.acquired,
+            "lock_contended": lock.contended,
+            "lock_wait_ms": lock.wait_seconds * 1000,
+        },
+        sys.stdout,
+    )
+
+
+def measure_tree(tree, args):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker", "--tree", tree,
+        "--threads", str(args.threads), "--sessions", str(args.sessions), "--background", str(args.background),
+        "--log-ms", str(args.log_ms), "--callback-ms", str(args.callback_ms),
+    ]
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run(command, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"))
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "运行失败"}
+        runs.append(json.loads(result.stdout))
+    best = dict(min(runs, key=lambda run: run["wall_seconds"]))
+    best["runs"] = runs
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4, help="回放线程（接口）数")
+    parser.add_argument("--sessions", type=int, default=20, help="每个接口的推流会话数")
+    parser.add_argument("--background", type=int, default=200, help="每次会话之后的背景报文数")
+    parser.add_argument("--log-ms", type=float, default=0.5, help="每次 info 日志的耗时（毫秒）")
+    parser.add_argument("--callback-ms", type=float, default=2.0, help="每次变化回调的耗时（毫秒）")
+    parser.add_argument("--runs", type=int, default=3, help="每个版本的轮数（取最快的一轮）")
+    parser.add_argument("--baseline", help="作为对照的 git 版本，例如 HEAD~1")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--tree", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    from bench_startup import export_revision
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if args.baseline:
+            export_revision(args.baseline, directory)
+            results[f"优化前 {args.baseline}"] = measure_tree(directory, args)
+        results["当前工作区"] = measure_tree(ROOT_DIR, args)
+
+    print(f"{'版本':<20}{'墙钟(秒)':>10}{'包/秒':>10}{'变化通知':>10}{'获取锁':>8}{'争用':>8}{'等待(毫秒)':>12}")
+    for label, result in results.items():
+        if "error" in result:
+            print(f"{label:<20}运行失败: {result['error']}")
+            continue
+        print(
+            f"{label:<20}{result['wall_seconds']:>10.3f}{result['pps']:>10.0f}"
+            f"{result['changes']:>6}/{result['expected_changes']:<3}{result['lock_acquired']:>8}"
+            f"{result['lock_contended']:>8}{result['lock_wait_ms']:>12.1f}"
+        )
+
+    write_results(args.output, "contention", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""推流地址/推流码检测的微基准：字节扫描器 vs 原有的解码 + 正则路径
+
+字节扫描器的收益来自不含命令标记的背景流量（跳过解码）；命令负载只做一次正则查找，与原路径基本持平。
+
+用法: python benchmarks/bench_detector.py [--number 20000]
+"""
+import argparse
+import os
+import re
+import timeit
+
+import common  # noqa: F401  设置导入路径
+from traffic import rtmp_publish_session, DEFAULT_SERVER, DEFAULT_STREAM_KEY
+
+from core.detector import StreamKeyDetector
+
+HTTP_TEXT = (
+    b"GET /api/v1/feed?count=20&cursor=0 HTTP/1.1\r\nHost: www.example.com\r\n"
+    b"Accept: application/json, text/plain\r\nCookie: session=abcdef; track=12345\r\n"
+    b"User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64)\r\nConnection: keep-alive\r\n\r\n"
+) * 5
+
+
+def legacy_scan(data, need_server=True, need_key=True):
+    """原 _packet_callback 中的检测逻辑"""
+    payload = bytes(data).decode("utf-8", errors="ignore")
+    server = key = None
+    if need_server and "connect" in payload:
+        server_match = re.search(r"(rtmp://[a-zA-Z0-9\-\.]+/[^/]+)", payload)
+        if server_match:
+            server = server_match.group(1).split("\x00")[0]
+    if need_key and "FCPublish" in payload:
+        code_match = re.search(
+            r"(stream-\d+\?[a-zA-Z0-9_]+=[a-zA-Z0-9\-]+(?:&[a-zA-Z0-9_]+=[a-zA-Z0-9\-]+)*)",
+            payload,
+        )
+        if code_match:
+            key = code_match.group(1)
+            if key.endswith("C"):
+                key = key[:-1]
+    return server, key
+
+
+def payload_cases():
+    session = rtmp_publish_session()
+    return {
+        "随机二进制(1400B)": os.urandom(1400),
+        "HTTP 文本(1400B)": HTTP_TEXT[:1400],
+        "RTMP connect": session[2],
+        "RTMP FCPublish": session[3],
+    }
+
+
+def check_parity():
+    """不同块大小下（命令被块头拆开），两种实现结果应一致
+
+    块大小小于 12 字节时 connect / FCPublish 标记本身会被拆开，不在比较范围内（实际的块大小至少为 128）。
+    """
+    detector = StreamKeyDetector()
+    mismatches = []
+    for chunk_size in list(range(12, 400)) + [4096]:
+        for payload in rtmp_publish_session(DEFAULT_SERVER, DEFAULT_STREAM_KEY, chunk_size):
+            expected = legacy_scan(payload)
+            actual = detector.scan(payload)
+            if expected != actual:
+                mismatches.append((chunk_size, expected, actual))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="每种负载的循环次数")
+    args = parser.parse_args()
+
+    detector = StreamKeyDetector()
+    print(f"{'负载':<20}{'原路径(微秒)':>14}{'字节扫描(微秒)':>16}{'加速比':>10}")
+    for name, payload in payload_cases().items():
+        view = memoryview(payload)
+        # 多轮取最快的一轮，减少机器负载波动的影响
+        legacy = min(timeit.repeat(lambda: legacy_scan(view), number=args.number, repeat=5)) / args.number
+        fast = min(timeit.repeat(lambda: detector.scan(view), number=args.number, repeat=5)) / args.number
+        print(f"{name:<20}{legacy * 1e6:>14.2f}{fast * 1e6:>16.2f}{legacy / fast:>10.1f}x")
+
+    print("命令负载（connect / FCPublish）只做一次字节正则查找，与原路径基本持平，不是加速来源")
+    mismatches = check_parity()
+    print(f"结果不一致数: {len(mismatches)}")
+    for mismatch in mismatches:
+        print("  ", mismatch)
+
+
+if __name__ == "__main__":
+    main()
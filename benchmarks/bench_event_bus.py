@@ -0,0 +1,160 @@
+"""界面更新基准：工作线程直接写 Tk 控件 vs 事件总线由主线程定时批量处理
+
+多个工作线程以尽可能快的速度输出日志行，并夹杂持续监控的推流信息变化事件。
+direct 模式下每条日志都直接调用控件（Tk 解释器同一时间只能执行一个调用，用锁加固定耗时模拟）；
+bus 模式下日志经 Logger 发布到 EventBus，由模拟的主线程按 after() 间隔批量取出，每批每个控件只插入一次，
+推流信息变化每批只分发最新的一个。统计控件调用次数、每秒界面更新次数、工作线程每条日志的耗时和丢弃数。
+不需要显示器：控件和根窗口都是模拟对象。
+
+用法:
+    python benchmarks/bench_event_bus.py --threads 4 --lines 20000 --widget-us 50 --output event_bus.json
+"""
+import argparse
+import threading
+import time
+
+from common import write_results
+
+from utils.event_bus import EventBus, EVENT_CHANGED, DISPATCH_LATEST, DRAIN_INTERVAL
+from utils.logger import Logger
+
+
+class FakeText:
+    """模拟 ScrolledText：所有调用串行执行，每次调用有固定耗时"""
+
+    def __init__(self, cost, tk_lock):
+        self.cost = cost
+        self.tk_lock = tk_lock
+        self.calls = 0
+        self.lines = 0
+
+    def _call(self):
+        with self.tk_lock:
+            self.calls += 1
+            end = time.perf_counter() + self.cost
+            while time.perf_counter() < end:
+                pass
+
+    def insert(self, index, text):
+        self._call()
+        self.lines += text.count("\n")
+
+    def see(self, index):
+        self._call()
+
+    def index(self, index):
+        return f"{self.lines + 1}.0"
+
+    def delete(self, start, end=None):
+        self._call()
+
+
+class FakeRoot:
+    """模拟 Tk 根窗口的 after()，由 run() 在当前线程中按时间执行"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, milliseconds, func):
+        self.scheduled.append((time.perf_counter() + milliseconds / 1000, func))
+
+    def run(self, until):
+        while not until():
+            if not self.scheduled:
+                time.sleep(0.001)
+                continue
+            self.scheduled.sort(key=lambda item: item[0])
+            due, func = self.scheduled.pop(0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            func()
+
+
+def run_mode(mode, args):
+    tk_lock = threading.Lock()
+    console = FakeText(args.widget_us / 1e6, tk_lock)
+    packet_console = FakeText(args.widget_us / 1e6, tk_lock)
+    root = FakeRoot()
+    changes = []
+    bus = None
+    if mode == "bus":
+        bus = EventBus()
+        bus.attach(root, args.interval)
+        bus.subscribe(EVENT_CHANGED, lambda server, key: changes.append(key), DISPATCH_LATEST)
+    logger = Logger(bus)
+    logger.set_consoles(console, packet_console)
+
+    def on_change(server, key):
+        # direct 模式下回调直接更新控件（与原来的 on_stream_changed 相同）
+        console._call()
+        changes.append(key)
+
+    worker_seconds = []
+
+    def worker(index):
+        start = time.perf_counter()
+        for number in range(args.lines):
+            logger.info(f"接口 bench{index} 报文 {number}")
+            if number % args.change_every == 0:
+                key = f"stream-{index}-{number}"
+                if bus is not None:
+                    bus.publish(EVENT_CHANGED, "rtmp://example/live", key)
+                else:
+                    on_change("rtmp://example/live", key)
+        worker_seconds.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    if bus is not None:
+        root.run(lambda: not any(thread.is_alive() for thread in threads))
+    for thread in threads:
+        thread.join()
+    if bus is not None:
+        bus.drain()  # 最后一批
+    wall = time.perf_counter() - start
+    events = args.threads * args.lines
+    result = {
+        "mode": mode,
+        "lines": events,
+        "wall_seconds": wall,
+        "widget_calls": console.calls + packet_console.calls,
+        "widget_calls_per_second": (console.calls + packet_console.calls) / wall if wall > 0 else 0.0,
+        "lines_written": console.lines,
+        "worker_us_per_line": max(worker_seconds) / args.lines * 1e6,
+        "change_updates": len(changes),
+    }
+    if bus is not None:
+        result["bus"] = bus.stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4, help="工作线程数")
+    parser.add_argument("--lines", type=int, default=20000, help="每个线程输出的日志行数")
+    parser.add_argument("--change-every", type=int, default=500, help="每隔多少行发布一次推流信息变化")
+    parser.add_argument("--widget-us", type=float, default=50, help="每次控件调用的耗时（微秒）")
+    parser.add_argument("--interval", type=int, default=DRAIN_INTERVAL, help="主线程取出事件的间隔（毫秒）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'模式':<8}{'墙钟(秒)':>10}{'控件调用':>10}{'调用/秒':>10}{'写入行数':>10}{'线程微秒/行':>12}{'变化更新':>10}{'丢弃':>8}")
+    for mode in ("direct", "bus"):
+        result = run_mode(mode, args)
+        results.append(result)
+        print(
+            f"{mode:<8}{result['wall_seconds']:>10.2f}{result['widget_calls']:>10}"
+            f"{result['widget_calls_per_second']:>10.0f}{result['lines_written']:>10}"
+            f"{result['worker_us_per_line']:>12.2f}{result['change_updates']:>10}"
+            f"{result.get('bus', {}).get('dropped', 0):>8}"
+        )
+
+    write_results(args.output, "event_bus", args, results)
+
+
+if __name__ == "__main__":
+    main()
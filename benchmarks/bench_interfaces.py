@@ -0,0 +1,104 @@
+"""接口解析基准：每次启动都查询系统并解析显示名称 vs 共享的接口缓存
+
+模拟界面反复“开始捕获 / 检测可用”：旧做法每次调用 get_windows_if_list，再从显示名称
+（name [状态] - 描述）中拆出接口名称逐个在列表中查找；新做法使用 InterfaceRegistry，
+在有效期内只查询一次系统并按名称索引查找。系统查询用带固定延迟的合成接口列表代替。
+
+用法:
+    python benchmarks/bench_interfaces.py --interfaces 40 --query-ms 80 --calls 50 --output interfaces.json
+"""
+import argparse
+import time
+
+from common import write_results
+
+from utils.network import InterfaceRecord, InterfaceRegistry
+
+
+def fake_interfaces(count):
+    """合成的 get_windows_if_list 结果"""
+    return [
+        {
+            "name": f"\\Device\\NPF_{{{index:08X}-0000-0000-0000-000000000000}}",
+            "description": f"Ethernet Adapter #{index}",
+            "ips": [f"192.168.{index // 250}.{index % 250 + 1}", f"fe80::{index:x}"],
+            "mac": f"00:11:22:33:{index // 256:02x}:{index % 256:02x}",
+        }
+        for index in range(count)
+    ]
+
+
+def make_query(interfaces, delay, counter):
+    def query():
+        counter[0] += 1
+        time.sleep(delay)
+        return interfaces
+
+    return query
+
+
+def resolve_legacy(query, display_names):
+    """旧做法：每次查询系统，并从显示名称中拆出接口名称"""
+    names = {iface.get("name") for iface in query()}
+    found = []
+    for display_name in display_names:
+        interface = display_name.split(" [")[0].strip()
+        if interface in names and interface not in found:
+            found.append(interface)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interfaces", type=int, default=40, help="系统接口数")
+    parser.add_argument("--query-ms", type=float, default=80, help="一次系统查询的耗时（毫秒）")
+    parser.add_argument("--calls", type=int, default=50, help="开始捕获 / 检测的次数")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    interfaces = fake_interfaces(args.interfaces)
+    records = [InterfaceRecord(i["name"], i["description"], i["ips"], i["mac"]) for i in interfaces]
+    display_names = [record.display_name() for record in records]
+    names = [record.name for record in records]
+    delay = args.query_ms / 1000
+
+    results = []
+    counter = [0]
+    query = make_query(interfaces, delay, counter)
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        found = resolve_legacy(query, display_names)
+    legacy_seconds = time.perf_counter() - start
+    assert found == names
+    results.append({"mode": "legacy", "seconds": legacy_seconds, "queries": counter[0]})
+
+    counter = [0]
+    registry = InterfaceRegistry(query=make_query(interfaces, delay, counter))
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        found = registry.resolve(names)
+    registry_seconds = time.perf_counter() - start
+    assert found == names
+    results.append({"mode": "registry", "seconds": registry_seconds, "queries": counter[0]})
+
+    # 不计系统查询时的纯查找开销
+    registry.query = make_query(interfaces, 0, [0])
+    legacy_query = make_query(interfaces, 0, [0])
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        resolve_legacy(legacy_query, display_names)
+    results[0]["lookup_us"] = (time.perf_counter() - start) / args.calls * 1e6
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        registry.resolve(names)
+    results[1]["lookup_us"] = (time.perf_counter() - start) / args.calls * 1e6
+
+    print(f"{'方式':<12}{'总耗时(ms)':>12}{'系统查询次数':>14}{'每次查找(微秒)':>16}")
+    for result in results:
+        print(f"{result['mode']:<12}{result['seconds'] * 1000:>12.1f}{result['queries']:>14}{result['lookup_us']:>16.1f}")
+
+    write_results(args.output, "interfaces", args, results)
+
+
+if __name__ == "__main__":
+    main()
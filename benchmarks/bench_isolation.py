@@ -0,0 +1,158 @@
+"""界面主线程响应延迟基准：线程模式 vs 子进程模式抓包
+
+主线程模拟 Tk 主循环，每 10 毫秒处理一批界面事件：每个事件执行少量 Python 代码，
+事件之间回到 C 层释放 GIL（相当于 Tk 在两次 Python 回调之间）。
+同时在线程或子进程中回放同一份合成流量，对比两种模式下主线程的滞后和事件处理耗时。
+
+用法:
+    python benchmarks/bench_isolation.py --background-mb 100 --output isolation.json
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from common import NullLogger, write_results
+from traffic import traffic_mix
+
+from core.capture import PacketCapture
+from core.capture_worker import run_capture_worker
+from core.pcap_file import write_pcap
+
+TICK_INTERVAL = 0.01  # 与 Tk after(10) 相当
+EVENTS_PER_TICK = 10  # 每次定时任务中需要进入 Python 的界面事件数
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(int(len(values) * percent / 100), len(values) - 1)
+    return values[index]
+
+
+def _ui_event():
+    """一个界面事件回调的 Python 开销"""
+    return sum(range(200))
+
+
+def run_ticker(is_busy):
+    """在主线程上按固定间隔处理界面事件
+
+    Returns:
+        tuple: (每次定时任务的滞后毫秒列表, 每次处理全部事件的耗时毫秒列表)
+    """
+    lateness = []
+    handling = []
+    next_tick = time.perf_counter() + TICK_INTERVAL
+    while is_busy():
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        now = time.perf_counter()
+        lateness.append((now - next_tick) * 1000)
+        for _ in range(EVENTS_PER_TICK):
+            _ui_event()
+            time.sleep(0)  # 释放 GIL，之后需要重新争抢
+        handling.append((time.perf_counter() - now) * 1000)
+        next_tick = max(next_tick + TICK_INTERVAL, time.perf_counter())
+    return lateness, handling
+
+
+def run_idle(path, duration):
+    """无负载基线"""
+    end = time.perf_counter() + duration
+    return run_ticker(lambda: time.perf_counter() < end), None
+
+
+def run_thread_mode(path, duration):
+    """线程模式：在本进程的线程中回放"""
+    capture = PacketCapture(NullLogger())
+    result = {}
+
+    def work():
+        result["report"] = capture.replay(path, stop_on_detect=False)
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    ticks = run_ticker(thread.is_alive)
+    thread.join()
+    return ticks, result.get("report")
+
+
+def run_process_mode(path, duration):
+    """子进程模式：在子进程中回放，主进程只接收事件"""
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    stop_event = context.Event()
+    process = context.Process(
+        target=run_capture_worker,
+        args=({"replay": path, "stop_on_detect": False}, events, stop_event),
+        daemon=True,
+    )
+    result = {}
+
+    def listen():
+        while True:
+            event = events.get()
+            if event[0] == "replayed":
+                result["report"] = event[1]
+            elif event[0] == "stopped":
+                return
+
+    listener = threading.Thread(target=listen, daemon=True)
+    process.start()
+    listener.start()
+    ticks = run_ticker(listener.is_alive)
+    process.join()
+    return ticks, result.get("report")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--background-mb", type=float, default=100, help="回放的背景流量大小（MB）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".pcap")
+    os.close(fd)
+    try:
+        write_pcap(path, (frame for frame, _ in traffic_mix(args.background_mb)), interval=1e-5)
+        results = {}
+        print(
+            f"{'模式':<10}{'滞后p50':>10}{'滞后p99':>10}{'滞后最大':>10}"
+            f"{'事件耗时p50':>12}{'事件耗时p99':>12}{'回放包/秒':>12}"
+        )
+        duration = None
+        for name, runner in (("idle", run_idle), ("thread", run_thread_mode), ("process", run_process_mode)):
+            start = time.perf_counter()
+            (lateness, handling), report = runner(path, duration or 2.0)
+            elapsed = time.perf_counter() - start
+            duration = duration or elapsed
+            results[name] = {
+                "ticks": len(lateness),
+                "lateness_p50_ms": _percentile(lateness, 50),
+                "lateness_p99_ms": _percentile(lateness, 99),
+                "lateness_max_ms": max(lateness) if lateness else None,
+                "handling_p50_ms": _percentile(handling, 50),
+                "handling_p99_ms": _percentile(handling, 99),
+                "seconds": elapsed,
+                "replay_pps": report["pps"] if report else None,
+            }
+            row = results[name]
+            pps = f"{row['replay_pps']:.0f}" if row["replay_pps"] else "-"
+            print(
+                f"{name:<10}{row['lateness_p50_ms']:>10.2f}{row['lateness_p99_ms']:>10.2f}"
+                f"{row['lateness_max_ms']:>10.2f}{row['handling_p50_ms']:>12.2f}"
+                f"{row['handling_p99_ms']:>12.2f}{pps:>12}"
+            )
+    finally:
+        os.remove(path)
+
+    write_results(args.output, "isolation", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""持续监控基准：推流码轮换时能否收到变化通知，以及稳态（只剩媒体和背景流量）时的 CPU 开销
+
+合成流量：第一次推流（握手 + connect + FCPublish）后是大量媒体数据和背景流量，
+随后直播伴侣换新推流码重连（新连接），再在同一连接上重新发布一次，之后又是媒体数据。
+分别在“收窄内核过滤器”、“握手识别 + 白名单”和“不收窄”三种方式下持续监控，
+统计稳态每个线上报文的 CPU 耗时并按给定的包速率换算成 CPU 占用。
+
+默认在进程内直接调用抓包回调，此时没有内核，bpf 模式只是按收窄表达式的语义用 Python 模拟过滤
+（结果标为 bpf-simulated，模拟本身计入耗时，也作用于重新发布阶段），不能作为内核过滤效果的依据。
+指定 --live-interface 时改为通过 AF_PACKET 把同样的流量重放到真实接口上，由抓包引擎完整地
+打开句柄、收窄并通过 apply_filter 重新设置内核过滤器；结果中的 kernel_filter 表示收窄表达式
+是否真的挂到了内核（需要 libpcap 或 tcpdump 编译表达式，否则只用 Python 侧白名单）。
+可选在真实接口上测量空闲时抓包循环本身的 CPU 占用。
+
+用法:
+    python benchmarks/bench_monitor.py --media-packets 50000 --output monitor.json
+    python benchmarks/bench_monitor.py --live-interface lo --media-packets 20000 --live-pps 20000
+    python benchmarks/bench_monitor.py --idle-interface lo --idle-seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+
+from common import NullLogger, write_results
+from traffic import (
+    CLIENT_IP,
+    DEFAULT_SERVER,
+    DEFAULT_STREAM_KEY,
+    SERVER_IP,
+    background_frames,
+    rtmp_command,
+    rtmp_publish_session,
+    rtmp_server_handshake,
+    tcp_frame,
+)
+
+from core.capture import PacketCapture
+from core.capture_filter import CaptureFilter
+from core.frame import DLT_EN10MB, parse_tcp_frame, format_address
+from core.rtmp_classifier import NARROW_OFF, NARROW_WHITELIST, NARROW_BPF, RTMP_VERSION
+
+INTERFACE = "bench"
+SERVER_PORT = 1935
+MEDIA_SIZE = 1400
+
+
+class Session:
+    """一次推流连接：握手、命令和媒体数据的帧（序列号连续）"""
+
+    def __init__(self, client_port, stream_key):
+        self.client_port = client_port
+        self.stream_key = stream_key
+        self.seq = 1
+
+    def _frame(self, payload):
+        frame = tcp_frame(payload, sport=self.client_port, dport=SERVER_PORT, seq=self.seq)
+        self.seq += len(payload)
+        return frame
+
+    def publish_frames(self):
+        c0c1, c2, *commands = rtmp_publish_session(DEFAULT_SERVER, self.stream_key)
+        frames = [self._frame(c0c1)]
+        frames.append(
+            tcp_frame(rtmp_server_handshake(), src=SERVER_IP, dst=CLIENT_IP,
+                      sport=SERVER_PORT, dport=self.client_port, seq=1)
+        )
+        frames.extend(self._frame(payload) for payload in [c2] + commands)
+        return frames
+
+    def republish_frames(self, stream_key):
+        """同一连接上重新发布新的推流码"""
+        payload = rtmp_command("FCPublish", 6, None, stream_key) + rtmp_command("publish", 7, None, stream_key, "live")
+        return [self._frame(payload)]
+
+    def media_frames(self, count):
+        # 媒体数据的 TCP 分段从块中间的任意位置开始，第一个字节是随机的
+        body = os.urandom(MEDIA_SIZE - 1)
+        return [self._frame(os.urandom(1) + body) for _ in range(count)]
+
+
+def build_traffic(media_packets, background_ratio):
+    """返回 [(阶段, 帧列表)] 和期望收到的变化通知"""
+    background = background_frames(int(media_packets * background_ratio))
+    first = Session(52000, DEFAULT_STREAM_KEY)
+    second = Session(52001, DEFAULT_STREAM_KEY.replace("117834", "223344"))
+    third_key = DEFAULT_STREAM_KEY.replace("117834", "556677")
+
+    def mixed(session):
+        media = session.media_frames(media_packets)
+        frames = []
+        step = max(int(1 / background_ratio), 1) if background_ratio else 0
+        for index, frame in enumerate(media):
+            frames.append(frame)
+            if step and index % step == 0 and background:
+                frames.append(background[(index // step) % len(background)])
+        return frames
+
+    phases = [
+        ("publish", first.publish_frames()),
+        ("steady", mixed(first)),
+        ("reconnect", second.publish_frames()),
+        ("steady", mixed(second)),
+        ("republish", second.republish_frames(third_key)),
+        ("steady", mixed(second)),
+    ]
+    expected = [first.stream_key, second.stream_key, third_key]
+    return phases, expected
+
+
+# 实时模式下送达报文数保持不变这么久（秒）即认为当前阶段已处理完
+LIVE_IDLE_SECONDS = 0.3
+LIVE_POLL = 0.01
+# 抓包引擎成功收窄内核过滤器时输出的日志（见 PacketCapture._narrow_filter）
+NARROWED_MESSAGE = "已把内核过滤器收窄"
+
+
+def kernel_pass(capture, frame):
+    """模拟收窄后的内核过滤器（只用于离线模式）：放行仍需检测的连接，以及负载以 0x03 开头的报文"""
+    classifier = capture.classifiers.get(INTERFACE)
+    if classifier is None or not classifier.narrowed:
+        return True
+    segment = parse_tcp_frame(frame, DLT_EN10MB)
+    if segment is None:
+        return False  # 收窄后的过滤器只放行 TCP
+    src, dst, src_port, dst_port, _, _, payload = segment
+    if len(payload) and payload[0] == RTMP_VERSION:
+        return True
+    return (format_address(src), src_port, format_address(dst), dst_port) in classifier.flows
+
+
+def run_mode(narrowing, phases):
+    capture = PacketCapture(NullLogger())
+    capture.capture_filter = CaptureFilter()
+    capture.monitor = True
+    capture.narrowing = narrowing
+    capture._prepare_interface(INTERFACE)
+    changes = []
+    capture.add_change_callback(lambda server, key: changes.append(key))
+
+    simulate = narrowing == NARROW_BPF
+    frame_callback = capture._frame_callback
+    steady_packets = 0
+    steady_cpu = 0.0
+    for phase, frames in phases:
+        cpu_start = time.process_time()
+        for frame in frames:
+            # 模拟的内核过滤作用于所有阶段，耗时计入结果
+            if simulate and not kernel_pass(capture, frame):
+                continue
+            frame_callback(frame, DLT_EN10MB, INTERFACE, True)
+        if phase == "steady":
+            steady_cpu += time.process_time() - cpu_start
+            steady_packets += len(frames)
+
+    stats = capture.get_capture_stats()[INTERFACE]
+    return {
+        "mode": f"{narrowing}-simulated" if simulate else narrowing,
+        "changes": changes,
+        "steady_packets": steady_packets,
+        "steady_cpu_us_per_packet": steady_cpu / steady_packets * 1e6 if steady_packets else 0.0,
+        "reached_detection": stats["detected"],
+        "narrow_skipped": stats.get("narrow_skipped", 0),
+    }
+
+
+class RecordingLogger(NullLogger):
+    """记录信息日志，用于判断抓包引擎是否真的收窄了内核过滤器"""
+
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message):
+        self.messages.append(message)
+
+
+class LiveCapture(PacketCapture):
+    """使用固定收窄方式的持续监控，其他抓包配置仍按配置文件读取"""
+
+    def __init__(self, logger, narrowing):
+        super().__init__(logger)
+        self.forced_narrowing = narrowing
+
+    def _load_capture_settings(self):
+        super()._load_capture_settings()
+        self.monitor = True
+        self.narrowing = self.forced_narrowing
+
+
+def replay_phases(interface, phases, pps, commands, replies):
+    """发送进程：每收到一个阶段序号，按包速率把该阶段的帧发送到接口上，发送完后回复"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
+    sock.bind((interface, 0))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 << 20)
+    replies.put(None)
+    while True:
+        index = commands.get()
+        if index is None:
+            break
+        begin = time.perf_counter()
+        for sent, frame in enumerate(phases[index][1]):
+            if pps and sent % 100 == 0:
+                delay = begin + sent / pps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            while True:
+                try:
+                    sock.send(frame)
+                    break
+                except BlockingIOError:
+                    time.sleep(0.0001)
+        replies.put(index)
+    sock.close()
+
+
+def run_live(narrowing, phases, interface, pps):
+    """在真实接口上重放流量，抓包、收窄和检测都走抓包引擎的完整路径
+
+    稳态 CPU 只统计本进程（抓包和检测），不含发送进程；lo 上每个帧会以发出和收到两个方向各送达一次。
+    """
+    logger = RecordingLogger()
+    capture = LiveCapture(logger, narrowing)
+    changes = []
+    capture.add_change_callback(lambda server, key: changes.append(key))
+    context = multiprocessing.get_context("fork")
+    commands = context.Queue()
+    replies = context.Queue()
+    sender = context.Process(target=replay_phases, args=(interface, phases, pps, commands, replies), daemon=True)
+    sender.start()
+    replies.get()
+    capture._launch([interface])
+    time.sleep(0.5)
+
+    steady_packets = 0
+    steady_cpu = 0.0
+    try:
+        for index, (phase, frames) in enumerate(phases):
+            stats = capture.capture_stats[interface]
+            cpu_start = time.process_time()
+            commands.put(index)
+            replies.get()
+            last = stats.delivered
+            last_time = time.perf_counter()
+            while time.perf_counter() - last_time < LIVE_IDLE_SECONDS:
+                time.sleep(LIVE_POLL)
+                if stats.delivered != last:
+                    last = stats.delivered
+                    last_time = time.perf_counter()
+            if phase == "steady":
+                steady_cpu += time.process_time() - cpu_start
+                steady_packets += len(frames)
+    finally:
+        commands.put(None)
+        sender.join()
+        capture.stop()
+
+    stats = capture.get_capture_stats()[interface]
+    return {
+        "mode": f"{narrowing}-live",
+        "changes": changes,
+        "steady_packets": steady_packets,
+        "steady_cpu_us_per_packet": steady_cpu / steady_packets * 1e6 if steady_packets else 0.0,
+        "reached_detection": stats["detected"],
+        "narrow_skipped": stats.get("narrow_skipped", 0),
+        "delivered": stats["delivered"],
+        "kernel_filter": any(NARROWED_MESSAGE in message for message in logger.messages),
+    }
+
+
+def measure_idle(interface, seconds):
+    """在真实接口上空转，测量抓包循环本身（select 超时唤醒、定期读取内核统计）的 CPU 占用"""
+    capture = PacketCapture(NullLogger())
+    capture._launch([interface])
+    cpu_start = time.process_time()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    stats = capture.get_capture_stats().get(interface, {})
+    capture.stop()
+    return {"interface": interface, "seconds": seconds, "cpu_percent": cpu / seconds * 100, "packets": stats.get("delivered", 0)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--media-packets", type=int, default=50000, help="每个稳态阶段的媒体报文数")
+    parser.add_argument("--background-ratio", type=float, default=0.5, help="背景报文与媒体报文的比例")
+    parser.add_argument("--pps", type=int, default=3000, help="换算 CPU 占用时使用的稳态包速率")
+    parser.add_argument("--live-interface", help="在真实接口上重放流量并走完整抓包路径（需要 Linux 和 root 权限）")
+    parser.add_argument("--live-pps", type=int, default=20000, help="实时模式的发送包速率，0 为尽可能快")
+    parser.add_argument("--idle-interface", help="测量空闲抓包循环 CPU 占用的真实接口（需要管理员权限）")
+    parser.add_argument("--idle-seconds", type=float, default=10, help="空闲测量时长（秒）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    phases, expected = build_traffic(args.media_packets, args.background_ratio)
+    results = []
+    print(f"{'模式':<18}{'变化通知':>10}{'通知正确':>10}{'稳态CPU微秒/包':>16}{f'CPU占用@{args.pps}包/秒':>20}")
+    for narrowing in (NARROW_BPF, NARROW_WHITELIST, NARROW_OFF):
+        if args.live_interface:
+            result = run_live(narrowing, phases, args.live_interface, args.live_pps)
+        else:
+            result = run_mode(narrowing, phases)
+        result["changes_correct"] = result["changes"] == expected
+        result["cpu_percent_at_pps"] = result["steady_cpu_us_per_packet"] * args.pps / 1e6 * 100
+        results.append(result)
+        print(
+            f"{result['mode']:<18}{len(result['changes']):>10}{str(result['changes_correct']):>10}"
+            f"{result['steady_cpu_us_per_packet']:>16.2f}{result['cpu_percent_at_pps']:>19.2f}%"
+        )
+    if args.live_interface:
+        bpf = results[0]
+        print(f"bpf 模式内核过滤器{'已收窄' if bpf['kernel_filter'] else '未能收窄（无法编译表达式），结果等同白名单'}")
+    else:
+        print("bpf-simulated 为 Python 模拟的内核过滤，不代表真实内核过滤效果；使用 --live-interface 测量真实路径")
+
+    idle = None
+    if args.idle_interface:
+        idle = measure_idle(args.idle_interface, args.idle_seconds)
+        print(f"空闲抓包循环（{idle['interface']}）: CPU {idle['cpu_percent']:.3f}%，收到 {idle['packets']} 个报文")
+
+    write_results(args.output, "monitor", args, {"modes": results, "idle": idle})
+
+
+if __name__ == "__main__":
+    main()
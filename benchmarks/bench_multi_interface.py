@@ -0,0 +1,156 @@
+"""多网卡抓包基准：每个接口一个线程（原实现） vs 单线程 select 多路复用
+
+每个模拟接口是一个始终可读的句柄，预先装入相同数量的背景报文，
+相当于所有网卡同时满负荷收包；统计处理完全部报文的吞吐、CPU 和上下文切换次数。
+
+用法:
+    python benchmarks/bench_multi_interface.py --interfaces 1 2 4 6 8 12 --packets 20000 --output multi.json
+"""
+import argparse
+import os
+import select
+import threading
+import time
+
+import psutil
+
+from common import NullLogger, write_results
+from traffic import background_frames
+
+from core.capture import PacketCapture, SELECT_TIMEOUT
+from core.frame import linktype_of
+
+
+class FakeHandle:
+    """模拟抓包句柄：fileno 始终可读，recv_raw 依次返回预先准备的帧（非阻塞，读空时返回空结果）"""
+
+    nonblocking_socket = True
+
+    def __init__(self, capture, interface, frames):
+        from scapy.layers.l2 import Ether
+
+        self.capture = capture
+        self.interface = interface
+        self.frames = frames
+        self.index = 0
+        self.layer = Ether
+        self.read_fd, self.write_fd = os.pipe()
+        os.write(self.write_fd, b"x")
+
+    def fileno(self):
+        return self.read_fd
+
+    @staticmethod
+    def select(sockets, remain=None):
+        return select.select(sockets, [], [], remain)[0]
+
+    def recv_raw(self):
+        if self.index >= len(self.frames):
+            # 报文处理完后让该接口退出抓包
+            self.capture.interface_status[self.interface] = False
+            return None, None, None
+        frame = self.frames[self.index]
+        self.index += 1
+        return self.layer, frame, 0.0
+
+    def close(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+
+def _setup(count, frames):
+    capture = PacketCapture(NullLogger())
+    capture.is_capturing = True
+    handles = {}
+    for i in range(count):
+        interface = f"if{i}"
+        capture.interface_status[interface] = True
+        capture._prepare_interface(interface)
+        capture.capture_stats[interface].bpf = True
+        handle = FakeHandle(capture, interface, frames)
+        capture.open_handles[handle] = interface
+        handles[handle] = interface
+    return capture, handles
+
+
+def run_thread_per_interface(count, frames):
+    """原实现：每个接口一个线程，各自 select + 读取"""
+    capture, handles = _setup(count, frames)
+
+    def worker(sock, interface):
+        while capture.interface_status.get(interface, False):
+            if not sock.select([sock], SELECT_TIMEOUT):
+                continue
+            layer, frame, _ = sock.recv_raw()
+            if frame is None:
+                continue
+            capture._frame_callback(frame, linktype_of(layer), interface, False)
+        sock.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(sock, interface), daemon=True)
+        for sock, interface in handles.items()
+    ]
+    peak_threads = threading.active_count() + len(threads)
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return capture, peak_threads
+
+
+def run_single_loop(count, frames):
+    """新实现：所有接口在一个线程的 select 循环中处理"""
+    capture, handles = _setup(count, frames)
+    thread = threading.Thread(target=capture._capture_loop, args=(handles,), daemon=True)
+    peak_threads = threading.active_count() + 1
+    thread.start()
+    thread.join()
+    return capture, peak_threads
+
+
+def measure(runner, count, frames):
+    process = psutil.Process()
+    switches_start = sum(process.num_ctx_switches())
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    capture, peak_threads = runner(count, frames)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    switches = sum(process.num_ctx_switches()) - switches_start
+    delivered = sum(stats.delivered for stats in capture.capture_stats.values())
+    return {
+        "threads": peak_threads,
+        "packets": delivered,
+        "wall_seconds": wall,
+        "pps": delivered / wall if wall > 0 else 0.0,
+        "cpu_us_per_packet": cpu / delivered * 1e6 if delivered else 0.0,
+        "context_switches": switches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interfaces", type=int, nargs="+", default=[1, 2, 4, 6, 8, 12], help="接口数量")
+    parser.add_argument("--packets", type=int, default=20000, help="每个接口的报文数")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    frames = background_frames(args.packets)
+    results = []
+    print(f"{'接口数':>6}{'模式':>14}{'线程数':>8}{'包/秒':>12}{'CPU微秒/包':>12}{'上下文切换':>12}")
+    for count in args.interfaces:
+        for name, runner in (("thread", run_thread_per_interface), ("select", run_single_loop)):
+            result = measure(runner, count, frames)
+            result.update({"interfaces": count, "mode": name})
+            results.append(result)
+            print(
+                f"{count:>6}{name:>14}{result['threads']:>8}{result['pps']:>12.0f}"
+                f"{result['cpu_us_per_packet']:>12.2f}{result['context_switches']:>12}"
+            )
+
+    write_results(args.output, "multi_interface", args, results)
+
+
+if __name__ == "__main__":
+    main()
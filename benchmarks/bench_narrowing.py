@@ -0,0 +1,99 @@
+"""握手识别收窄基准：识别出 RTMP 连接后，其他连接的报文是否几乎不再消耗 CPU
+
+合成流量：推流客户端先在任意端口上完成 C0+C1 / S0+S1 握手，随后是大量背景流量，
+最后才发出 connect 和 FCPublish。分别在不收窄（off）和白名单（whitelist）模式下
+经过与实时抓包相同的 _frame_callback，比较握手之后每个报文的 CPU 耗时，并确认仍能检测到推流信息。
+
+用法:
+    python benchmarks/bench_narrowing.py --packets 200000 --port 19350 --output narrowing.json
+"""
+import argparse
+import time
+
+from common import NullLogger, write_results
+from traffic import (
+    CLIENT_IP,
+    CLIENT_PORT,
+    SERVER_IP,
+    background_frames,
+    rtmp_publish_session,
+    rtmp_server_handshake,
+    tcp_frame,
+)
+
+from core.capture import PacketCapture
+from core.capture_filter import CaptureFilter
+from core.frame import DLT_EN10MB
+from core.rtmp_classifier import NARROW_OFF, NARROW_WHITELIST
+
+INTERFACE = "bench"
+
+
+def build_session(port, packets):
+    """握手帧、背景帧和握手之后的推流命令帧"""
+    c0c1, c2, *commands = rtmp_publish_session()
+    handshake = [
+        tcp_frame(c0c1, dport=port, seq=1),
+        tcp_frame(rtmp_server_handshake(), src=SERVER_IP, dst=CLIENT_IP, sport=port, dport=CLIENT_PORT, seq=1),
+    ]
+    seq = 1 + len(c0c1)
+    tail = []
+    for payload in [c2] + commands:
+        tail.append(tcp_frame(payload, dport=port, seq=seq))
+        seq += len(payload)
+    return handshake, background_frames(packets), tail
+
+
+def run_mode(narrowing, handshake, background, tail):
+    capture = PacketCapture(NullLogger())
+    capture.capture_filter = CaptureFilter()
+    capture.narrowing = narrowing
+    capture._prepare_interface(INTERFACE)
+    for frame in handshake:
+        capture._frame_callback(frame, DLT_EN10MB, INTERFACE, True)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for frame in background:
+        capture._frame_callback(frame, DLT_EN10MB, INTERFACE, True)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    for frame in tail:
+        capture._frame_callback(frame, DLT_EN10MB, INTERFACE, True)
+    stats = capture.get_capture_stats()[INTERFACE]
+    return {
+        "mode": narrowing,
+        "packets": len(background),
+        "pps": len(background) / wall if wall > 0 else 0.0,
+        "cpu_us_per_packet": cpu / len(background) * 1e6,
+        "rtmp_connections": stats.get("rtmp_connections", 0),
+        "skipped": stats.get("narrow_skipped", 0),
+        "reassembly_flows": stats["flows"],
+        "detected": bool(capture.server_address and capture.stream_code),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packets", type=int, default=200000, help="握手之后的背景报文数")
+    parser.add_argument("--port", type=int, default=19350, help="RTMP 服务端端口（非 1935 也能识别）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    handshake, background, tail = build_session(args.port, args.packets)
+    results = []
+    print(f"{'模式':<12}{'包/秒':>12}{'CPU微秒/包':>12}{'跳过':>10}{'重组流数':>10}{'检测成功':>10}")
+    for narrowing in (NARROW_OFF, NARROW_WHITELIST):
+        result = run_mode(narrowing, handshake, background, tail)
+        results.append(result)
+        print(
+            f"{narrowing:<12}{result['pps']:>12.0f}{result['cpu_us_per_packet']:>12.2f}"
+            f"{result['skipped']:>10}{result['reassembly_flows']:>10}{str(result['detected']):>10}"
+        )
+
+    write_results(args.output, "narrowing", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""检测队列基准：读取线程内直接检测（inline） vs 有界队列 + 检测线程
+
+模拟内核缓冲区：生产线程按固定包速率把合成流量放入容量有限的缓冲区，缓冲区满时丢弃（相当于内核丢包）。
+检测阶段每处理一定数量的报文就停顿一次（模拟日志刷新、界面回调或 GC 造成的卡顿）。
+RTMP 推流交互在每轮中随机插入，多轮统计各模式下的内核丢包、队列丢包、
+RTMP 报文丢失次数和检测成功率。
+
+用法:
+    python benchmarks/bench_pipeline.py --background-mb 10 --pps 15000 --stall-ms 200 --runs 10 --output pipeline.json
+"""
+import argparse
+import random
+import threading
+import time
+from collections import deque
+
+from common import NullLogger, write_results
+from traffic import traffic_mix
+
+from core.capture import PacketCapture
+from core.capture_filter import CaptureFilter
+from core.pipeline import DROP_OLDEST, DROP_NON_RTMP
+
+INTERFACE = "bench"
+
+
+class KernelBuffer:
+    """容量有限的内核缓冲区，生产线程按固定包速率写入"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.frames = deque()
+        self.dropped = 0
+        self.dropped_rtmp = 0
+        self.done = False
+
+    def produce(self, frames, pps, is_capturing):
+        start = time.perf_counter()
+        for index, (frame, is_rtmp) in enumerate(frames):
+            if not is_capturing():
+                break  # 检测到推流信息后抓包已停止
+            # 每 1 毫秒的报文一起写入
+            if index % max(pps // 1000, 1) == 0:
+                delay = start + index / pps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if len(self.frames) >= self.capacity:
+                self.dropped += 1
+                self.dropped_rtmp += is_rtmp
+                continue
+            self.frames.append(frame)
+        self.done = True
+
+
+class FakeHandle:
+    """从 KernelBuffer 非阻塞读取的抓包句柄"""
+
+    nonblocking_socket = True
+
+    def __init__(self, capture, kernel):
+        from scapy.layers.l2 import Ether
+
+        self.capture = capture
+        self.kernel = kernel
+        self.layer = Ether
+
+    def select(self, sockets, remain=None):
+        if self.kernel.frames or self.kernel.done:
+            return [self]
+        time.sleep(0.001)
+        return []
+
+    def recv_raw(self):
+        try:
+            return self.layer, self.kernel.frames.popleft(), 0.0
+        except IndexError:
+            pipeline = self.capture.pipeline
+            if self.kernel.done and (pipeline is None or not pipeline.stats()["pending"]):
+                self.capture.interface_status[INTERFACE] = False
+            return None, None, None
+
+    def close(self):
+        pass
+
+
+def run_mode(name, queue_size, policy, frames, pps, kernel_capacity, stall_every, stall_ms):
+    capture = PacketCapture(NullLogger())
+    capture.capture_filter = CaptureFilter()
+    capture.queue_size = queue_size
+    capture.drop_policy = policy
+    capture.is_capturing = True
+    capture.wake_pipe = None
+    capture.interface_status[INTERFACE] = True
+    capture._prepare_interface(INTERFACE)
+
+    # 检测阶段的周期性卡顿
+    handle_payload = capture._handle_payload
+    calls = [0]
+
+    def slow_handle_payload(*args):
+        calls[0] += 1
+        if calls[0] % stall_every == 0:
+            time.sleep(stall_ms / 1000)
+        return handle_payload(*args)
+
+    capture._handle_payload = slow_handle_payload
+
+    kernel = KernelBuffer(kernel_capacity)
+    handle = FakeHandle(capture, kernel)
+    capture.open_handles[handle] = INTERFACE
+    producer = threading.Thread(target=kernel.produce, args=(frames, pps, lambda: capture.is_capturing), daemon=True)
+    start = time.perf_counter()
+    producer.start()
+    capture._start_pipeline()
+    capture._capture_loop({handle: INTERFACE})
+    elapsed = time.perf_counter() - start
+    kernel.done = True
+    producer.join()
+
+    pipeline = capture.get_pipeline_stats()
+    return {
+        "mode": name,
+        "seconds": elapsed,
+        "kernel_dropped": kernel.dropped,
+        "kernel_dropped_rtmp": kernel.dropped_rtmp,
+        "queue_dropped": pipeline.get("dropped", 0),
+        "queue_dropped_rtmp": pipeline.get("dropped_rtmp", 0),
+        "queue_high_watermark": pipeline.get("high_watermark", 0),
+        "processed": capture.capture_stats[INTERFACE].delivered,
+        "detected": bool(capture.server_address and capture.stream_code),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--background-mb", type=float, default=10, help="每轮背景流量大小（MB）")
+    parser.add_argument("--pps", type=int, default=15000, help="内核收包速率（包/秒）")
+    parser.add_argument("--kernel-buffer", type=int, default=800, help="内核缓冲区容量（报文数）")
+    parser.add_argument("--queue-size", type=int, default=1024, help="检测队列容量（报文数）")
+    parser.add_argument("--stall-every", type=int, default=2000, help="检测阶段每处理多少个报文卡顿一次")
+    parser.add_argument("--stall-ms", type=float, default=200, help="每次卡顿的时长（毫秒）")
+    parser.add_argument("--runs", type=int, default=10, help="轮数（每轮 RTMP 交互的位置不同）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    modes = (
+        ("inline", 0, DROP_OLDEST),
+        (DROP_OLDEST, args.queue_size, DROP_OLDEST),
+        (DROP_NON_RTMP, args.queue_size, DROP_NON_RTMP),
+    )
+    runs = {name: [] for name, _, _ in modes}
+    for _ in range(args.runs):
+        frames = list(traffic_mix(args.background_mb, rtmp_offset=random.uniform(0.2, 0.8)))
+        for name, queue_size, policy in modes:
+            runs[name].append(
+                run_mode(name, queue_size, policy, frames, args.pps, args.kernel_buffer, args.stall_every, args.stall_ms)
+            )
+
+    results = []
+    print(f"{'模式':<16}{'内核丢包':>10}{'队列丢包':>10}{'RTMP丢失':>10}{'检测成功':>10}")
+    for name, _, _ in modes:
+        mode_runs = runs[name]
+        result = {
+            "mode": name,
+            "runs": len(mode_runs),
+            "kernel_dropped": sum(r["kernel_dropped"] for r in mode_runs),
+            "queue_dropped": sum(r["queue_dropped"] for r in mode_runs),
+            # 队列丢弃的 RTMP 报文只在 drop_non_rtmp 策略下统计，drop_oldest 丢失的体现在检测成功率上
+            "rtmp_lost": sum(r["kernel_dropped_rtmp"] + r["queue_dropped_rtmp"] for r in mode_runs),
+            "detected": sum(r["detected"] for r in mode_runs),
+            "details": mode_runs,
+        }
+        results.append(result)
+        print(
+            f"{name:<16}{result['kernel_dropped']:>10}{result['queue_dropped']:>10}"
+            f"{result['rtmp_lost']:>10}{result['detected']:>6}/{result['runs']}"
+        )
+
+    write_results(args.output, "pipeline", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""抓包句柄调优配置基准：default / low-latency / low-CPU / lossless 的延迟、CPU 和丢包
+
+子进程通过 AF_PACKET 套接字把合成流量重放到接口上（默认 lo，背景报文默认 8000 字节负载，
+模拟网卡分段卸载前的超长帧），其中每隔若干个报文插入一个带发送时间的探测报文。
+主进程按每个调优配置打开句柄，在抓包引擎的 select 循环中完整执行解析和检测，
+统计送达报文数、内核丢包、每个报文的 CPU 耗时、平均复制到 Python 的字节数和探测报文的交付延迟。
+lo 上每个帧会以发出和收到两个方向各送达一次，送达数约为发送数的两倍。
+需要 Linux 和 root 权限。
+
+用法:
+    python benchmarks/bench_profiles.py --interface lo --background-mb 200 --pps 20000 --output profiles.json
+    python benchmarks/bench_profiles.py --backend scapy --profiles default low-latency
+"""
+import argparse
+import multiprocessing
+import socket
+import struct
+import threading
+import time
+
+from common import NullLogger, write_results
+from traffic import SERVER_PORT, tcp_frame, traffic_mix
+
+from core.backend import ScapyBackend, TpacketBackend, BACKEND_SCAPY, BACKEND_TPACKET
+from core.capture import PacketCapture
+from core.capture_filter import CaptureFilter, FILTER_OFF
+from core.capture_profile import PROFILES
+from core.rtmp_classifier import NARROW_WHITELIST
+
+PROBE_MAGIC = b"PRB!"
+# tcp_frame 构造的帧：以太网 14 + IPv4 20 + TCP 20 字节头部
+PROBE_OFFSET = 54
+_probe_time = struct.Struct("d")
+IDLE_SECONDS = 0.5
+IDLE_POLL = 0.01
+
+
+def send_with_probes(interface, frames, pps, probe_every, ready, start):
+    """发送进程：按包速率发送帧，每隔 probe_every 个帧发送一个携带当前时间的探测报文"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
+    sock.bind((interface, 0))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 << 20)
+    ready.set()
+    start.wait()
+    begin = time.perf_counter()
+    for index, frame in enumerate(frames):
+        if pps and index % 100 == 0:
+            delay = begin + index / pps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if index % probe_every == 0:
+            frame = tcp_frame(PROBE_MAGIC + _probe_time.pack(time.perf_counter()), dport=SERVER_PORT)
+        while True:
+            try:
+                sock.send(frame)
+                break
+            except BlockingIOError:
+                time.sleep(0.0001)
+    sock.close()
+
+
+def run_profile(backend, interface, frames, pps, probe_every):
+    capture = PacketCapture(NullLogger())
+    capture.backend = backend
+    capture.snaplen = backend.profile.snaplen
+    capture.capture_filter = CaptureFilter(FILTER_OFF)
+    capture.monitor = True
+    capture.narrowing = NARROW_WHITELIST
+    capture.queue_size = 0
+    capture.wake_pipe = None
+    capture.is_capturing = True
+    capture.interface_status[interface] = True
+    stats = capture._prepare_interface(interface)
+    latencies = {}
+    frame_callback = capture._frame_callback
+
+    def timed_frame(frame, linktype, interface, python_filter=False):
+        if frame[PROBE_OFFSET:PROBE_OFFSET + 4] == PROBE_MAGIC:
+            # lo 上每个帧会以发出和收到两个方向各送达一次，只记第一次
+            sent = _probe_time.unpack_from(frame, PROBE_OFFSET + 4)[0]
+            latencies.setdefault(sent, (time.perf_counter() - sent) * 1000)
+        frame_callback(frame, linktype, interface, python_filter)
+
+    capture._frame_callback = timed_frame
+    handle, stats.bpf = backend.open(interface, capture.capture_filter, NullLogger())
+    capture.open_handles[handle] = interface
+    loop = threading.Thread(target=capture._capture_loop, args=({handle: interface},), daemon=True)
+    loop.start()
+
+    ready = multiprocessing.Event()
+    start = multiprocessing.Event()
+    sender = multiprocessing.Process(
+        target=send_with_probes, args=(interface, frames, pps, probe_every, ready, start), daemon=True
+    )
+    sender.start()
+    ready.wait()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    start.set()
+    sender.join()
+
+    last = stats.delivered
+    last_time = time.perf_counter()
+    while time.perf_counter() - last_time < IDLE_SECONDS:
+        time.sleep(IDLE_POLL)
+        if stats.delivered != last:
+            last = stats.delivered
+            last_time = time.perf_counter()
+    wall = last_time - wall_start
+    cpu = time.process_time() - cpu_start
+    capture.interface_status[interface] = False
+    capture.is_capturing = False
+    loop.join()
+    latencies = sorted(latencies.values())
+    probes = (len(frames) + probe_every - 1) // probe_every
+    return {
+        "profile": backend.profile.name,
+        "backend": backend.name,
+        "sent": len(frames),
+        "delivered": stats.delivered,
+        "kernel_dropped": stats.kernel_dropped,
+        "wall_seconds": wall,
+        "cpu_us_per_packet": cpu / stats.delivered * 1e6 if stats.delivered else 0.0,
+        "bytes_per_packet": stats.bytes / stats.delivered if stats.delivered else 0.0,
+        "probes": probes,
+        "probes_delivered": len(latencies),
+        "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+        "latency_p99_ms": latencies[min(len(latencies) * 99 // 100, len(latencies) - 1)] if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interface", default="lo", help="重放和抓包的接口")
+    parser.add_argument("--backend", choices=(BACKEND_TPACKET, BACKEND_SCAPY), default=BACKEND_TPACKET, help="抓包后端")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES), help="要测量的调优配置")
+    parser.add_argument("--background-mb", type=float, default=200, help="背景流量大小（MB）")
+    parser.add_argument("--payload-size", type=int, default=8000, help="背景报文负载大小（lo 的 MTU 为 65536）")
+    parser.add_argument("--pps", type=int, default=20000, help="发送包速率，0 为尽可能快")
+    parser.add_argument("--probe-every", type=int, default=200, help="每隔多少个报文插入一个探测报文")
+    parser.add_argument("--runs", type=int, default=1, help="每个配置的轮数（取 CPU 耗时最低的一轮）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    if not TpacketBackend.available():
+        parser.error("发送端使用 AF_PACKET，只支持 Linux")
+    frames = [frame for frame, _ in traffic_mix(args.background_mb, payload_size=args.payload_size)]
+    results = []
+    print(f"{args.backend} 后端，{len(frames)} 个报文，包速率 {args.pps or '不限'}")
+    print(
+        f"{'配置':<14}{'送达':>9}{'内核丢弃':>10}{'CPU微秒/包':>12}{'字节/包':>10}"
+        f"{'探测':>10}{'延迟p50(毫秒)':>15}{'延迟p99(毫秒)':>15}"
+    )
+    for name in args.profiles:
+        profile = PROFILES[name]
+        backend_class = ScapyBackend if args.backend == BACKEND_SCAPY else TpacketBackend
+        runs = [run_profile(backend_class(profile), args.interface, frames, args.pps, args.probe_every) for _ in range(args.runs)]
+        best = dict(min(runs, key=lambda run: run["cpu_us_per_packet"]))
+        best["runs"] = runs
+        best["settings"] = profile.to_dict()
+        results.append(best)
+        print(
+            f"{name:<14}{best['delivered']:>9}{best['kernel_dropped'] or 0:>10}{best['cpu_us_per_packet']:>12.2f}"
+            f"{best['bytes_per_packet']:>10.0f}{best['probes_delivered']:>5}/{best['probes']:<4}"
+            f"{best['latency_p50_ms'] or 0:>15.2f}{best['latency_p99_ms'] or 0:>15.2f}"
+        )
+
+    write_results(args.output, "profiles", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""热备句柄基准：开始捕获到抓包就绪的耗时，冷启动 vs 热备句柄切换
+
+冷启动每次开始捕获都在抓包线程中打开句柄；热备模式预先打开句柄并挂上不放行任何报文的过滤器，
+开始捕获时只替换过滤器。每轮在 _launch 返回后立即（或 --early-ms 毫秒后）从本机发起一个 TCP 连接并发送数据，
+模拟直播伴侣在开始捕获的同时重新连接，检查这个连接的报文是否被抓到。
+热备期间向本机发送背景报文，统计热备句柄中积压的报文数，确认热备过滤器在内核中丢弃了所有报文。
+
+需要管理员权限和可用的抓包接口（Linux 上可以使用 lo）。
+
+用法:
+    python benchmarks/bench_standby.py --interface lo --cycles 30
+    python benchmarks/bench_standby.py --interface lo --backend scapy --early-ms 5 --output standby.json
+"""
+import argparse
+import socket
+import threading
+import time
+
+from common import NullLogger, write_results
+
+from core.backend import ScapyBackend, TpacketBackend, BACKEND_SCAPY
+from core.capture import PacketCapture
+from core.capture_filter import discard_pending
+
+PORT = 19361
+
+
+class BenchCapture(PacketCapture):
+    """使用指定后端、不经过系统接口缓存（Linux 上的 lo 不在 Windows 接口列表中）的 PacketCapture"""
+
+    def __init__(self, backend_name):
+        super().__init__(NullLogger())
+        self.backend_name = backend_name
+
+    def _select_backend(self):
+        return ScapyBackend() if self.backend_name == BACKEND_SCAPY else TpacketBackend()
+
+    def _resolve_interfaces(self, interfaces):
+        return list(interfaces)
+
+
+def start_server():
+    """本机 TCP 服务端：接受连接并读空数据"""
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", PORT))
+    server.listen(64)
+
+    def drain(conn):
+        with conn:
+            while conn.recv(65536):
+                pass
+
+    def serve():
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=drain, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+
+
+def send_burst(count, size=1200):
+    """建立一个连接并发送 count 个带负载的报文，返回客户端端口"""
+    client = socket.create_connection(("127.0.0.1", PORT))
+    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    port = client.getsockname()[1]
+    payload = b"x" * size
+    for _ in range(count):
+        client.sendall(payload)
+    client.close()
+    return port
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def run_cycles(capture, interface, cycles, early_ms, standby):
+    latencies = []
+    caught = 0
+    for _ in range(cycles):
+        if standby:
+            wait_for(lambda: interface in capture.get_standby_interfaces())
+        capture._launch([interface])
+        if early_ms:
+            time.sleep(early_ms / 1000)
+        port = send_burst(3)
+        wait_for(lambda: capture.start_latency is not None)
+        time.sleep(0.2)
+        flow_table = capture.flow_tables.get(interface)
+        if flow_table is not None and any(PORT in key[1::2] and port in key[1::2] for key in list(flow_table.flows)):
+            caught += 1
+        if capture.start_latency is not None:
+            latencies.append(capture.start_latency["seconds"] * 1000)
+        capture.stop()
+    latencies.sort()
+    return {
+        "mode": "standby" if standby else "cold",
+        "cycles": cycles,
+        "ready_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+        "ready_p90_ms": latencies[min(len(latencies) * 9 // 10, len(latencies) - 1)] if latencies else None,
+        "ready_max_ms": latencies[-1] if latencies else None,
+        "early_connection_caught": caught,
+    }
+
+
+def idle_queued(capture, interface, packets):
+    """热备期间发送背景报文后，热备句柄中积压的报文数（热备过滤器生效时应为 0）"""
+    wait_for(lambda: interface in capture.get_standby_interfaces())
+    send_burst(packets)
+    time.sleep(0.2)
+    with capture.standby_lock:
+        sock = capture.standby_handles[interface][0]
+        return discard_pending(sock)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interface", required=True, help="抓包接口名称")
+    parser.add_argument("--backend", choices=("tpacket", "scapy"), default="tpacket" if TpacketBackend.available() else "scapy", help="抓包后端")
+    parser.add_argument("--cycles", type=int, default=30, help="每种模式的启停次数")
+    parser.add_argument("--early-ms", type=float, default=0.0, help="_launch 返回后多久发起测试连接（毫秒）")
+    parser.add_argument("--idle-packets", type=int, default=2000, help="热备期间发送的背景报文数")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    start_server()
+    results = []
+    cold = BenchCapture(args.backend)
+    results.append(run_cycles(cold, args.interface, args.cycles, args.early_ms, False))
+
+    warm = BenchCapture(args.backend)
+    warm.enable_standby([args.interface])
+    results.append(run_cycles(warm, args.interface, args.cycles, args.early_ms, True))
+    queued = idle_queued(warm, args.interface, args.idle_packets)
+    warm.disable_standby()
+    lifecycle = warm.get_lifecycle_stats()
+
+    print(f"{args.backend} 后端，接口 {args.interface}")
+    print(f"{'模式':<10}{'就绪p50(毫秒)':>14}{'就绪p90(毫秒)':>14}{'最长(毫秒)':>12}{'抓到早期连接':>14}")
+    for result in results:
+        print(
+            f"{result['mode']:<10}{result['ready_p50_ms']:>14.2f}{result['ready_p90_ms']:>14.2f}"
+            f"{result['ready_max_ms']:>12.2f}{result['early_connection_caught']:>10}/{result['cycles']}"
+        )
+    print(f"热备期间发送 {args.idle_packets} 个报文，句柄中积压 {queued} 个；存活句柄 {lifecycle['live_handles']}")
+
+    write_results(args.output, "standby", args, {"cycles": results, "standby_queued": queued, "lifecycle": lifecycle})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""启动耗时基准：窗口显示前需要导入的模块耗时（python -X importtime 汇总）
+
+在子进程中多次导入界面入口模块（默认 gui.main_window），统计导入总耗时，以及 scapy / requests / psutil
+等重量级依赖是否在窗口显示前被加载、各自占用的导入时间；随后在同一进程中导入后台预加载的模块，
+得到窗口显示后才在后台加载的耗时。
+可以指定一个 git 版本作为对照（通过 git archive 导出到临时目录），输出优化前后的对比报告。
+注意：旧版本在窗口显示前就导入 scapy.arch.windows，只能在 Windows 上导入成功。
+
+用法:
+    python benchmarks/bench_startup.py --runs 5 --output startup.txt
+    python benchmarks/bench_startup.py --baseline HEAD~1 --output startup.txt --json startup.json
+    python benchmarks/bench_startup.py --module core.capture --baseline HEAD~1
+"""
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from common import ROOT_DIR, write_results
+
+from utils.preload import PRELOAD_MODULES
+
+# 单独统计的重量级依赖（按顶层包名汇总所有子模块的自身导入耗时）
+HEAVY_PACKAGES = ("scapy", "requests", "psutil")
+# 报告中列出的最慢模块数
+TOP_MODULES = 15
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出
+
+    Returns:
+        list: [(模块名, 自身耗时微秒, 累计耗时微秒, 嵌套深度)]
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def summarize_importtime(records):
+    """汇总一次导入：总耗时、重量级依赖的耗时和最慢的模块"""
+    # 第一层的模块只有一个前导空格，累计耗时之和即为总耗时
+    top_level = min((depth for _, _, _, depth in records), default=0)
+    packages = {}
+    for package in HEAVY_PACKAGES:
+        self_times = [
+            self_us for name, self_us, _, _ in records if name == package or name.startswith(package + ".")
+        ]
+        packages[package] = {"loaded": bool(self_times), "ms": sum(self_times) / 1000}
+    slowest = sorted(records, key=lambda record: record[1], reverse=True)[:TOP_MODULES]
+    return {
+        "total_ms": sum(cumulative for _, _, cumulative, depth in records if depth == top_level) / 1000,
+        "modules": len(records),
+        "packages": packages,
+        "slowest": [{"module": name, "self_ms": self_us / 1000} for name, self_us, _, _ in slowest],
+    }
+
+
+def run_python(tree, code, importtime=False):
+    """在指定源码目录下运行一段 Python 代码"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    env = dict(os.environ, PYTHONPATH=tree, PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run(command + ["-c", code], cwd=tree, env=env, capture_output=True, text=True)
+
+
+def measure_tree(tree, module, runs):
+    """测量一个源码目录：窗口显示前的导入耗时和窗口显示后后台加载的耗时"""
+    wall = []
+    background = []
+    summaries = []
+    preload = ", ".join(repr(name) for name in PRELOAD_MODULES)
+    code = (
+        "import importlib, time\n"
+        "start = time.perf_counter()\n"
+        f"importlib.import_module({module!r})\n"
+        "middle = time.perf_counter()\n"
+        f"for name in ({preload},):\n"
+        "    importlib.import_module(name)\n"
+        "print(middle - start, time.perf_counter() - middle)\n"
+    )
+    for _ in range(runs):
+        # 计时运行和 importtime 运行分开，避免 importtime 本身的开销计入墙钟时间
+        result = run_python(tree, code)
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "导入失败"}
+        first, second = result.stdout.split()
+        wall.append(float(first) * 1000)
+        background.append(float(second) * 1000)
+        result = run_python(tree, f"import {module}", importtime=True)
+        summaries.append(summarize_importtime(parse_importtime(result.stderr)))
+
+    # 取总耗时为中位数的一次作为代表
+    summaries.sort(key=lambda summary: summary["total_ms"])
+    return {
+        "import_wall_ms": statistics.median(wall),
+        "background_wall_ms": statistics.median(background),
+        "importtime": summaries[len(summaries) // 2],
+    }
+
+
+def export_revision(revision, directory):
+    """用 git archive 把指定版本导出到临时目录"""
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", revision], cwd=ROOT_DIR, capture_output=True, check=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def format_report(module, results):
+    """生成文本报告"""
+    lines = [f"启动导入耗时报告：import {module}", ""]
+    for label, result in results.items():
+        lines.append(f"[{label}]")
+        if "error" in result:
+            lines.append(f"  导入失败: {result['error']}")
+            lines.append("")
+            continue
+        summary = result["importtime"]
+        lines.append(f"  窗口显示前导入耗时（墙钟中位数）: {result['import_wall_ms']:.1f} ms")
+        lines.append(f"  importtime 累计: {summary['total_ms']:.1f} ms，共 {summary['modules']} 个模块")
+        for package, info in summary["packages"].items():
+            state = f"{info['ms']:.1f} ms" if info["loaded"] else "未加载"
+            lines.append(f"    {package:<10}{state}")
+        lines.append(f"  窗口显示后后台加载抓包模块: {result['background_wall_ms']:.1f} ms")
+        lines.append("  自身耗时最长的模块:")
+        for item in summary["slowest"]:
+            lines.append(f"    {item['self_ms']:>8.1f} ms  {item['module']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="gui.main_window", help="窗口显示前导入的入口模块")
+    parser.add_argument("--runs", type=int, default=5, help="每个版本的测量次数（取中位数）")
+    parser.add_argument("--baseline", help="作为对照的 git 版本，例如 HEAD~1")
+    parser.add_argument("--output", help="文本报告路径")
+    parser.add_argument("--json", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if args.baseline:
+            export_revision(args.baseline, directory)
+            results[f"优化前 {args.baseline}"] = measure_tree(directory, args.module, args.runs)
+        results["当前工作区"] = measure_tree(ROOT_DIR, args.module, args.runs)
+
+    report = format_report(args.module, results)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    write_results(args.json, "startup", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""捕获耗时基准：按阶段记录一次完整检测的时间点，并测量记录时间点的开销
+
+每一轮新建 PacketCapture 并设置 CaptureTimeline，依次输入背景流量和一次推流会话（C0+C1、S0+S1+S2、命令），
+得到首个报文、RTMP 连接、推流地址和推流码各阶段相对开始的耗时，多轮汇总为 p50 / p90。
+同一份流量分别在设置和不设置时间线时回放，比较包速率，确认记录时间点不影响抓包。
+--history 汇总本地的捕获耗时历史（界面每次捕获后保存），便于比较不同版本的真实耗时。
+
+用法:
+    python benchmarks/bench_timeline.py --background 5000 --runs 20 --output timeline.json
+    python benchmarks/bench_timeline.py --history ~/.douyin-rtmp/timeline.jsonl
+"""
+import argparse
+import time
+
+from common import NullLogger, write_results
+from traffic import CLIENT_IP, SERVER_IP, SERVER_PORT, CLIENT_PORT, background_frames, rtmp_publish_session, rtmp_server_handshake, tcp_frame
+
+from core.capture import PacketCapture
+from core.frame import DLT_EN10MB
+from core.timeline import CaptureTimeline, TimelineHistory, STAGE_LABELS, summarize
+
+INTERFACE = "bench"
+
+
+def session_frames(background):
+    """背景流量之后是一次完整的推流会话"""
+    frames = background_frames(background)
+    seq = 1
+    c0c1, c2, *commands = rtmp_publish_session()
+    frames.append(tcp_frame(c0c1, seq=seq))
+    seq += len(c0c1)
+    frames.append(tcp_frame(rtmp_server_handshake(), src=SERVER_IP, dst=CLIENT_IP, sport=SERVER_PORT, dport=CLIENT_PORT))
+    for payload in [c2] + commands:
+        frames.append(tcp_frame(payload, seq=seq))
+        seq += len(payload)
+    return frames
+
+
+def replay(frames, timeline):
+    """回放一轮，返回 (耗时秒数, 是否得到推流码)"""
+    capture = PacketCapture(NullLogger())
+    capture.timeline = timeline
+    capture._prepare_interface(INTERFACE)
+    callback = capture._frame_callback
+    start = time.perf_counter()
+    for frame in frames:
+        callback(frame, DLT_EN10MB, INTERFACE)
+    return time.perf_counter() - start, bool(capture.stream_code)
+
+
+def print_summary(title, records):
+    summary = summarize(records)
+    print(f"{title}（{len(records)} 次）")
+    print(f"{'阶段':<12}{'次数':>6}{'累计p50':>10}{'累计p90':>10}{'本阶段p50':>12}{'本阶段p90':>12}  (毫秒)")
+    for stage, item in summary.items():
+        step = item["step"]
+        print(
+            f"{STAGE_LABELS[stage]:<12}{item['count']:>6}{item['total'][50]:>10.2f}{item['total'][90]:>10.2f}"
+            f"{step[50] if step[50] is not None else 0:>12.2f}{step[90] if step[90] is not None else 0:>12.2f}"
+        )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--background", type=int, default=5000, help="推流会话之前的背景报文数")
+    parser.add_argument("--runs", type=int, default=20, help="轮数")
+    parser.add_argument("--history", help="汇总本地捕获耗时历史文件，不运行回放")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    if args.history:
+        records = TimelineHistory(args.history).load()
+        summary = print_summary(f"本地历史 {args.history}", records)
+        results = {"history": args.history, "sessions": len(records), "summary": summary}
+    else:
+        frames = session_frames(args.background)
+        records = []
+        plain = []
+        marked = []
+        detected = 0
+        for number in range(args.runs):
+            # 交替先后顺序，避免缓存预热只偏向其中一种
+            if number % 2:
+                plain.append(replay(frames, None)[0])
+            timeline = CaptureTimeline()
+            seconds, found = replay(frames, timeline)
+            marked.append(seconds)
+            detected += found
+            records.append(timeline.to_record())
+            if not number % 2:
+                plain.append(replay(frames, None)[0])
+        summary = print_summary(f"回放 {len(frames)} 个报文", records)
+        plain_pps = len(frames) / min(plain)
+        marked_pps = len(frames) / min(marked)
+        print(f"包速率: 不记录 {plain_pps:.0f} 包/秒，记录时间线 {marked_pps:.0f} 包/秒，得到推流码 {detected}/{args.runs} 轮")
+        results = {
+            "frames": len(frames),
+            "detected": detected,
+            "pps_without_timeline": plain_pps,
+            "pps_with_timeline": marked_pps,
+            "summary": summary,
+        }
+
+    write_results(args.output, "timeline", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import json
+import os
+import platform
+import sys
+import time
+
+# 允许直接以脚本方式运行：python benchmarks/bench_xxx.py
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+class NullLogger:
+    """基准测试用的日志对象，丢弃所有输出"""
+
+    def info(self, message):
+        pass
+
+    def error(self, message):
+        pass
+
+    def packet(self, message):
+        pass
+
+
+def measure(func, items, repeat=3):
+    """多次运行取最快的一次，返回 (报文/秒, 每包CPU微秒)"""
+    best_wall = None
+    best_cpu = None
+    for _ in range(repeat):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        for item in items:
+            func(item)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        if best_wall is None or wall < best_wall:
+            best_wall, best_cpu = wall, cpu
+    count = max(len(items), 1)
+    return count / best_wall if best_wall else float("inf"), best_cpu / count * 1e6
+
+
+def write_results(path, name, args, results):
+    """按统一格式输出基准结果，所有基准脚本的 JSON 结构都在这里定义
+
+    Args:
+        path: JSON 文件路径，为空时只返回结果不写文件
+        name: 基准名称
+        args: argparse 的解析结果（或参数字典），原样记录为 parameters
+        results: 测量结果
+
+    Returns:
+        dict: benchmark、timestamp、environment、parameters、results
+    """
+    report = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "parameters": args if isinstance(args, dict) else vars(args),
+        "results": results,
+    }
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
@@ -0,0 +1,26 @@
+"""离线回放现场抓包文件，复现漏检并测量吞吐
+
+用法: python benchmarks/replay_pcap.py capture.pcapng [--speed 1] [--full]
+"""
+import argparse
+import json
+
+from common import NullLogger
+
+from core.capture import PacketCapture
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="pcap / pcapng 文件")
+    parser.add_argument("--speed", type=float, default=None, help="回放倍速，不指定则尽可能快")
+    parser.add_argument("--full", action="store_true", help="检测到推流信息后继续回放到文件末尾")
+    args = parser.parse_args()
+
+    capture = PacketCapture(NullLogger())
+    report = capture.replay(args.path, speed=args.speed, stop_on_detect=not args.full)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
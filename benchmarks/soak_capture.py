@@ -0,0 +1,128 @@
+"""长时间抓包的内存浸泡测试：持续喂入合成流量，定期采样 RSS，检查内存是否保持平稳
+
+用法:
+    python benchmarks/soak_capture.py --minutes 30 --rate 20000 --output soak.json
+    python benchmarks/soak_capture.py --minutes 1 --keep-frames 1000
+"""
+import argparse
+import json
+import time
+from collections import deque
+
+from common import NullLogger, write_results
+from traffic import traffic_mix
+
+from core.capture import PacketCapture, process_rss
+from core.frame import DLT_EN10MB
+
+INTERFACE = "soak"
+# 每一轮合成流量的大小（MB），每轮插入一次 RTMP 推流交互
+ROUND_MB = 20
+
+
+def _slope(samples):
+    """最小二乘拟合 RSS 随时间的增长速率（字节/秒）"""
+    if len(samples) < 2:
+        return 0.0
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_r = sum(r for _, r in samples) / n
+    numerator = sum((t - mean_t) * (r - mean_r) for t, r in samples)
+    denominator = sum((t - mean_t) ** 2 for t, _ in samples)
+    return numerator / denominator if denominator else 0.0
+
+
+def run_soak(config):
+    """运行浸泡测试，返回结果字典"""
+    capture = PacketCapture(NullLogger())
+    capture.interface_status[INTERFACE] = True
+    capture._prepare_interface(INTERFACE)
+    if config["keep_frames"]:
+        capture.keep_frames = config["keep_frames"]
+        capture.retained_frames = deque(maxlen=config["keep_frames"])
+
+    detections = 0
+    packets = 0
+    samples = []  # [(经过秒数, RSS 字节)]
+    memory = {}
+    duration = config["minutes"] * 60
+    rate = config["rate"]
+    start = time.perf_counter()
+    next_sample = 0.0
+    while True:
+        for frame, _ in traffic_mix(ROUND_MB, 0.5, config["payload_size"], config["udp_ratio"], config["flows"]):
+            capture._frame_callback(frame, DLT_EN10MB, INTERFACE, True)
+            packets += 1
+            if packets % 256:
+                continue
+
+            elapsed = time.perf_counter() - start
+            if rate > 0:
+                delay = packets / rate - elapsed
+                if delay > 0:
+                    time.sleep(delay)
+            if elapsed >= next_sample:
+                memory = capture.get_memory_stats()
+                samples.append((elapsed, memory["rss"] or 0))
+                next_sample += config["sample_interval"]
+            if elapsed >= duration:
+                break
+        else:
+            # 一轮结束：清空检测结果，让后续轮次继续走完整的检测流程
+            if capture.server_address and capture.stream_code:
+                detections += 1
+            capture.reset_detection()
+            continue
+        break
+
+    elapsed = time.perf_counter() - start
+    end_rss = process_rss()
+    # 跳过预热阶段（前 10%）后再判断增长
+    steady = [sample for sample in samples if sample[0] >= duration * 0.1] or samples
+    steady_rss = [rss for _, rss in steady]
+    growth = max(steady_rss) - steady_rss[0] if steady_rss else 0
+    return {
+        "packets": packets,
+        "seconds": elapsed,
+        "pps": packets / elapsed if elapsed > 0 else 0.0,
+        "rounds_detected": detections,
+        "rss_start_mb": samples[0][1] / 1048576 if samples else None,
+        "rss_end_mb": end_rss / 1048576 if end_rss else None,
+        "steady_growth_mb": growth / 1048576,
+        "steady_slope_mb_per_hour": _slope(steady) * 3600 / 1048576,
+        "flat": growth / 1048576 <= config["tolerance_mb"],
+        "final_memory": memory,
+        "reassembly": dict(capture.reassemblers[INTERFACE].stats),
+        "samples": [(round(t, 1), round(r / 1048576, 2)) for t, r in samples],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=30, help="测试时长（分钟）")
+    parser.add_argument("--rate", type=float, default=20000, help="包速率（包/秒），0 表示不限速")
+    parser.add_argument("--payload-size", type=int, default=1200, help="背景报文负载大小")
+    parser.add_argument("--udp-ratio", type=float, default=0.3, help="背景中 UDP 报文比例")
+    parser.add_argument("--flows", type=int, default=2000, help="背景 TCP 流数量（超过重组器上限时会触发淘汰）")
+    parser.add_argument("--keep-frames", type=int, default=0, help="保留最近 N 个原始帧（0 表示不保留）")
+    parser.add_argument("--sample-interval", type=float, default=10, help="RSS 采样间隔（秒）")
+    parser.add_argument("--tolerance-mb", type=float, default=5, help="稳定阶段允许的 RSS 增长（MB）")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    config = {
+        "minutes": args.minutes,
+        "rate": args.rate,
+        "payload_size": args.payload_size,
+        "udp_ratio": args.udp_ratio,
+        "flows": args.flows,
+        "keep_frames": args.keep_frames,
+        "sample_interval": args.sample_interval,
+        "tolerance_mb": args.tolerance_mb,
+    }
+    report = write_results(args.output, "soak", config, run_soak(config))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""基准测试用的合成流量：以太网/IPv4/TCP/UDP 帧与 RTMP 推流会话"""
+import os
+import socket
+import struct
+
+DEFAULT_SERVER = "rtmp://push-rtmp-l1.douyincdn.com/third"
+DEFAULT_STREAM_KEY = (
+    "stream-117834234234567890?expire=1735689600&sign=0123456789abcdef0123456789abcdef"
+    "&volcSecret=0123456789abcdef&volcTime=1735689600"
+)
+
+CLIENT_IP = "192.168.1.10"
+CLIENT_PORT = 52000
+SERVER_IP = "101.200.10.20"
+SERVER_PORT = 1935
+
+_SRC_MAC = bytes.fromhex("02000000000a")
+_DST_MAC = bytes.fromhex("020000000001")
+
+
+def _ipv4_header(proto, src, dst, length):
+    return struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45, 0, 20 + length, 0, 0x4000, 64, proto, 0,
+        socket.inet_aton(src), socket.inet_aton(dst),
+    )
+
+
+def tcp_frame(payload, src=CLIENT_IP, dst=SERVER_IP, sport=CLIENT_PORT,
+              dport=SERVER_PORT, seq=1, flags=0x18):
+    """构造一个以太网/IPv4/TCP 帧"""
+    tcp = struct.pack("!HHIIBBHHH", sport, dport, seq & 0xFFFFFFFF, 1, 5 << 4, flags, 65535, 0, 0)
+    ip = _ipv4_header(6, src, dst, len(tcp) + len(payload))
+    return _DST_MAC + _SRC_MAC + b"\x08\x00" + ip + tcp + payload
+
+
+def udp_frame(payload, src="192.168.1.10", dst="8.8.8.8", sport=53000, dport=443):
+    """构造一个以太网/IPv4/UDP 帧"""
+    udp = struct.pack("!HHHH", sport, dport, 8 + len(payload), 0)
+    ip = _ipv4_header(17, src, dst, len(udp) + len(payload))
+    return _DST_MAC + _SRC_MAC + b"\x08\x00" + ip + udp + payload
+
+
+def amf0(value):
+    """AMF0 编码（只支持命令消息用到的类型）"""
+    if value is None:
+        return b"\x05"
+    if isinstance(value, bool):
+        return b"\x01" + (b"\x01" if value else b"\x00")
+    if isinstance(value, (int, float)):
+        return b"\x00" + struct.pack("!d", value)
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        return b"\x02" + struct.pack("!H", len(data)) + data
+    if isinstance(value, dict):
+        body = b"".join(
+            struct.pack("!H", len(key.encode())) + key.encode() + amf0(item)
+            for key, item in value.items()
+        )
+        return b"\x03" + body + b"\x00\x00\x09"
+    raise TypeError(f"不支持的 AMF0 类型: {type(value)}")
+
+
+def rtmp_message(body, type_id=20, csid=3, stream_id=0, chunk_size=128):
+    """按块大小拆分成 RTMP 块流（第一个块为 fmt0，后续为 fmt3）"""
+    # 基本头(fmt=0) + 时间戳(3) + 消息长度(3) + 消息类型(1) + 消息流ID(4, 小端)
+    header = bytes([csid]) + b"\x00\x00\x00" + struct.pack("!I", len(body))[1:] + bytes([type_id])
+    header += struct.pack("<I", stream_id)
+    chunks = [header + body[:chunk_size]]
+    for offset in range(chunk_size, len(body), chunk_size):
+        chunks.append(bytes([0xC0 | csid]) + body[offset:offset + chunk_size])
+    return b"".join(chunks)
+
+
+def rtmp_command(name, transaction, *values, csid=3, stream_id=0, chunk_size=128):
+    """构造一个 AMF0 命令消息"""
+    body = amf0(name) + amf0(float(transaction)) + b"".join(amf0(v) for v in values)
+    return rtmp_message(body, 20, csid, stream_id, chunk_size)
+
+
+def rtmp_publish_session(server=DEFAULT_SERVER, stream_key=DEFAULT_STREAM_KEY, chunk_size=128):
+    """直播伴侣推流时客户端发出的 TCP 负载序列（每个元素对应一个报文）"""
+    app = server.split("/", 3)[3]
+    c0c1 = b"\x03" + b"\x00" * 8 + os.urandom(1528)
+    c2 = os.urandom(1536)
+    connect = rtmp_command(
+        "connect", 1,
+        {
+            "app": app,
+            "type": "nonprivate",
+            "flashVer": "FMLE/3.0 (compatible; FMSc/1.0)",
+            "swfUrl": server,
+            "tcUrl": server,
+        },
+        chunk_size=chunk_size,
+    )
+    # releaseStream / FCPublish / createStream 通常合并在同一个报文中
+    publish_prep = (
+        rtmp_command("releaseStream", 2, None, stream_key, chunk_size=chunk_size)
+        + rtmp_command("FCPublish", 3, None, stream_key, chunk_size=chunk_size)
+        + rtmp_command("createStream", 4, None, chunk_size=chunk_size)
+    )
+    publish = rtmp_command(
+        "publish", 5, None, stream_key, "live", csid=8, stream_id=1, chunk_size=chunk_size
+    )
+    return [c0c1, c2, connect, publish_prep, publish]
+
+
+def rtmp_set_chunk_size(size):
+    """设置块大小的协议控制消息（块流 ID 2）"""
+    return rtmp_message(struct.pack("!I", size), type_id=1, csid=2)
+
+
+def rtmp_media(count, chunk_size=4096, video_size=(2000, 30000), audio_size=400):
+    """推流开始后的音视频消息：视频（块流 ID 6）与音频（块流 ID 4）交替，视频大小在范围内随机"""
+    messages = []
+    for index in range(count):
+        if index % 2:
+            body = os.urandom(audio_size)
+            messages.append(rtmp_message(body, type_id=8, csid=4, stream_id=1, chunk_size=chunk_size))
+        else:
+            size = video_size[0] + int.from_bytes(os.urandom(4), "big") % (video_size[1] - video_size[0] + 1)
+            messages.append(rtmp_message(os.urandom(size), type_id=9, csid=6, stream_id=1, chunk_size=chunk_size))
+    return b"".join(messages)
+
+
+def rtmp_server_handshake():
+    """服务端回复的 S0+S1+S2"""
+    return b"\x03" + b"\x00" * 8 + os.urandom(1528) + os.urandom(1536)
+
+
+def rtmp_publish_frames(server=DEFAULT_SERVER, stream_key=DEFAULT_STREAM_KEY, seq=1000):
+    """把推流会话封装成连续序列号的 TCP 帧"""
+    frames = []
+    for payload in rtmp_publish_session(server, stream_key):
+        frames.append(tcp_frame(payload, seq=seq))
+        seq += len(payload)
+    return frames
+
+
+def background_frames(count, size=1200):
+    """背景流量：HTTPS 下行 TCP 与 QUIC/UDP 混合"""
+    frames = []
+    payload = os.urandom(size)
+    for i in range(count):
+        if i % 3 == 2:
+            frames.append(udp_frame(payload, src="142.250.1.1", dst=CLIENT_IP, sport=443, dport=50000 + i % 7))
+        else:
+            frames.append(
+                tcp_frame(
+                    payload, src="23.0.0.%d" % (i % 50 + 1), dst=CLIENT_IP,
+                    sport=443, dport=40000 + i % 20, seq=i * size,
+                )
+            )
+    return frames
+
+
+def traffic_mix(background_mb, rtmp_offset=0.5, payload_size=1200, udp_ratio=0.3, flows=50):
+    """按需生成的合成流量：背景 HTTPS(TCP)/QUIC(UDP) 中插入一次 RTMP 推流交互
+
+    帧在迭代时才构造（只改写序列号），不会为了准备数据占用大量内存。
+
+    Args:
+        background_mb: 背景流量大小（MB）
+        rtmp_offset: RTMP 交互插入的位置（0~1，按背景报文数计算）
+        payload_size: 背景报文负载大小
+        udp_ratio: 背景中 UDP 报文的比例
+        flows: 背景 TCP 流数量
+
+    Yields:
+        tuple: (帧字节, 是否为 RTMP 报文)
+    """
+    total = max(int(background_mb * 1024 * 1024 / payload_size), 1)
+    rtmp_at = int(total * min(max(rtmp_offset, 0.0), 1.0))
+    payload = os.urandom(payload_size)
+    udp = udp_frame(payload, src="142.250.1.1", dst=CLIENT_IP, sport=443, dport=50000)
+    templates = [
+        tcp_frame(payload, src="23.0.%d.%d" % (i // 250, i % 250 + 1), dst=CLIENT_IP, sport=443, dport=40000 + i)
+        for i in range(flows)
+    ]
+    sequences = [0] * flows
+    # 以太网(14) + IPv4(20) 之后第 4 字节是 TCP 序列号
+    seq_offset = 14 + 20 + 4
+    udp_every = int(1 / udp_ratio) if udp_ratio > 0 else 0
+
+    for index in range(total):
+        if index == rtmp_at:
+            for frame in rtmp_publish_frames():
+                yield frame, True
+        if udp_every and index % udp_every == 0:
+            yield udp, False
+            continue
+        flow = index % flows
+        frame = bytearray(templates[flow])
+        struct.pack_into("!I", frame, seq_offset, sequences[flow])
+        sequences[flow] = (sequences[flow] + payload_size) & 0xFFFFFFFF
+        yield bytes(frame), False
+    if rtmp_at >= total:
+        for frame in rtmp_publish_frames():
+            yield frame, True
@@ -0,0 +1,112 @@
+import socket
+import sys
+from functools import partial
+
+from core.capture_profile import PROFILES, PROFILE_DEFAULT, open_tuned_socket
+
+BACKEND_AUTO = "auto"  # Linux 上使用 tpacket，其他平台使用 scapy
+BACKEND_SCAPY = "scapy"  # scapy conf.L2listen（Windows 上为 Npcap）
+BACKEND_TPACKET = "tpacket"  # Linux AF_PACKET + TPACKET_V3 内存映射环形缓冲区
+BACKENDS = (BACKEND_AUTO, BACKEND_SCAPY, BACKEND_TPACKET)
+
+
+class ScapyBackend:
+    """scapy 抓包后端：句柄为 scapy 的 L2listen 套接字，支持 scapy 解析模式"""
+
+    name = BACKEND_SCAPY
+
+    def __init__(self, profile=None):
+        """
+        Args:
+            profile: CaptureProfile，为空时使用 default（scapy 默认参数）
+        """
+        self.profile = profile or PROFILES[PROFILE_DEFAULT]
+
+    def open(self, interface, capture_filter, logger):
+        """打开接口的抓包句柄
+
+        句柄需要提供 select(sockets, timeout)、recv_raw() 和 close()，
+        scapy 解析模式还需要 recv()。
+
+        Returns:
+            tuple: (句柄, 是否启用了内核过滤)，未启用时需要在 Python 侧过滤
+        """
+        if self.profile.is_default():
+            return capture_filter.open_socket(interface, logger)
+        return capture_filter.open_socket(interface, logger, partial(open_tuned_socket, profile=self.profile))
+
+
+class TpacketBackend:
+    """Linux TPACKET_V3 抓包后端：内核把报文成块写入共享内存，按块批量读取原始帧
+
+    只支持原始帧模式；内核过滤需要 libpcap 或 tcpdump 编译 BPF 表达式，不可用时退回 Python 侧过滤。
+    """
+
+    name = BACKEND_TPACKET
+
+    def __init__(self, profile=None, **ring_options):
+        """
+        Args:
+            profile: CaptureProfile，换算为环形缓冲区的块数、块超时和 snaplen；为空时使用 default
+            ring_options: 传给 TpacketRing 的 block_size、block_count、frame_size、block_timeout、snaplen，
+                          优先于 profile
+        """
+        self.profile = profile or PROFILES[PROFILE_DEFAULT]
+        self.ring_options = self.profile_options(self.profile)
+        self.ring_options.update(ring_options)
+
+    @staticmethod
+    def profile_options(profile):
+        """把调优配置换算为 TpacketRing 的参数：缓冲区大小按 1 MB 的块数计，立即模式使用 1 毫秒的块超时"""
+        from core.tpacket import DEFAULT_BLOCK_SIZE
+
+        options = {}
+        if profile.snaplen is not None:
+            options["snaplen"] = profile.snaplen
+        if profile.buffer_size is not None:
+            options["block_count"] = max(profile.buffer_size // DEFAULT_BLOCK_SIZE, 2)
+        if profile.immediate:
+            options["block_timeout"] = 1
+        elif profile.timeout_ms is not None:
+            options["block_timeout"] = profile.timeout_ms
+        return options
+
+    @staticmethod
+    def available():
+        """当前平台是否支持 TPACKET_V3"""
+        return sys.platform.startswith("linux") and hasattr(socket, "AF_PACKET")
+
+    def open(self, interface, capture_filter, logger):
+        """打开接口的环形缓冲区，返回值与 ScapyBackend.open 相同"""
+        from core.tpacket import TpacketRing
+
+        ring = TpacketRing(interface, **self.ring_options)
+        expression = capture_filter.expression()
+        if expression is None:
+            return ring, False
+        try:
+            ring.set_filter(expression)
+            logger.info(f"接口 {interface} 已启用内核 BPF 过滤")
+            return ring, True
+        except Exception as e:
+            logger.info(f"接口 {interface} 无法编译 BPF 过滤器: {str(e)}，改用 Python 侧过滤")
+            return ring, False
+
+
+def create_backend(name=None, scapy_mode=False, profile=None):
+    """按名称创建抓包后端
+
+    Args:
+        name: auto、scapy 或 tpacket，默认读取配置 capture_backend
+        scapy_mode: 是否使用 scapy 解析模式（只有 scapy 后端支持）
+        profile: 句柄调优配置 CaptureProfile，为空时使用 default
+    """
+    if name is None:
+        from utils.config import get_config
+
+        name = get_config("capture_backend") or BACKEND_AUTO
+    if scapy_mode or name == BACKEND_SCAPY or not TpacketBackend.available():
+        return ScapyBackend(profile)
+    if name in (BACKEND_AUTO, BACKEND_TPACKET):
+        return TpacketBackend(profile)
+    return ScapyBackend(profile)
@@ -1,252 +1,1214 @@
-from scapy.all import sniff, IP, TCP, Raw
-import re
+import json
 import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
+from core.capture_filter import (
+    CaptureFilter,
+    FILTER_OFF,
+    read_kernel_stats,
+    set_nonblocking,
+    apply_filter,
+    apply_standby_filter,
+    clear_filter,
+    discard_pending,
+)
+from core.frame import parse_tcp_frame, linktype_of, format_address, LINKTYPE_BY_LAYER, DLT_EN10MB
+from core.reassembly import TcpReassembler, TCP_FIN, TCP_RST
+from core.flow_table import FlowTable, format_flow_rows
+from core.capture_stats import InterfaceStats, MeteredLock
+from core.rtmp_classifier import RtmpFlowClassifier, is_handshake_start, NARROW_MODES, NARROW_WHITELIST, NARROW_BPF, NARROW_OFF
+from core.rtmp_parser import RtmpCommandParser, MAX_PARSERS
+from core.detector import DetectionState, StreamKeyDetector
+from core.pcap_file import read_frames, write_pcap
+from core.probe import probe_interfaces, format_probe_report, looks_like_rtmp
+from core.pipeline import FramePipeline, DEFAULT_CAPACITY, DROP_NON_RTMP
+from core.backend import ScapyBackend, create_backend
+from core.capture_profile import get_profile
+from core.timeline import STAGE_READY, STAGE_FIRST_PACKET, STAGE_RTMP_FLOW, STAGE_SERVER_FOUND, STAGE_KEY_FOUND
+from utils.network import INTERFACES
+
+# 抓包模式：raw 直接解析原始帧字节，scapy 使用完整的 scapy 解析
+CAPTURE_MODE_RAW = "raw"
+CAPTURE_MODE_SCAPY = "scapy"
+# 等待数据包的 select 超时（秒），同时决定停止检查的间隔
+SELECT_TIMEOUT = 0.2
+# stop() 的耗时上限（秒）：先等待抓包线程自行退出，超过一半时间后强制关闭句柄
+STOP_TIMEOUT = 1.0
+# 非阻塞句柄每次就绪后最多连续读取的报文数，避免一个繁忙接口饿死其他接口
+READ_BATCH = 64
+# 数据包监控中显示的流数量
+FLOW_SUMMARY_LIMIT = 50
+# 抓包过程中读取内核收包/丢包统计的间隔（秒）
+KERNEL_STATS_INTERVAL = 1.0
+# 回放结束后等待检测队列处理完毕的轮询间隔（秒）
+REPLAY_DRAIN_POLL = 0.01
+
+
+class LifecycleCounters:
+    """抓包线程、句柄和子进程的启停计数（所有实例共享）
+
+    started 与 exited 之差就是仍然存活的数量，多次启停后应回到 0，用于确认没有泄漏。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {
+            "threads_started": 0,
+            "threads_exited": 0,
+            "handles_opened": 0,
+            "handles_closed": 0,
+            "workers_started": 0,
+            "workers_exited": 0,
+            "stop_timeouts": 0,  # stop() 超过时间上限后线程仍未退出的次数
+        }
+
+    def increment(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def snapshot(self):
+        """获取计数快照，附带当前存活的线程、句柄和子进程数"""
+        with self.lock:
+            result = dict(self.counters)
+        result["live_threads"] = result["threads_started"] - result["threads_exited"]
+        result["live_handles"] = result["handles_opened"] - result["handles_closed"]
+        result["live_workers"] = result["workers_started"] - result["workers_exited"]
+        return result
+
+
+LIFECYCLE = LifecycleCounters()
+
+
+def process_rss():
+    """当前进程的常驻内存（字节），无法获取时返回 None"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
 
 
 class PacketCapture:
     def __init__(self, logger):
         self.logger = logger
         self.is_capturing = False
+        # 所有接口共用一个抓包线程
         self.capture_thread = None
+        # 用于在停止时唤醒正在 select 中等待的抓包线程
+        self.wake_pipe = None
+        # 当前打开的抓包句柄 {套接字: 接口名称}，stop() 超时时据此强制关闭
+        self.open_handles = {}
+        self.handle_lock = threading.Lock()
         self.callbacks = []
+        # 持续监控模式：检测到推流信息后不停止抓包，推流地址或推流码变化时触发 change_callbacks
+        self.monitor = False
+        self.change_callbacks = []
+        self.published = None  # 最近一次通知的 (推流地址, 推流码)
+        self.changes = 0
         self.server_address = None
         self.stream_code = None
-        self.capture_threads = {}
         self.interface_status = {}
-        self.lock = threading.Lock()
+        # 发布最终结果的临界区（带争用统计），检测本身不持有该锁
+        self.lock = MeteredLock()
+        self.notify_lock = threading.Lock()
+        self.pending_changes = deque()  # 已发布、尚未通知的变化 (序号, 是否为第一次, 结果)
+        self.detector = StreamKeyDetector()
+        # 每个接口的检测进度 {接口名称: DetectionState}
+        self.detection_states = {}
+        self.capture_filter = CaptureFilter.from_config()
+        self.capture_mode = CAPTURE_MODE_RAW
+        # 抓包后端：打开接口句柄（scapy/Npcap 或 Linux TPACKET_V3）
+        self.backend = ScapyBackend()
+        # 句柄调优配置的 snaplen：抓到的长度达到它的帧负载不完整
+        self.snaplen = None
+        # 每个接口的抓包统计 {接口名称: InterfaceStats}
+        self.capture_stats = {}
+        # 每个接口独立的 TCP 流重组器（同一接口只有一个抓包线程，无需加锁）
+        self.reassemblers = {}
+        # 每个接口的流汇总表，代替逐包输出日志
+        self.flow_tables = {}
+        # 每个接口的握手识别器：识别到 RTMP 连接后只处理这些连接
+        self.classifiers = {}
+        # 每个接口从握手开始跟踪的客户端方向 {接口名称: OrderedDict{流: RtmpCommandParser}}
+        self.command_parsers = {}
+        self.narrowing = NARROW_WHITELIST
+        # 读取与检测之间的有界队列，容量为 0 时在读取线程中直接检测
+        self.pipeline = None
+        self.queue_size = DEFAULT_CAPACITY
+        self.drop_policy = DROP_NON_RTMP
+        self.pipeline_stats = {}
+        # 默认不保留任何报文；配置 capture_keep_frames 后只保留最近 N 个原始帧
+        self.keep_frames = 0
+        self.retained_frames = deque(maxlen=1)
+        # 由界面在开始捕获前设置的 CaptureTimeline，记录首个报文、RTMP 连接和找到结果的时间点
+        self.timeline = None
+        # 热备：空闲时预先打开的句柄 {接口名称: (句柄, (后端名称, 调优配置), 抓包过滤表达式, 能否设置内核过滤)}，
+        # 挂着不放行任何报文的过滤器
+        self.standby_interfaces = []
+        self.standby_handles = {}
+        self.standby_lock = threading.Lock()
+        self.standby_thread = None
+        # 最近一次开始捕获到所有句柄就绪的耗时，见 _report_start_latency
+        self.launch_started = None
+        self.start_latency = None
+
+    def start(self, interface):
+        """开始捕获数据包
 
-    def start(self, interface_display_name):
-        """开始捕获数据包"""
+        Args:
+            interface: 接口名称
+        """
         if self.is_capturing:
             return
 
         try:
-            # 从显示名称中提取实际的接口名称（格式：name [状态] - 描述）
-            interface = interface_display_name.split(" [")[0].strip()
-
-            # 获取Windows网络接口列表
-            from scapy.arch.windows import get_windows_if_list
-            interfaces = get_windows_if_list()
-
-            # 查找匹配的接口
-            interface_found = None
-            for iface in interfaces:
-                if iface.get("name") == interface:  # 直接匹配接口名称
-                    interface_found = iface.get("name")
-                    break
-
-            if not interface_found:
+            interfaces = self._resolve_interfaces([interface])
+            if not interfaces:
                 self.logger.error(f"找不到网络接口: {interface}")
                 return
-
-            # 清空之前捕获的地址
-            self.server_address = None
-            self.stream_code = None
-
-            self.is_capturing = True
-            # 创建新的捕获线程，使用找到的接口名称
-            self.capture_thread = threading.Thread(
-                target=self._start_capture, args=(interface_found,)
-            )
-            self.capture_thread.daemon = True
-            self.capture_thread.start()
-            self.logger.info(f"开始在接口 {interface_found} 上捕获数据包")
+            self._launch(interfaces)
         except Exception as e:
             self.logger.error(f"启动捕获时发生错误: {str(e)}，如果检测可用，则忽略此错误")
             self.is_capturing = False
 
     def stop(self):
-        """停止捕获数据包"""
+        """停止捕获数据包
+
+        抓包线程在 select 中等待时由唤醒管道立即唤醒；若线程卡在回调或阻塞读取中，
+        等待 STOP_TIMEOUT 的一半后强制关闭所有句柄使其出错退出。本方法最多耗时 STOP_TIMEOUT。
+        """
         if not self.is_capturing:
             return
 
         self.is_capturing = False
-        
-        # 停止所有接口的捕获
+
+        # 停止所有接口的捕获，并唤醒正在 select 中等待的抓包线程
         for interface in self.interface_status:
             self.interface_status[interface] = False
-        
-        # 使用更短的超时时间并并行等待所有线程
-        current_thread = threading.current_thread()
-        active_threads = []
-        for interface, thread in self.capture_threads.items():
-            if thread and thread.is_alive() and current_thread != thread:
-                active_threads.append(thread)
-        
-        for thread in active_threads:
-            thread.join(timeout=0.2)
-                
-        # 清理线程记录
-        self.capture_threads.clear()
-        self.capture_thread = None
+        if self.wake_pipe is not None:
+            self.wake_pipe.send(None)
+
+        if not self._join_capture_thread(STOP_TIMEOUT):
+            self.logger.error("抓包线程未能在限定时间内退出，已强制关闭抓包句柄")
         self.logger.info("停止所有接口的数据包捕获")
 
+    def _join_capture_thread(self, timeout):
+        """在 timeout 秒内等待抓包线程退出
+
+        Returns:
+            bool: 线程已退出（或不存在）时返回 True
+        """
+        thread = self.capture_thread
+        if thread is None or thread is threading.current_thread():
+            return True
+        deadline = time.monotonic() + timeout
+        thread.join(timeout / 2)
+        if thread.is_alive():
+            # 关闭句柄后，线程下一次 select / 读取会出错并退出循环
+            self._force_close_handles()
+            thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            LIFECYCLE.increment("stop_timeouts")
+            return False
+        self.capture_thread = None
+        return True
+
+    def _force_close_handles(self):
+        """从其他线程强制关闭所有抓包句柄"""
+        for sock in list(self.open_handles):
+            self._close_socket(sock)
+
+    def _close_socket(self, sock):
+        """关闭一个句柄（重复调用安全），并更新生命周期计数"""
+        with self.handle_lock:
+            if self.open_handles.pop(sock, None) is None:
+                return
+        try:
+            sock.close()
+        except Exception as e:
+            self.logger.error(f"关闭抓包句柄时发生错误: {str(e)}")
+        finally:
+            LIFECYCLE.increment("handles_closed")
+
+    def _report_start_latency(self, handles, standby):
+        """记录从开始捕获到所有句柄就绪、即将开始读取报文的耗时"""
+        started = self.launch_started
+        seconds = time.perf_counter() - started if started is not None else 0.0
+        self.start_latency = {"seconds": seconds, "handles": handles, "standby": standby}
+        self._mark(STAGE_READY)
+        self.logger.info(
+            f"抓包就绪耗时 {seconds * 1000:.1f} 毫秒（热备句柄 {standby} 个，新打开 {handles - standby} 个）"
+        )
+
+    def enable_standby(self, interfaces):
+        """开启热备：在后台为这些接口打开抓包句柄并挂上不放行任何报文的过滤器
+
+        开始捕获时这些接口只需替换过滤器即可读取，不再枚举接口和打开句柄；
+        不在列表中的热备句柄会被关闭。空列表等同于 disable_standby。
+        """
+        self.standby_interfaces = list(interfaces)
+        self._close_standby(keep=self.standby_interfaces)
+        self._open_standby_async()
+
+    def disable_standby(self):
+        """关闭热备并关闭所有热备句柄"""
+        self.standby_interfaces = []
+        self._close_standby()
+
+    def get_standby_interfaces(self):
+        """当前已就绪的热备接口"""
+        with self.standby_lock:
+            return list(self.standby_handles)
+
+    def _open_standby_async(self):
+        """启动打开热备句柄的后台线程（正在抓包或已有线程在运行时不启动）"""
+        if not self.standby_interfaces or self.is_capturing:
+            return
+        thread = self.standby_thread
+        if thread is not None and thread.is_alive():
+            return
+        thread = self.standby_thread = threading.Thread(target=self._open_standby, name="capture_standby", daemon=True)
+        LIFECYCLE.increment("threads_started")
+        thread.start()
+
+    def _open_standby(self):
+        """热备线程：按当前配置的后端打开尚未就绪的热备句柄"""
+        try:
+            backend = self._select_backend()
+            # 打开时不编译抓包过滤器；先试一次本次配置的过滤器，切换时不支持内核过滤的句柄直接移除热备过滤器
+            no_filter = CaptureFilter(FILTER_OFF)
+            expression = CaptureFilter.from_config().expression()
+            for interface in self._resolve_interfaces(self.standby_interfaces):
+                if self.is_capturing:
+                    break
+                with self.standby_lock:
+                    if interface in self.standby_handles:
+                        continue
+                try:
+                    sock, _ = backend.open(interface, no_filter, self.logger)
+                except Exception as e:
+                    self.logger.error(f"打开接口 {interface} 的热备句柄失败: {str(e)}")
+                    continue
+                LIFECYCLE.increment("handles_opened")
+                kernel_filter = expression is not None and apply_filter(sock, expression)
+                if not apply_standby_filter(sock):
+                    self.logger.info(f"接口 {interface} 无法设置热备过滤器，热备期间由内核缓冲区丢弃报文")
+                discard_pending(sock)
+                with self.standby_lock:
+                    keep = not self.is_capturing and interface in self.standby_interfaces
+                    if keep:
+                        self.standby_handles[interface] = (sock, self._backend_key(backend), expression, kernel_filter)
+                if not keep:
+                    self._close_standby_socket(sock)
+                    continue
+                self.logger.info(f"接口 {interface} 的热备句柄已就绪（{backend.name} 后端）")
+        except Exception as e:
+            self.logger.error(f"准备热备句柄时发生错误: {str(e)}")
+        finally:
+            LIFECYCLE.increment("threads_exited")
+
+    @staticmethod
+    def _backend_key(backend):
+        """热备句柄只能用于后端和调优配置都相同的抓包"""
+        return backend.name, backend.profile.name
+
+    def _take_standby(self, interface):
+        """取出接口的热备句柄；后端或调优配置与本次抓包不同时关闭它
+
+        Returns:
+            tuple: (句柄, 抓包过滤表达式, 能否设置内核过滤)，没有可用的热备句柄时返回 None
+        """
+        with self.standby_lock:
+            item = self.standby_handles.pop(interface, None)
+        if item is None:
+            return None
+        sock, backend_key, expression, kernel_filter = item
+        if backend_key != self._backend_key(self.backend):
+            self._close_standby_socket(sock)
+            return None
+        return sock, expression, kernel_filter
+
+    def _activate_standby(self, interface, sock, tested_expression, kernel_filter):
+        """把热备句柄切换为抓包：换上本次的抓包过滤器，不支持时移除过滤器改用 Python 侧过滤
+
+        准备热备句柄时已经试过同一个表达式并且不支持时，直接移除热备过滤器，
+        不再重复编译（缺少 libpcap 时每次编译失败都要数十毫秒，期间的报文会被热备过滤器丢弃）。
+
+        Returns:
+            bool: 是否启用了内核过滤；热备过滤器无法移除时返回 None，需要重新打开句柄
+        """
+        expression = self.capture_filter.expression()
+        known_unsupported = expression == tested_expression and not kernel_filter
+        if expression is not None and not known_unsupported and apply_filter(sock, expression):
+            self.logger.info(f"接口 {interface} 已从热备切换为抓包，已启用内核 BPF 过滤")
+            return True
+        if clear_filter(sock):
+            if expression is None:
+                self.logger.info(f"接口 {interface} 已从热备切换为抓包")
+            else:
+                self.logger.info(f"接口 {interface} 已从热备切换为抓包，无法设置 BPF 过滤器，改用 Python 侧过滤")
+            return False
+        self.logger.info(f"接口 {interface} 无法移除热备过滤器，重新打开句柄")
+        return None
+
+    def _close_standby(self, keep=()):
+        """关闭不在 keep 中的热备句柄"""
+        with self.standby_lock:
+            closing = [interface for interface in self.standby_handles if interface not in keep]
+            sockets = [self.standby_handles.pop(interface)[0] for interface in closing]
+        for sock in sockets:
+            self._close_standby_socket(sock)
+
+    def _close_standby_socket(self, sock):
+        try:
+            sock.close()
+        except Exception as e:
+            self.logger.error(f"关闭热备句柄时发生错误: {str(e)}")
+        finally:
+            LIFECYCLE.increment("handles_closed")
+
+    def reset_detection(self):
+        """清空检测结果和各接口的检测进度，之后的报文重新开始检测"""
+        with self.lock:
+            self.server_address = None
+            self.stream_code = None
+        for interface in list(self.detection_states):
+            self.detection_states[interface] = DetectionState()
+
+    def get_lifecycle_stats(self):
+        """获取抓包线程和句柄的启停计数，见 LifecycleCounters"""
+        return LIFECYCLE.snapshot()
+
     def add_callback(self, callback):
         """添加回调函数"""
         self.callbacks.append(callback)
 
+    def add_change_callback(self, callback):
+        """添加持续监控模式下推流信息变化的回调函数，参数为 (推流地址, 推流码)"""
+        self.change_callbacks.append(callback)
+
     def start_multi(self, interfaces):
-        """开始多接口捕获"""
+        """开始多接口捕获
+
+        Args:
+            interfaces: 接口名称列表
+        """
         if self.is_capturing:
             return
 
+        try:
+            found = self._resolve_interfaces(interfaces)
+            if not found:
+                self.logger.error("没有找到可用的网络接口")
+                return
+            self._launch(found)
+        except Exception as e:
+            self.logger.error(f"启动多接口捕获时发生错误: {str(e)}，如果检测可用，则忽略此错误")
+            self.is_capturing = False
+
+    def _resolve_interfaces(self, interfaces):
+        """从接口名称中找出系统中存在的接口（使用共享的接口缓存）"""
+        return INTERFACES.resolve(interfaces)
+
+    def _launch(self, interfaces):
+        """重置状态并启动唯一的抓包线程，所有接口在同一个 select 循环中处理"""
+        # 上一次的抓包线程仍未退出时不再启动新线程，避免线程越积越多
+        if not self._join_capture_thread(STOP_TIMEOUT):
+            self.logger.error("上一次的抓包线程仍未退出，请稍后再试")
+            return
+
+        self.launch_started = time.perf_counter()
+        self.start_latency = None
         # 清空之前捕获的地址
         self.server_address = None
         self.stream_code = None
+        self.interface_status.clear()
+        self._load_capture_settings()
+        for interface in interfaces:
+            self.interface_status[interface] = True
+
+        # scapy 加载较慢，第一次开始抓包时才导入（界面启动后通常已在后台预加载）
+        from scapy.automaton import ObjectPipe
+
+        self.wake_pipe = ObjectPipe("capture_wake")
         self.is_capturing = True
-        self.capture_threads.clear()  # 清理之前的线程记录
-        self.interface_status.clear()  # 清空接口状态
+        self.capture_thread = threading.Thread(
+            target=self._start_capture, args=(list(interfaces),)
+        )
+        self.capture_thread.daemon = True
+        LIFECYCLE.increment("threads_started")
+        self.capture_thread.start()
+        self.logger.info(
+            f"开始在接口 {', '.join(interfaces)} 上捕获数据包（{self.backend.name} 后端，"
+            f"句柄配置 {self.backend.profile.describe()}）"
+        )
+
+    def _load_capture_settings(self):
+        """读取抓包相关配置并清空上一次的统计"""
+        from utils.config import get_config
+
+        self.capture_filter = CaptureFilter.from_config()
+        self.capture_mode = get_config("capture_mode") or CAPTURE_MODE_RAW
+        self.backend = self._select_backend()
+        self.snaplen = self.backend.profile.snaplen
+        self.keep_frames = max(int(get_config("capture_keep_frames") or 0), 0)
+        self.monitor = bool(get_config("capture_monitor"))
+        # 持续监控默认收窄内核过滤器：稳态时媒体和背景流量在内核中就被丢弃
+        self.narrowing = get_config("capture_narrowing") or (NARROW_BPF if self.monitor else NARROW_WHITELIST)
+        if self.narrowing not in NARROW_MODES:
+            self.narrowing = NARROW_WHITELIST
+        if self.monitor and self.narrowing == NARROW_OFF:
+            # 持续监控依赖握手识别，至少使用 Python 侧白名单
+            self.narrowing = NARROW_WHITELIST
+        self.published = None
+        self.changes = 0
+        self.pending_changes.clear()
+        queue_size = get_config("capture_queue_size")
+        self.queue_size = DEFAULT_CAPACITY if queue_size is None else max(int(queue_size), 0)
+        self.drop_policy = get_config("capture_drop_policy") or DROP_NON_RTMP
+        self.pipeline_stats = {}
+        self.retained_frames = deque(maxlen=max(self.keep_frames, 1))
+        self.capture_stats.clear()
+        self.reassemblers.clear()
+        self.flow_tables.clear()
+        self.classifiers.clear()
+        self.command_parsers.clear()
+        self.detection_states.clear()
+        self.lock = MeteredLock()
+
+    def _select_backend(self):
+        """按配置创建抓包后端和句柄调优配置（抓包和热备使用同一个选择）"""
+        from utils.config import get_config
+
+        return create_backend(
+            get_config("capture_backend"), get_config("capture_mode") == CAPTURE_MODE_SCAPY, get_profile()
+        )
 
-        # 获取Windows网络接口列表
-        from scapy.arch.windows import get_windows_if_list
-        windows_interfaces = get_windows_if_list()
+    def _prepare_interface(self, interface):
+        """为接口建立统计、检测进度、TCP 重组器、流汇总表、命令解析器和握手识别器
 
-        for interface_display_name in interfaces:
+        Returns:
+            InterfaceStats: 该接口的抓包统计
+        """
+        stats = self.capture_stats[interface] = InterfaceStats()
+        self.reassemblers[interface] = TcpReassembler()
+        self.flow_tables[interface] = FlowTable()
+        self.command_parsers[interface] = OrderedDict()
+        self.detection_states[interface] = DetectionState()
+        if self.narrowing != NARROW_OFF:
+            self.classifiers[interface] = RtmpFlowClassifier()
+        else:
+            self.classifiers.pop(interface, None)
+        return stats
+
+    def _start_capture(self, interfaces):
+        """抓包线程：打开所有接口的句柄，启动检测线程，然后进入统一的 select 循环"""
+        try:
+            handles = {}  # {套接字: 接口名称}
+            standby = 0  # 由热备句柄切换而来的接口数
+            for interface in interfaces:
+                # 打开句柄期间已被停止：不再打开剩余接口，已打开的由循环统一关闭
+                if not self.is_capturing:
+                    break
+                stats = self._prepare_interface(interface)
+                # 有热备句柄时只需替换过滤器，不再打开新句柄
+                sock = None
+                standby_item = self._take_standby(interface)
+                if standby_item is not None:
+                    sock = standby_item[0]
+                    stats.bpf = self._activate_standby(interface, *standby_item)
+                    if stats.bpf is None:
+                        self._close_standby_socket(sock)
+                        sock = None
+                    else:
+                        standby += 1
+                if sock is None:
+                    try:
+                        sock, stats.bpf = self.backend.open(interface, self.capture_filter, self.logger)
+                    except Exception as e:
+                        self.logger.error(f"打开接口 {interface} 失败: {str(e)}")
+                        self.interface_status[interface] = False
+                        continue
+                    LIFECYCLE.increment("handles_opened")
+                with self.handle_lock:
+                    self.open_handles[sock] = interface
+                handles[sock] = interface
+            if not handles:
+                self.is_capturing = False
+                return
+            self._start_pipeline()
+            self._report_start_latency(len(handles), standby)
+            self._capture_loop(handles)
+        finally:
+            LIFECYCLE.increment("threads_exited")
+            # 抓包结束后在后台重新准备热备句柄，供下一次开始捕获使用
+            self._open_standby_async()
+
+    def _capture_loop(self, handles):
+        """单线程多路复用所有接口的抓包句柄
+
+        线程数量与网卡数量无关；接口被停止或出错时从循环中移除，
+        所有句柄在退出时统一关闭并输出统计。
+
+        Args:
+            handles: {套接字: 接口名称}
+        """
+        select = next(iter(handles)).select
+        wake_pipe = self.wake_pipe
+        scapy_mode = self.capture_mode == CAPTURE_MODE_SCAPY
+        # 能切换为非阻塞的句柄每次就绪后批量读取，其余每次只读一个报文
+        batches = {sock: READ_BATCH if set_nonblocking(sock) else 1 for sock in handles}
+        # 批量交付的调优配置下，Npcap 的读事件要等驱动缓冲累计到 BATCH_MIN_TO_COPY 字节才触发；
+        # 每隔配置的超时主动读取一次所有非阻塞句柄，少量的握手和命令报文不会一直留在驱动中
+        profile = self.backend.profile
+        poll_idle = profile.immediate is False and bool(profile.timeout_ms)
+        select_timeout = min(SELECT_TIMEOUT, profile.timeout_ms / 1000) if poll_idle else SELECT_TIMEOUT
+        next_poll = time.monotonic() + select_timeout
+        active = dict(handles)
+        readable = None
+        next_kernel_stats = time.monotonic() + KERNEL_STATS_INTERVAL
+        try:
+            while self.is_capturing and active:
+                now = time.monotonic()
+                if now >= next_kernel_stats:
+                    next_kernel_stats = now + KERNEL_STATS_INTERVAL
+                    for sock, interface in active.items():
+                        self.capture_stats[interface].apply_kernel_stats(read_kernel_stats(sock))
+                if readable is None:
+                    readable = list(active)
+                    if wake_pipe is not None:
+                        readable.append(wake_pipe)
+                try:
+                    ready = select(readable, select_timeout)
+                except (OSError, ValueError) as e:
+                    # stop() 超时后强制关闭了句柄
+                    if self.is_capturing:
+                        self.logger.error(f"等待抓包数据时发生错误: {str(e)}")
+                    break
+                if poll_idle and time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + select_timeout
+                    ready = list(ready) + [sock for sock in active if batches[sock] > 1 and sock not in ready]
+                if not ready:
+                    # 空闲时检查是否有接口被单独停止
+                    stopped = [sock for sock, interface in active.items() if not self.interface_status.get(interface, False)]
+                    for sock in stopped:
+                        del active[sock]
+                    if stopped:
+                        readable = None
+                    continue
+                for sock in ready:
+                    if sock is wake_pipe:
+                        wake_pipe.recv()
+                        continue
+                    interface = active.get(sock)
+                    if interface is None:
+                        continue
+                    try:
+                        if self.interface_status.get(interface, False):
+                            self._read_batch(sock, interface, scapy_mode, batches[sock])
+                            if self.pipeline is not None:
+                                self.pipeline.notify()
+                            classifier = self.classifiers.get(interface)
+                            if classifier is not None and classifier.changed:
+                                self._narrow_filter(sock, interface, classifier)
+                            continue
+                    except Exception as e:
+                        self.logger.error(f"接口 {interface} 捕获过程中发生错误: {str(e)}")
+                        self.interface_status[interface] = False
+                    del active[sock]
+                    readable = None
+        finally:
+            self._stop_pipeline()
+            self._close_handles(handles)
+            lock = self.lock.stats()
+            self.logger.info(
+                f"结果发布锁统计: 获取 {lock['acquired']} 次，争用 {lock['contended']} 次，"
+                f"累计等待 {lock['wait_ms']:.2f} 毫秒，最长持有 {lock['max_hold_us']:.0f} 微秒"
+            )
+
+    def _start_pipeline(self):
+        """启动检测线程，读取线程此后只负责把报文放入队列"""
+        self.pipeline = None
+        if self.queue_size <= 0:
+            return
+        pipeline = FramePipeline(self._process_item, self.queue_size, self.drop_policy, self._is_rtmp_item)
+        LIFECYCLE.increment("threads_started")
+        pipeline.start()
+        self.pipeline = pipeline
+
+    def _stop_pipeline(self):
+        """停止检测线程并输出队列统计"""
+        pipeline = self.pipeline
+        if pipeline is None:
+            return
+        if pipeline.stop(STOP_TIMEOUT / 4):
+            LIFECYCLE.increment("threads_exited")
+        else:
+            self.logger.error("检测线程未能在限定时间内退出")
+        self.pipeline_stats = pipeline.stats()
+        self.pipeline = None
+        stats = self.pipeline_stats
+        self.logger.info(
+            f"检测队列统计: 入队 {stats['enqueued']}，已处理 {stats['processed']}，"
+            f"队列满丢弃 {stats['dropped']}（其中 RTMP {stats['dropped_rtmp']}），"
+            f"停止时丢弃 {stats['discarded']}，最高占用 {stats['high_watermark']}/{stats['capacity']}"
+        )
+
+    def _process_item(self, item):
+        """检测线程：处理队列中的一个报文"""
+        data, linktype, interface, python_filter = item
+        if linktype is None:
+            self._packet_callback(data, interface)
+        else:
+            self._frame_callback(data, linktype, interface, python_filter)
+
+    def _is_rtmp_item(self, item):
+        """队列满时判断报文是否需要保留：RTMP 端口、握手识别出的连接、握手或命令报文"""
+        data, linktype, interface, _ = item
+        ports = self.capture_filter.ports
+        if linktype is None:
+            from scapy.all import TCP
+
+            return TCP in data and (data[TCP].sport in ports or data[TCP].dport in ports)
+        if looks_like_rtmp(data, linktype, ports):
+            return True
+        classifier = self.classifiers.get(interface)
+        if classifier is None or not classifier.flows:
+            return False
+        segment = parse_tcp_frame(data, linktype)
+        if segment is None:
+            return False
+        src, dst, src_port, dst_port = segment[:4]
+        return (format_address(src), src_port, format_address(dst), dst_port) in classifier.flows
+
+    def _read_batch(self, sock, interface, scapy_mode, batch):
+        """从一个就绪的句柄读取最多 batch 个报文"""
+        python_filter = not self.capture_stats[interface].bpf
+        pipeline = self.pipeline
+        recv_block = getattr(sock, "recv_block", None)
+        if recv_block is not None and not scapy_mode:
+            # 环形缓冲区后端：按块批量取出原始帧
+            linktype = sock.linktype
+            frames = recv_block(batch)
+            if pipeline is not None:
+                for frame in frames:
+                    pipeline.put((frame, linktype, interface, python_filter))
+            else:
+                for frame in frames:
+                    self._frame_callback(frame, linktype, interface, python_filter)
+            return
+        for _ in range(batch):
             try:
-                # 从显示名称中提取实际的接口名称
-                interface = interface_display_name.split(" [")[0].strip()
-
-                # 查找匹配的接口
-                interface_found = None
-                for iface in windows_interfaces:
-                    if iface.get("name") == interface:
-                        interface_found = iface.get("name")
-                        break
+                if scapy_mode:
+                    packet = sock.recv()
+                    if packet is None:
+                        return
+                    if python_filter and not self.capture_filter.match_packet(packet):
+                        continue
+                    if pipeline is not None:
+                        pipeline.put((packet, None, interface, False))
+                    else:
+                        self._packet_callback(packet, interface)
+                    continue
 
-                if interface_found:
-                    # 初始化接口状态
-                    self.interface_status[interface_found] = True
-                    # 为每个接口创建独立的捕获线程
-                    thread = threading.Thread(
-                        target=self._start_capture, args=(interface_found,)
-                    )
-                    thread.daemon = True
-                    thread.start()
-                    self.capture_threads[interface_found] = thread
-                    self.logger.info(f"开始在接口 {interface_found} 上捕获数据包")
-            except Exception as e:
-                self.logger.error(
-                    f"启动接口 {interface_display_name} 捕获时发生错误: {str(e)}，如果检测可用，则忽略此错误"
-                )
+                # 原始帧快速路径：只读取帧字节，不构造 scapy 数据包
+                layer, frame, _ = sock.recv_raw()
+            except BlockingIOError:
+                return  # 非阻塞句柄已读空
+            if frame is None:
+                return
+            if pipeline is not None:
+                pipeline.put((frame, linktype_of(layer), interface, python_filter))
+            else:
+                self._frame_callback(frame, linktype_of(layer), interface, python_filter)
+
+    def _narrow_filter(self, sock, interface, classifier):
+        """识别到新的 RTMP 连接后收窄内核过滤器，只放行这些连接和新的握手"""
+        classifier.changed = False
+        if self.narrowing != NARROW_BPF:
+            return
+        base = self.capture_filter.expression() if self.capture_stats[interface].bpf else None
+        if apply_filter(sock, classifier.narrow_expression(base)):
+            self.logger.info(f"接口 {interface} 已把内核过滤器收窄到识别出的 RTMP 连接")
+        else:
+            self.logger.info(f"接口 {interface} 不支持重新设置内核过滤器，继续使用 Python 侧白名单")
+
+    def _close_handles(self, handles):
+        """唯一的关闭路径：输出统计并关闭所有句柄"""
+        for sock, interface in handles.items():
+            self.interface_status[interface] = False
+            try:
+                self._report_capture_stats(interface, sock)
+            finally:
+                self._close_socket(sock)
+        if not any(self.interface_status.values()):
+            self.is_capturing = False
+
+    def _report_capture_stats(self, interface, sock):
+        """记录并输出内核丢包与送达报文数的对比"""
+        stats = self.capture_stats.get(interface)
+        if stats is None:
+            stats = self.capture_stats[interface] = InterfaceStats()
+        reassembler = self.reassemblers.get(interface)
+        reassembly_kb = reassembler.memory_bytes() / 1024 if reassembler else 0.0
+        stats.apply_kernel_stats(read_kernel_stats(sock))
+        stats.finish()
+        if stats.kernel_received is not None:
+            self.logger.info(
+                f"接口 {interface} 抓包统计: 内核接收 {stats.kernel_received}，"
+                f"内核丢弃 {stats.kernel_dropped}，网卡丢弃 {stats.kernel_ifdropped}，"
+                f"送达 {stats.delivered}，进入检测 {stats.detected}，重组缓存 {reassembly_kb:.1f} KB"
+            )
+        else:
+            self.logger.info(
+                f"接口 {interface} 抓包统计: 送达 {stats.delivered}，进入检测 {stats.detected}，"
+                f"重组缓存 {reassembly_kb:.1f} KB（后端不支持内核统计）"
+            )
 
-    def _start_capture(self, interface):
-        """实际的捕获过程"""
+    def get_capture_stats(self):
+        """获取各接口的抓包统计（含重组缓存占用和握手识别结果）
+
+        Returns:
+            dict: {接口名称: 统计字典}，字段见 InterfaceStats.to_dict
+        """
+        result = {}
+        for interface, stats in list(self.capture_stats.items()):
+            result[interface] = stats.to_dict()
+            reassembler = self.reassemblers.get(interface)
+            if reassembler is not None:
+                result[interface]["flows"] = len(reassembler.flows)
+                result[interface]["reassembly_bytes"] = reassembler.memory_bytes()
+            classifier = self.classifiers.get(interface)
+            if classifier is not None:
+                result[interface]["rtmp_connections"] = classifier.confirmed
+                result[interface]["narrow_skipped"] = classifier.skipped
+            parsers = self.command_parsers.get(interface)
+            if parsers is not None:
+                result[interface]["command_parsers"] = len(parsers)
+        return result
+
+    def dump_stats(self, path):
+        """把当前的抓包、检测队列、内存、启停、发布锁统计和就绪耗时导出为 JSON 文件，用于排查抓不到推流码的问题"""
+        data = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "capturing": self.is_capturing,
+            "interfaces": self.get_capture_stats(),
+            "pipeline": self.get_pipeline_stats(),
+            "memory": self.get_memory_stats(),
+            "lifecycle": self.get_lifecycle_stats(),
+            "publish_lock": self.lock.stats(),
+            "start_latency": self.start_latency,
+            "profile": self.backend.profile.to_dict(),
+            "standby_interfaces": self.get_standby_interfaces(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def get_pipeline_stats(self):
+        """获取检测队列的入队、丢弃和处理计数，停止后返回最后一次的统计"""
+        pipeline = self.pipeline
+        if pipeline is not None:
+            return pipeline.stats()
+        return dict(self.pipeline_stats)
+
+    def get_memory_stats(self):
+        """获取抓包相关的内存占用
+
+        Returns:
+            dict: rss 为进程常驻内存，reassembly_bytes 为各接口重组缓存之和，
+                  flows 为正在跟踪的 TCP 流数，retained_frames 为保留的原始帧数
+        """
+        reassemblers = list(self.reassemblers.values())
+        return {
+            "rss": process_rss(),
+            "reassembly_bytes": sum(r.memory_bytes() for r in reassemblers),
+            "flows": sum(len(r.flows) for r in reassemblers),
+            "retained_frames": len(self.retained_frames) if self.keep_frames else 0,
+        }
+
+    def get_flow_summary(self, limit=FLOW_SUMMARY_LIMIT):
+        """获取各接口的流汇总文本，用于数据包监控界面定期刷新
+
+        Returns:
+            list: 文本行，RTMP 候选流排在最前
+        """
+        lines = []
+        for interface, flow_table in list(self.flow_tables.items()):
+            rows = flow_table.snapshot(limit)
+            if not rows:
+                continue
+            lines.append(f"== {interface}：{len(flow_table.flows)} 个流（已淘汰 {flow_table.evicted}）==")
+            lines.extend(format_flow_rows(rows))
+        return lines
+
+    def save_retained_frames(self, path):
+        """把保留的原始帧写入 pcap 文件，便于之后用 replay 复现
+
+        Returns:
+            int: 写入的帧数（只写入与第一帧链路层类型相同的帧）
+        """
+        frames = list(self.retained_frames) if self.keep_frames else []
+        if not frames:
+            return 0
+        linktype = frames[0][1]
+        selected = [(ts, frame) for ts, frame_linktype, frame in frames if frame_linktype == linktype]
+        write_pcap(path, selected, linktype)
+        return len(selected)
+
+    def _frame_callback(self, frame, linktype, interface, python_filter=False):
+        """处理原始帧：通过 memoryview 偏移解析头部，只把 TCP 负载交给检测"""
+        start = time.perf_counter()
+        stats = self.capture_stats.get(interface)
         try:
-            sniff(
-                iface=interface,
-                prn=lambda x: self._packet_callback(x, interface), 
-                stop_filter=lambda x: not self.interface_status.get(interface, False),
+            if stats is not None:
+                stats.delivered += 1
+                stats.bytes += len(frame)
+                if stats.delivered == 1:
+                    self._mark(STAGE_FIRST_PACKET)
+            if self.keep_frames:
+                self.retained_frames.append((time.time(), linktype, bytes(frame)))
+
+            segment = parse_tcp_frame(frame, linktype)
+            if segment is None:
+                return
+            src, dst, src_port, dst_port, seq, flags, payload = segment
+            if python_filter and not self.capture_filter.match_ports(src_port, dst_port):
+                return
+            snaplen = self.snaplen
+
+            self._handle_payload(
+                interface,
+                format_address(src),
+                src_port,
+                format_address(dst),
+                dst_port,
+                seq,
+                flags,
+                payload,
+                snaplen is not None and len(frame) >= snaplen,
             )
         except Exception as e:
-            self.logger.error(f"捕获过程中发生错误: {str(e)}，如果数据包监控有一条条日志在跑，则忽略此错误")
-            self.interface_status[interface] = False
+            self.logger.error(f"处理数据包时发生错误: {str(e)}")
+        finally:
+            if stats is not None:
+                stats.record_time(time.perf_counter() - start)
 
     def _packet_callback(self, packet, interface):
-        """处理捕获的数据包"""
+        """处理捕获的数据包（scapy 解析模式）"""
+        from scapy.all import IP, TCP, Raw
+
+        start = time.perf_counter()
+        stats = self.capture_stats.get(interface)
         try:
-            if IP in packet and TCP in packet and Raw in packet:
-                # 记录基本连接信息
-                src_ip = packet[IP].src
-                dst_ip = packet[IP].dst
-                src_port = packet[TCP].sport
-                dst_port = packet[TCP].dport
-
-                # 记录基本连接信息
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self.logger.packet(
-                    f"[{current_time}] {src_ip}:{src_port} -> {dst_ip}:{dst_port}"
+            if stats is not None:
+                stats.delivered += 1
+                stats.bytes += getattr(packet, "wirelen", None) or len(packet)
+                if stats.delivered == 1:
+                    self._mark(STAGE_FIRST_PACKET)
+            if self.keep_frames:
+                self.retained_frames.append(
+                    (float(packet.time), LINKTYPE_BY_LAYER.get(type(packet).__name__, DLT_EN10MB), bytes(packet))
                 )
 
-                try:
-                    payload = packet[Raw].load.decode("utf-8", errors="ignore")
-                    # 使用线程锁保护共享资源的访问
-                    with self.lock:
-                        # 查找推流服务器地址
-                        if not self.server_address and "connect" in payload:
-                            server_match = re.search(
-                                r"(rtmp://[a-zA-Z0-9\-\.]+/[^/]+)", payload
-                            )
-                            if server_match:
-                                self.server_address = server_match.group(1).split(
-                                    "\x00"
-                                )[0]
-                                self.logger.info(
-                                    f"\n>>> 找到推流服务器地址 <<<\n地址:{self.server_address}"
-                                )
-
-                        # 查找推流码
-                        if not self.stream_code and "FCPublish" in payload:
-                            code_match = re.search(
-                                r"(stream-\d+\?[a-zA-Z0-9_]+=[a-zA-Z0-9\-]+(?:&[a-zA-Z0-9_]+=[a-zA-Z0-9\-]+)*)",
-                                payload,
-                            )
-                            if code_match:
-                                self.stream_code = code_match.group(1)
-                                if self.stream_code.endswith("C"):
-                                    self.stream_code = self.stream_code[:-1]
-                                self.logger.info(
-                                    f"\n>>> 找到推流码 <<<\n推流码:{self.stream_code}"
-                                )
-
-                        # 当两个信息都获取到时，停止所有接口的捕获
-                        if self.server_address and self.stream_code:
-                            # 先触发回调
-                            for callback in self.callbacks:
-                                try:
-                                    callback(self.server_address, self.stream_code)
-                                except Exception as e:
-                                    self.logger.error(f"执行回调函数时发生错误: {str(e)}")
-                            # 停止所有接口的捕获
-                            for iface in self.interface_status:
-                                self.interface_status[iface] = False
-                            self.is_capturing = False
-                            self.logger.info("已获取所需信息，停止所有接口捕获")
-
-                except UnicodeDecodeError:
-                    pass  # 忽略无法解码的数据包
-
+            if IP in packet and TCP in packet and Raw in packet:
+                self._handle_payload(
+                    interface,
+                    packet[IP].src,
+                    packet[TCP].sport,
+                    packet[IP].dst,
+                    packet[TCP].dport,
+                    packet[TCP].seq,
+                    int(packet[TCP].flags),
+                    packet[Raw].load,
+                    len(packet) < (getattr(packet, "wirelen", None) or 0),
+                )
         except Exception as e:
             self.logger.error(f"处理数据包时发生错误: {str(e)}")
+        finally:
+            if stats is not None:
+                stats.record_time(time.perf_counter() - start)
+
+    def _handle_payload(self, interface, src_ip, src_port, dst_ip, dst_port, seq, flags, payload, truncated=False):
+        """按流汇总连接信息，并在重组后的 TCP 字节流中查找推流地址和推流码
+
+        truncated 为 True 时帧被 snaplen 截短，payload 只是负载的开头部分。
+        """
+        flow_key = (src_ip, src_port, dst_ip, dst_port)
+        # 只累加计数，界面定期读取汇总，不再逐包输出日志
+        flow_table = self.flow_tables.get(interface)
+        classifier = None
+        first_payload = False
+        if flow_table is not None:
+            ports = self.capture_filter.ports
+            record = flow_table.update(flow_key, len(payload), rtmp_candidate=src_port in ports or dst_port in ports)
+            first_payload = record.packets == 1
+
+            # 通过握手识别出 RTMP 连接后，其他连接的报文不再重组和检测
+            classifier = self.classifiers.get(interface)
+            if classifier is not None:
+                known = classifier.confirmed
+                allowed = classifier.allow(flow_key, first_payload, payload)
+                if flags & (TCP_FIN | TCP_RST):
+                    classifier.close(flow_key)
+                if not allowed:
+                    return
+                if classifier.confirmed > known:
+                    self._on_rtmp_connection(interface, flow_table, classifier.latest)
+
+        # 从 C0+C1 开始跟踪的客户端方向直接解码命令消息，不再重组和字节匹配
+        parsers = self.command_parsers.get(interface)
+        parser = None
+        found = None
+        if parsers is not None:
+            reverse = (dst_ip, dst_port, src_ip, src_port)
+            if reverse in parsers:
+                return  # 服务端方向没有 connect / 发布命令
+            parser = parsers.get(flow_key)
+            if parser is None and first_payload and is_handshake_start(payload):
+                parser = parsers[flow_key] = RtmpCommandParser(seq)
+                self._mark(STAGE_RTMP_FLOW)
+                if len(parsers) > MAX_PARSERS:
+                    parsers.popitem(last=False)
+            if parser is not None:
+                found = parser.feed(seq, payload)
+                if parser.failed:
+                    # 缺失报文或块流不合法，该连接改用重组加字节匹配
+                    del parsers[flow_key]
+                    parser = None
+                    self.logger.info(
+                        f"接口 {interface} 无法继续解析 {src_ip}:{src_port} -> {dst_ip}:{dst_port} 的 RTMP 块流，改用字节匹配"
+                    )
+                elif flags & (TCP_FIN | TCP_RST):
+                    del parsers[flow_key]
+
+        # 命令可能被拆分到多个报文或乱序到达，在重组后的字节流上匹配；
+        # 已完成检测的连接中间的媒体数据都被跳过了，直接检测当前报文
+        reassembler = self.reassemblers.get(interface)
+        if parser is None and reassembler is not None and (classifier is None or flow_key not in classifier.finished):
+            payload = reassembler.feed(flow_key, seq, payload, flags, truncated=truncated)
+            if payload is None:
+                return  # 重复或等待缺失数据的乱序报文
+
+        stats = self.capture_stats.get(interface)
+        if stats is not None:
+            stats.detected += 1
+
+        # 检测进度按接口保存，只在发布最终结果时短暂持有 self.lock
+        state = self.detection_states.get(interface)
+        if state is None:
+            state = self.detection_states.setdefault(interface, DetectionState())
+        monitor = self.monitor
+        need_server = monitor or not state.server_address
+        need_key = monitor or not state.stream_code
+        if parser is not None:
+            server_address = found[0] if need_server else None
+            stream_code = found[1] if need_key else None
+        else:
+            server_address, stream_code = self.detector.scan(payload, need_server=need_server, need_key=need_key)
+        if not server_address and not stream_code:
+            return
+
+        if flow_table is not None:
+            flow_table.mark_candidate(flow_key)
+        if server_address:
+            self._mark(STAGE_SERVER_FOUND)
+            self.logger.info(f"\n>>> 找到推流服务器地址 <<<\n地址:{server_address}")
+        if stream_code:
+            self._mark(STAGE_KEY_FOUND)
+            self.logger.info(f"\n>>> 找到推流码 <<<\n推流码:{stream_code}")
+
+        result = state.update(server_address, stream_code, monitor)
+        if result is None:
+            return
+        if monitor:
+            # 该连接之后只剩媒体数据，不再解析块流，只做廉价的发布命令检查
+            if parser is not None:
+                parsers.pop(flow_key, None)
+            if classifier is not None:
+                classifier.finish(flow_key)
+            self._publish_change(result)
+            return
+
+        # 两个信息都获取到时停止所有接口的捕获（多个接口同时得到结果时只有第一个生效）
+        with self.lock:
+            if self.server_address and self.stream_code:
+                return
+            self.server_address, self.stream_code = result
+        for callback in self.callbacks:
+            try:
+                callback(*result)
+            except Exception as e:
+                self.logger.error(f"执行回调函数时发生错误: {str(e)}")
+        # 停止所有接口的捕获
+        for iface in self.interface_status:
+            self.interface_status[iface] = False
+        self.is_capturing = False
+        self.logger.info("已获取所需信息，停止所有接口捕获")
+
+    def _publish_change(self, current):
+        """持续监控：推流信息与上次通知的不同时触发变化回调
+
+        临界区内只比较并替换最终结果，并按顺序记入待通知队列；日志和回调在锁外执行，
+        由 notify_lock 保证同一时间只有一个线程按顺序发出通知。
+        """
+        with self.lock:
+            if current == self.published:
+                return
+            first = self.published is None
+            self.published = current
+            self.server_address, self.stream_code = current
+            self.changes += 1
+            self.pending_changes.append((self.changes, first, current))
+        with self.notify_lock:
+            while self.pending_changes:
+                version, first, current = self.pending_changes.popleft()
+                if first:
+                    self.logger.info("已获取推流信息，继续监控推流码变化")
+                else:
+                    self.logger.info(f"检测到推流信息变化（第 {version - 1} 次）")
+                for callback in self.change_callbacks:
+                    try:
+                        callback(*current)
+                    except Exception as e:
+                        self.logger.error(f"执行回调函数时发生错误: {str(e)}")
+
+    def _mark(self, stage):
+        """在当前会话的时间线上记录阶段（未设置时间线时忽略）"""
+        timeline = self.timeline
+        if timeline is not None:
+            timeline.mark(stage)
+
+    def _on_rtmp_connection(self, interface, flow_table, connection):
+        """握手确认了一个 RTMP 连接"""
+        self._mark(STAGE_RTMP_FLOW)
+        src_ip, src_port, dst_ip, dst_port = connection
+        flow_table.mark_candidate(connection)
+        flow_table.mark_candidate((dst_ip, dst_port, src_ip, src_port))
+        self.logger.info(
+            f"接口 {interface} 通过握手识别到 RTMP 连接 {src_ip}:{src_port} -> {dst_ip}:{dst_port}，"
+            f"之后只检测该连接"
+        )
+
+    def replay(self, path, speed=None, interface="replay", stop_on_detect=True):
+        """离线回放 pcap / pcapng 文件，经过与实时抓包相同的回调和检测流程
+
+        按原始时间间隔回放（speed 非零）时报文经过与实时抓包相同的检测队列，队列满时按同样的策略丢弃；
+        尽可能快地回放时读取速度远超实时流量，队列丢弃没有意义，直接在当前线程中检测。
+
+        Args:
+            path: 抓包文件路径
+            speed: None 或 0 表示尽可能快；1 表示按原始时间间隔回放，2 表示两倍速
+            interface: 回放时使用的接口名称（用于统计）
+            stop_on_detect: 获取到推流地址和推流码后是否停止回放
+
+        Returns:
+            dict: 回放报告，包含报文数、包/秒和检测耗时；正在实时抓包时返回 None
+        """
+        if self.is_capturing:
+            self.logger.error("正在抓包，无法同时回放抓包文件")
+            return None
+
+        self.server_address = None
+        self.stream_code = None
+        self._load_capture_settings()
+        self.interface_status.clear()
+        self.interface_status[interface] = True
+        self._prepare_interface(interface)
+        self.logger.info(f"开始回放抓包文件: {path}")
+
+        packets = 0
+        total_bytes = 0
+        first_timestamp = None
+        detected = None  # (墙钟耗时, 抓包时间耗时, 报文序号)
+        self.pipeline_stats = None
+        if speed:
+            self._start_pipeline()
+        pipeline = self.pipeline
+        start = time.perf_counter()
+        try:
+            for timestamp, linktype, frame in read_frames(path):
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                if speed:
+                    # 按原始时间间隔（除以倍速）等待
+                    delay = (timestamp - first_timestamp) / speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                packets += 1
+                total_bytes += len(frame)
+                # 回放时没有内核 BPF 过滤，统一在 Python 侧过滤
+                if pipeline is not None:
+                    pipeline.put((frame, linktype, interface, True))
+                    pipeline.notify()
+                else:
+                    self._frame_callback(frame, linktype, interface, True)
+
+                if detected is None and self.server_address and self.stream_code:
+                    detected = (time.perf_counter() - start, timestamp - first_timestamp, packets)
+                    if stop_on_detect:
+                        break
+        except (OSError, ValueError) as e:
+            self.logger.error(f"读取抓包文件失败: {str(e)}")
+        finally:
+            if pipeline is not None:
+                # 等待检测线程处理完队列中剩余的报文
+                deadline = time.perf_counter() + STOP_TIMEOUT
+                while time.perf_counter() < deadline:
+                    queued = pipeline.stats()
+                    if queued["processed"] + queued["dropped"] >= queued["enqueued"]:
+                        break
+                    time.sleep(REPLAY_DRAIN_POLL)
+                self._stop_pipeline()
+                if detected is None and packets and self.server_address and self.stream_code:
+                    detected = (time.perf_counter() - start, timestamp - first_timestamp, packets)
+            self.interface_status[interface] = False
+
+        elapsed = time.perf_counter() - start
+        state = self.detection_states[interface]
+        report = {
+            "path": path,
+            "packets": packets,
+            "bytes": total_bytes,
+            "seconds": elapsed,
+            "pps": packets / elapsed if elapsed > 0 else 0.0,
+            "detected": detected is not None,
+            "server_address": state.server_address,
+            "stream_code": state.stream_code,
+            "time_to_detect": detected[0] if detected else None,
+            "capture_time_to_detect": detected[1] if detected else None,
+            "detect_packet_index": detected[2] if detected else None,
+            "pipeline": self.pipeline_stats,
+        }
+        if detected:
+            self.logger.info(
+                f"回放完成: {packets} 个报文，{report['pps']:.0f} 包/秒，"
+                f"第 {detected[2]} 个报文检测到推流信息，耗时 {detected[0] * 1000:.1f} 毫秒"
+            )
+        else:
+            self.logger.info(f"回放完成: {packets} 个报文，{report['pps']:.0f} 包/秒，未检测到推流信息")
+        return report
 
     def test_capture(self, interfaces, callback):
-        """测试接口是否可以捕获到数据
-        
+        """同时探测多个接口是否可以捕获到数据
+
         Args:
-            interfaces: 要测试的接口列表
-            callback: 测试完成的回调函数，参数为布尔值表示是否检测到数据
+            interfaces: 要测试的接口名称列表
+            callback: 测试完成的回调函数，参数为 (是否检测到数据, 排序后的探测报告)
         """
         def _test():
+            report = []
             try:
-                # 获取Windows网络接口列表
-                from scapy.arch.windows import get_windows_if_list
-                windows_interfaces = get_windows_if_list()
-                
-                has_data = False
-                for interface_display_name in interfaces:
-                    # 从显示名称中提取实际的接口名称
-                    interface = interface_display_name.split(" [")[0].strip()
-                    
-                    # 查找匹配的接口
-                    interface_found = None
-                    for iface in windows_interfaces:
-                        if iface.get("name") == interface:
-                            interface_found = iface.get("name")
-                            break
-                    
-                    if interface_found:
-                        # 使用sniff函数进行短时间捕获
-                        packets = sniff(iface=interface_found, timeout=5)
-                        if len(packets) > 0:
-                            has_data = True
-                            break
-                
-                # 调用回调函数
-                callback(has_data)
-                
+                found = self._resolve_interfaces(interfaces)
+                self.capture_filter = CaptureFilter.from_config()
+                report = probe_interfaces(found, self.logger, ports=self.capture_filter.ports, backend=self._select_backend())
+                self.logger.info("接口探测结果（按推荐程度排序）:\n" + "\n".join(format_probe_report(report)))
             except Exception as e:
                 self.logger.error(f"测试捕获时发生错误: {str(e)}")
-                callback(False)
-        
+            # 调用回调函数
+            callback(any(result["usable"] for result in report), report)
+
         # 在新线程中运行测试
         threading.Thread(target=_test, daemon=True).start()
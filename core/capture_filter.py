@@ -0,0 +1,268 @@
+import errno
+import socket
+import struct
+
+# 只保留携带负载的 TCP 报文：IPv4 总长度 - IP 头长度 - TCP 头长度 != 0
+IPV4_PAYLOAD_FILTER = (
+    "(ip and tcp and (((ip[2:2] - ((ip[0]&0xf)<<2)) - ((tcp[12]&0xf0)>>2)) != 0))"
+)
+# IPv6 仅处理下一个头部直接为 TCP 的情况（固定 40 字节头）
+IPV6_PAYLOAD_FILTER = (
+    "(ip6 and ip6[6] = 6 and ((ip6[4:2] - ((ip6[52]&0xf0)>>2)) != 0))"
+)
+
+# 过滤模式
+FILTER_PAYLOAD = "payload"  # 仅保留带负载的 TCP 报文
+FILTER_RTMP_PORTS = "rtmp_ports"  # 在此基础上只保留 RTMP 常用端口
+FILTER_OFF = "off"  # 不过滤
+FILTER_MODES = (FILTER_PAYLOAD, FILTER_RTMP_PORTS, FILTER_OFF)
+
+DEFAULT_RTMP_PORTS = [1935]
+
+# Linux AF_PACKET 统计信息
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+
+# 热备句柄的过滤器：不放行任何报文（帧长度至少 14 字节），内核在复制报文之前就丢弃
+STANDBY_EXPRESSION = "less 1"
+# 无法编译表达式时直接挂到 Linux 套接字上的等价程序：一条 "ret #0" 指令
+SO_ATTACH_FILTER = 26
+SO_DETACH_FILTER = 27
+_DROP_ALL_PROGRAM = struct.pack("HBBI", 0x06, 0, 0, 0)
+# 切换热备句柄前最多丢弃的积压报文数
+STANDBY_DISCARD_LIMIT = 10000
+
+
+class CaptureFilter:
+    """抓包过滤器，优先交给内核 BPF 过滤，后端不支持时退回 Python 侧过滤"""
+
+    def __init__(self, mode=FILTER_PAYLOAD, ports=None):
+        if mode not in FILTER_MODES:
+            mode = FILTER_PAYLOAD
+        self.mode = mode
+        self.ports = [int(p) for p in (ports or DEFAULT_RTMP_PORTS)]
+
+    @classmethod
+    def from_config(cls):
+        """从配置文件读取过滤设置"""
+        from utils.config import get_config
+
+        mode = get_config("capture_filter") or FILTER_PAYLOAD
+        ports = get_config("rtmp_ports") or DEFAULT_RTMP_PORTS
+        return cls(mode, ports)
+
+    def expression(self):
+        """生成 libpcap/BPF 过滤表达式，不过滤时返回 None"""
+        if self.mode == FILTER_OFF:
+            return None
+
+        expression = f"({IPV4_PAYLOAD_FILTER} or {IPV6_PAYLOAD_FILTER})"
+        if self.mode == FILTER_RTMP_PORTS and self.ports:
+            ports = " or ".join(f"tcp port {port}" for port in self.ports)
+            expression = f"{expression} and ({ports})"
+        return expression
+
+    def match_packet(self, packet):
+        """Python 侧过滤，与 BPF 表达式保持一致的判断"""
+        if self.mode == FILTER_OFF:
+            return True
+        from scapy.all import TCP, Raw
+
+        if TCP not in packet or Raw not in packet:
+            return False
+        tcp = packet[TCP]
+        return self.match_ports(tcp.sport, tcp.dport)
+
+    def match_ports(self, sport, dport):
+        """Python 侧端口过滤，仅在 rtmp_ports 模式下生效"""
+        if self.mode != FILTER_RTMP_PORTS or not self.ports:
+            return True
+        return sport in self.ports or dport in self.ports
+
+    def open_socket(self, interface, logger, opener=None):
+        """打开抓包套接字
+
+        Args:
+            opener: 打开套接字的函数，参数与 conf.L2listen 相同（iface=、filter=），默认为 conf.L2listen
+
+        Returns:
+            tuple: (套接字, 是否启用了内核过滤)，未启用时需要在 Python 侧过滤
+        """
+        if opener is None:
+            from scapy.all import conf
+
+            opener = conf.L2listen
+
+        expression = self.expression()
+        if expression is None:
+            return opener(iface=interface), False
+
+        try:
+            sock = opener(iface=interface, filter=expression)
+            logger.info(f"接口 {interface} 已启用内核 BPF 过滤")
+            return sock, True
+        except Exception as e:
+            # 后端无法编译 BPF（例如缺少 libpcap），退回 Python 侧过滤
+            logger.info(f"接口 {interface} 无法编译 BPF 过滤器: {str(e)}，改用 Python 侧过滤")
+            return opener(iface=interface), False
+
+
+def read_kernel_stats(sock):
+    """读取抓包句柄的内核统计信息
+
+    Returns:
+        dict: received 为内核收到的报文数，dropped 为内核缓冲区丢弃数，
+              ifdropped 为网卡驱动丢弃数，cumulative 表示这些值是否为累计值
+              （为 False 时是自上次读取以来的增量）；后端不支持时返回 None
+    """
+    try:
+        pcap_fd = getattr(sock, "pcap_fd", None)
+        if pcap_fd is not None:
+            # libpcap / Npcap 句柄
+            from ctypes import byref
+            from scapy.libs.winpcapy import pcap_stat, pcap_stats
+
+            stat = pcap_stat()
+            if pcap_stats(pcap_fd.pcap, byref(stat)) != 0:
+                return None
+            return {
+                "received": stat.ps_recv,
+                "dropped": stat.ps_drop,
+                "ifdropped": stat.ps_ifdrop,
+                "cumulative": True,
+            }
+
+        ins = getattr(sock, "ins", None)
+        if isinstance(ins, socket.socket) and ins.family == getattr(socket, "AF_PACKET", None):
+            # Linux AF_PACKET：tpacket_stats {tp_packets, tp_drops}，读取后内核计数清零
+            packets, drops = struct.unpack(
+                "II", ins.getsockopt(SOL_PACKET, PACKET_STATISTICS, 8)
+            )
+            return {"received": packets, "dropped": drops, "ifdropped": 0, "cumulative": False}
+    except Exception:
+        return None
+    return None
+
+
+def set_nonblocking(sock):
+    """把抓包句柄切换为非阻塞读取，便于一次 select 后连续读出多个报文
+
+    Returns:
+        bool: 成功时返回 True；此后没有报文时 recv_raw 返回空结果或抛出 BlockingIOError
+    """
+    if getattr(sock, "nonblocking_socket", False):
+        return True
+    try:
+        pcap_fd = getattr(sock, "pcap_fd", None)
+        if pcap_fd is not None:
+            # libpcap / Npcap：pcap_next_ex 在没有报文时立即返回
+            pcap_fd.setnonblock(True)
+            return True
+        ins = getattr(sock, "ins", None)
+        if isinstance(ins, socket.socket):
+            ins.setblocking(False)
+            return True
+    except Exception:
+        return False
+    return False
+
+
+def apply_filter(sock, expression):
+    """在已打开的抓包句柄上替换内核过滤器
+
+    Returns:
+        bool: 成功时返回 True；后端不支持（例如缺少 libpcap）时返回 False
+    """
+    pcap_fd = getattr(sock, "pcap_fd", None)
+    # libpcap / Npcap 句柄，或提供 set_filter 的非 scapy 句柄（TpacketRing）
+    set_filter = pcap_fd.setfilter if pcap_fd is not None else getattr(sock, "set_filter", None)
+    if set_filter is None:
+        return False
+    try:
+        set_filter(expression)
+        return True
+    except Exception:
+        return False
+
+
+def _packet_socket(sock):
+    """抓包句柄底层的 Linux AF_PACKET 套接字，没有时返回 None"""
+    ins = getattr(sock, "ins", None)
+    if isinstance(ins, socket.socket) and ins.family == getattr(socket, "AF_PACKET", None):
+        return ins
+    return None
+
+
+def apply_standby_filter(sock):
+    """给热备句柄挂上不放行任何报文的过滤器
+
+    优先编译 STANDBY_EXPRESSION；缺少 libpcap 的 Linux 上直接挂一条 "ret #0" 的 BPF 程序。
+
+    Returns:
+        bool: 成功时返回 True；失败时句柄仍会收包，只是不被读取（由内核缓冲区丢弃）
+    """
+    if apply_filter(sock, STANDBY_EXPRESSION):
+        return True
+    ins = _packet_socket(sock)
+    if ins is None:
+        return False
+    import ctypes
+
+    program = ctypes.create_string_buffer(_DROP_ALL_PROGRAM)
+    try:
+        # struct sock_fprog {unsigned short len; struct sock_filter *filter;}
+        ins.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, struct.pack("HL", 1, ctypes.addressof(program)))
+        return True
+    except OSError:
+        return False
+
+
+def clear_filter(sock):
+    """移除句柄上的内核过滤器（放行所有报文）
+
+    Returns:
+        bool: 成功时返回 True
+    """
+    pcap_fd = getattr(sock, "pcap_fd", None)
+    if pcap_fd is not None:
+        try:
+            pcap_fd.setfilter("")  # 空表达式匹配所有报文
+            return True
+        except Exception:
+            return False
+    ins = _packet_socket(sock)
+    if ins is None:
+        return False
+    try:
+        ins.setsockopt(socket.SOL_SOCKET, SO_DETACH_FILTER, 0)
+        return True
+    except OSError as e:
+        # 没有挂过滤器时内核返回 ENOENT
+        return e.errno == errno.ENOENT
+
+
+def discard_pending(sock, limit=STANDBY_DISCARD_LIMIT):
+    """丢弃句柄中已经缓冲的报文（挂上热备过滤器之前收到的）
+
+    Returns:
+        int: 丢弃的报文数；句柄无法切换为非阻塞时不读取，返回 0
+    """
+    if not set_nonblocking(sock):
+        return 0
+    recv_block = getattr(sock, "recv_block", None)
+    discarded = 0
+    while discarded < limit:
+        try:
+            if recv_block is not None:
+                count = len(recv_block(limit - discarded))
+                if not count:
+                    break
+                discarded += count
+                continue
+            frame = sock.recv_raw()[1]
+        except (BlockingIOError, OSError):
+            break
+        if frame is None:
+            break
+        discarded += 1
+    return discarded
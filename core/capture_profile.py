@@ -0,0 +1,164 @@
+import socket
+import struct
+import sys
+
+# 抓包句柄调优配置（配置项 capture_profile）
+PROFILE_DEFAULT = "default"  # 各后端原有的参数
+PROFILE_LOW_LATENCY = "low-latency"  # 报文立即交给用户态，检测延迟最低
+PROFILE_LOW_CPU = "low-cpu"  # 截短超长帧、批量交付，唤醒和复制次数最少
+PROFILE_LOSSLESS = "lossless"  # 大内核缓冲区，突发流量下尽量不丢包
+
+# RTMP 握手和命令所在的报文都不超过一个 MSS（C2 与 connect 合并发送也只有约 2 KB），
+# 截短只影响网卡分段卸载前的超长媒体帧；重组遇到被截短的报文后从该流的下一个报文重新开始
+LOW_CPU_SNAPLEN = 4096
+# Npcap 非立即模式下，驱动缓冲累计到这么多字节才触发读事件；
+# 抓包循环每隔 timeout_ms 主动读取一次句柄，报文少时也按超时交付
+BATCH_MIN_TO_COPY = 64 * 1024
+
+
+class CaptureProfile:
+    """一组抓包句柄参数，为 None 的参数保持后端默认值
+
+    Attributes:
+        snaplen: 每个帧最多保留的字节数
+        buffer_size: 内核缓冲区大小（字节）：Npcap 为驱动缓冲区，TPACKET_V3 为环形缓冲区总大小，
+                     其他 Linux 套接字为 SO_RCVBUF
+        immediate: 报文到达后立即交给用户态（True），或攒够一批 / 超时后再交付（False）
+        timeout_ms: 非立即模式下的最长等待时间（毫秒）
+    """
+
+    __slots__ = ("name", "snaplen", "buffer_size", "immediate", "timeout_ms")
+
+    def __init__(self, name, snaplen=None, buffer_size=None, immediate=None, timeout_ms=None):
+        self.name = name
+        self.snaplen = snaplen
+        self.buffer_size = buffer_size
+        self.immediate = immediate
+        self.timeout_ms = timeout_ms
+
+    def is_default(self):
+        """是否所有参数都保持后端默认值"""
+        return self.snaplen is None and self.buffer_size is None and self.immediate is None and self.timeout_ms is None
+
+    def describe(self):
+        """单行描述，用于日志"""
+        if self.is_default():
+            return f"{self.name}（后端默认参数）"
+        parts = []
+        if self.snaplen is not None:
+            parts.append(f"snaplen {self.snaplen}")
+        if self.buffer_size is not None:
+            parts.append(f"缓冲区 {self.buffer_size >> 20} MB")
+        if self.immediate is not None:
+            parts.append("立即交付" if self.immediate else f"批量交付（最长 {self.timeout_ms} 毫秒）")
+        return f"{self.name}（{'，'.join(parts)}）"
+
+    def to_dict(self):
+        """导出为可序列化的字典"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+PROFILES = {
+    PROFILE_DEFAULT: CaptureProfile(PROFILE_DEFAULT),
+    PROFILE_LOW_LATENCY: CaptureProfile(PROFILE_LOW_LATENCY, 65535, 8 << 20, True, 1),
+    PROFILE_LOW_CPU: CaptureProfile(PROFILE_LOW_CPU, LOW_CPU_SNAPLEN, 16 << 20, False, 250),
+    PROFILE_LOSSLESS: CaptureProfile(PROFILE_LOSSLESS, 65535, 128 << 20, False, 100),
+}
+
+
+def get_profile(name=None):
+    """按名称获取调优配置，默认读取配置 capture_profile，未知名称时使用 default"""
+    if name is None:
+        from utils.config import get_config
+
+        name = get_config("capture_profile") or PROFILE_DEFAULT
+    return PROFILES.get(name, PROFILES[PROFILE_DEFAULT])
+
+
+_tuned_socket_class = None
+
+
+def _pcap_socket_class():
+    """按调优参数打开 libpcap / Npcap 句柄的 L2pcapListenSocket 子类（第一次使用时才定义，避免提前导入 scapy）
+
+    scapy 的 L2pcapListenSocket 固定使用 snaplen=MTU、超时 100 毫秒，这两个参数只能在激活句柄之前设置，
+    所以这里按同样的步骤自行打开句柄（包括 BPF 立即模式和 conf.except_filter）；
+    缓冲区和交付方式在激活后通过 Npcap 扩展接口设置。
+    """
+    global _tuned_socket_class
+    if _tuned_socket_class is not None:
+        return _tuned_socket_class
+
+    from scapy.arch.libpcap import BIOCIMMEDIATE, L2pcapListenSocket, open_pcap
+    from scapy.config import conf
+    from scapy.data import ETH_P_ALL
+
+    class TunedPcapListenSocket(L2pcapListenSocket):
+        desc = "read packets at layer 2 using libpcap with tuned parameters"
+
+        def __init__(self, iface, profile, filter=None):
+            self.type = ETH_P_ALL
+            self.outs = None
+            self.iface = iface
+            self.promisc = conf.sniff_promisc
+            self.monitor = None
+            fd = open_pcap(
+                device=iface,
+                snaplen=profile.snaplen or 65535,
+                promisc=self.promisc,
+                to_ms=profile.timeout_ms or 100,
+                monitor=None,
+            )
+            super(L2pcapListenSocket, self).__init__(fd)
+            if sys.platform == "win32":
+                from scapy.libs.winpcapy import pcap_setbuff, pcap_setmintocopy
+
+                if profile.buffer_size:
+                    pcap_setbuff(fd.pcap, profile.buffer_size)
+                if profile.immediate:
+                    # mintocopy 为 0：驱动缓冲区中有报文就触发读事件
+                    pcap_setmintocopy(fd.pcap, 0)
+                elif profile.immediate is False:
+                    pcap_setmintocopy(fd.pcap, BATCH_MIN_TO_COPY)
+            elif profile.immediate is not False:
+                # 与 L2pcapListenSocket 相同：BPF 设备开启立即模式（不支持的平台上忽略）
+                try:
+                    from fcntl import ioctl
+
+                    ioctl(self.pcap_fd.fileno(), BIOCIMMEDIATE, struct.pack("I", 1))
+                except Exception:
+                    pass
+            # 与 L2pcapListenSocket 相同：排除 conf.except_filter 指定的流量
+            if conf.except_filter:
+                filter = f"({filter}) and not ({conf.except_filter})" if filter else f"not ({conf.except_filter})"
+            if filter:
+                try:
+                    fd.setfilter(filter)
+                except Exception:
+                    self.close()
+                    raise
+
+    _tuned_socket_class = TunedPcapListenSocket
+    return _tuned_socket_class
+
+
+def open_tuned_socket(iface, profile, filter=None):
+    """按调优配置打开 scapy 抓包套接字（与 conf.L2listen(iface=..., filter=...) 用法相同）
+
+    libpcap / Npcap 句柄支持全部参数（Linux 的 libpcap 句柄不支持修改缓冲区和交付方式）；
+    scapy 原生的 Linux 套接字只支持 buffer_size（SO_RCVBUF）。
+    """
+    from scapy.all import conf
+
+    if profile.is_default():
+        return conf.L2listen(iface=iface, filter=filter)
+    if conf.use_pcap:
+        return _pcap_socket_class()(iface, profile, filter)
+    sock = conf.L2listen(iface=iface, filter=filter)
+    ins = getattr(sock, "ins", None)
+    if profile.buffer_size and isinstance(ins, socket.socket):
+        try:
+            ins.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, profile.buffer_size)
+        except OSError:
+            pass
+    return sock
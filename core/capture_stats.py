@@ -0,0 +1,174 @@
+import threading
+import time
+
+# 处理耗时直方图：第 i 个桶统计 [2^(i-1), 2^i) 微秒的报文（第 0 个桶为不足 1 微秒），
+# 最后一个桶同时包含更长的耗时
+HISTOGRAM_BUCKETS = 18
+
+
+def bucket_label(index):
+    """直方图桶的显示名称（微秒上限）"""
+    if index == HISTOGRAM_BUCKETS - 1:
+        return f">={1 << (index - 1)}"
+    return f"<{1 << index}"
+
+
+class InterfaceStats:
+    """单个接口的抓包统计
+
+    抓包线程和检测线程只做整数累加，界面线程或导出时通过 to_dict() 读取快照。
+    """
+
+    __slots__ = (
+        "delivered",
+        "bytes",
+        "bpf",
+        "kernel_received",
+        "kernel_dropped",
+        "kernel_ifdropped",
+        "detected",
+        "histogram",
+        "started",
+        "ended",
+    )
+
+    def __init__(self, bpf=False):
+        self.delivered = 0  # 送达 Python 的报文数
+        self.bytes = 0
+        self.bpf = bpf  # 是否启用了内核过滤
+        self.kernel_received = None  # 后端不支持内核统计时保持 None
+        self.kernel_dropped = None
+        self.kernel_ifdropped = None
+        self.detected = 0  # 经过重组和白名单后进入检测的报文数
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.started = time.monotonic()
+        self.ended = None  # 抓包结束后固定耗时，平均包速率不再随时间下降
+
+    def record_time(self, seconds):
+        """记录一个报文的处理耗时"""
+        index = int(seconds * 1e6).bit_length()
+        self.histogram[index if index < HISTOGRAM_BUCKETS else HISTOGRAM_BUCKETS - 1] += 1
+
+    def finish(self):
+        """标记该接口的抓包已结束"""
+        if self.ended is None:
+            self.ended = time.monotonic()
+
+    def apply_kernel_stats(self, kernel_stats):
+        """合并 read_kernel_stats 的结果：累计值直接替换，读取后清零的计数累加"""
+        if not kernel_stats:
+            return
+        if kernel_stats.get("cumulative", True) or self.kernel_received is None:
+            self.kernel_received = kernel_stats["received"]
+            self.kernel_dropped = kernel_stats["dropped"]
+            self.kernel_ifdropped = kernel_stats["ifdropped"]
+        else:
+            self.kernel_received += kernel_stats["received"]
+            self.kernel_dropped += kernel_stats["dropped"]
+            self.kernel_ifdropped += kernel_stats["ifdropped"]
+
+    def percentile(self, percent):
+        """按直方图估算处理耗时的百分位（返回所在桶的上限，微秒），没有数据时返回 None"""
+        histogram = list(self.histogram)
+        total = sum(histogram)
+        if not total:
+            return None
+        threshold = total * percent / 100
+        count = 0
+        for index, bucket in enumerate(histogram):
+            count += bucket
+            if count >= threshold:
+                return 1 << index
+        return 1 << (HISTOGRAM_BUCKETS - 1)
+
+    def to_dict(self):
+        """导出为可序列化的字典（用于界面、子进程事件和 JSON 导出）"""
+        elapsed = (self.ended or time.monotonic()) - self.started
+        return {
+            "delivered": self.delivered,
+            "bytes": self.bytes,
+            "bpf": self.bpf,
+            "received": self.kernel_received,
+            "dropped": self.kernel_dropped,
+            "ifdropped": self.kernel_ifdropped,
+            "detected": self.detected,
+            "elapsed": elapsed,
+            "pps": self.delivered / elapsed if elapsed > 0 else 0.0,
+            "process_p50_us": self.percentile(50),
+            "process_p99_us": self.percentile(99),
+            "process_histogram_us": {
+                bucket_label(index): count for index, count in enumerate(self.histogram) if count
+            },
+        }
+
+
+class MeteredLock:
+    """记录争用情况的互斥锁，用法与 threading.Lock 的 with 语句相同
+
+    统计获取次数、需要等待的次数、累计等待时间和持有时间；计数在持有锁时更新，无需额外同步。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.hold_seconds = 0.0
+        self.max_hold_seconds = 0.0
+        self._held_since = 0.0
+
+    def __enter__(self):
+        lock = self._lock
+        if not lock.acquire(False):
+            start = time.perf_counter()
+            lock.acquire()
+            self.contended += 1
+            self.wait_seconds += time.perf_counter() - start
+        self.acquired += 1
+        self._held_since = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        held = time.perf_counter() - self._held_since
+        self.hold_seconds += held
+        if held > self.max_hold_seconds:
+            self.max_hold_seconds = held
+        self._lock.release()
+        return False
+
+    def stats(self):
+        """导出为可序列化的字典"""
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "wait_ms": self.wait_seconds * 1000,
+            "hold_ms": self.hold_seconds * 1000,
+            "max_hold_us": self.max_hold_seconds * 1e6,
+        }
+
+
+def format_stats_lines(capture_stats, previous=None, interval=None):
+    """把 get_capture_stats() 的结果格式化为统计面板中的文本行
+
+    Args:
+        capture_stats: {接口名称: 统计字典}
+        previous: 上一次刷新时的统计，用于计算当前包速率；为空时显示平均包速率
+        interval: 两次刷新的间隔（秒）
+    """
+    lines = []
+    for interface, stats in capture_stats.items():
+        pps = stats.get("pps", 0.0)
+        last = (previous or {}).get(interface)
+        if last and interval:
+            pps = max(stats["delivered"] - last["delivered"], 0) / interval
+        dropped = stats.get("dropped")
+        kernel = "内核丢弃 -" if dropped is None else f"内核丢弃 {dropped}"
+        if stats.get("process_p50_us") is None:
+            timing = "处理耗时 -"
+        else:
+            timing = f"处理耗时 p50<{stats['process_p50_us']}µs p99<{stats['process_p99_us']}µs"
+        lines.append(
+            f"{interface}: {stats['delivered']} 包 / {stats['bytes'] / 1024 / 1024:.1f} MB，"
+            f"{pps:.0f} 包/秒，{kernel}，进入检测 {stats.get('detected', 0)}，{timing}"
+        )
+    return lines
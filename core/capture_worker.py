@@ -0,0 +1,262 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from core.capture import PacketCapture, LIFECYCLE
+
+# 抓包隔离模式：thread 在界面进程的线程中抓包，process 在子进程中抓包
+ISOLATION_THREAD = "thread"
+ISOLATION_PROCESS = "process"
+# 子进程上报统计的间隔（秒）
+STATS_INTERVAL = 1.0
+# 父进程读取事件队列的超时（秒）
+EVENT_TIMEOUT = 0.2
+# 停止时等待子进程退出的最长时间（秒），超时后强制结束
+WORKER_STOP_TIMEOUT = 2.0
+
+
+class QueueLogger:
+    """子进程中使用的日志对象，把日志作为事件发回父进程"""
+
+    def __init__(self, events):
+        self.events = events
+
+    def info(self, message):
+        self.events.put(("log", "info", message))
+
+    def error(self, message):
+        self.events.put(("log", "error", message))
+
+    def packet(self, message):
+        pass  # 数据包监控使用流汇总，不逐条转发
+
+
+class QueueTimeline:
+    """子进程中使用的时间线，每个阶段第一次出现时把时间点作为事件发回父进程"""
+
+    def __init__(self, events):
+        self.events = events
+        self.marks = set()
+
+    def mark(self, stage, at=None):
+        if stage in self.marks:
+            return False
+        self.marks.add(stage)
+        self.events.put(("stage", stage, time.perf_counter() if at is None else at))
+        return True
+
+
+def run_capture_worker(job, events, stop_event):
+    """子进程入口：在本进程内完成抓包、过滤和检测，只把事件和定期统计发回父进程
+
+    Args:
+        job: {"interfaces": [接口名称]} 实时抓包，或 {"replay": 文件路径, "speed": 倍速} 回放
+        events: multiprocessing.Queue，事件为 ("log", 级别, 消息)、("detected", 地址, 推流码)、
+                ("changed", 地址, 推流码)（持续监控模式）、("stage", 阶段, 时间点)（见 core.timeline）、
+                ("stats", 抓包统计, 流汇总, 内存统计, 检测队列统计)、("replayed", 回放报告) 和 ("stopped",)
+        stop_event: multiprocessing.Event，父进程要求停止时置位
+    """
+    capture = PacketCapture(QueueLogger(events))
+    capture.add_callback(lambda server, key: events.put(("detected", server, key)))
+    capture.add_change_callback(lambda server, key: events.put(("changed", server, key)))
+
+    def send_stats():
+        events.put((
+            "stats",
+            capture.get_capture_stats(),
+            capture.get_flow_summary(),
+            capture.get_memory_stats(),
+            capture.get_pipeline_stats(),
+        ))
+
+    try:
+        if "replay" in job:
+            report = capture.replay(job["replay"], job.get("speed"), stop_on_detect=job.get("stop_on_detect", True))
+            events.put(("replayed", report))
+        else:
+            capture.timeline = QueueTimeline(events)
+            capture._launch(job["interfaces"])
+            while capture.is_capturing and not stop_event.wait(STATS_INTERVAL):
+                send_stats()
+            capture.stop()
+        send_stats()
+    except Exception as e:
+        events.put(("log", "error", f"抓包子进程发生错误: {str(e)}"))
+    finally:
+        events.put(("stopped",))
+
+
+class ProcessCapture(PacketCapture):
+    """在子进程中抓包的 PacketCapture
+
+    接口解析、检测可用等轻量操作仍在本进程完成；抓包和检测交给子进程，
+    界面进程只接收检测结果、日志和定期统计，重负载下不会通过 GIL 拖慢 Tk 主循环。
+    """
+
+    def __init__(self, logger):
+        super().__init__(logger)
+        self.process = None
+        self.stop_event = None
+        self.events = None
+        self.listener_thread = None
+        self.flow_summary = []
+        self.memory_stats = {}
+
+    def _launch(self, interfaces):
+        """启动抓包子进程和事件监听线程"""
+        if self.process is not None and self.process.is_alive():
+            self.logger.error("上一次的抓包子进程仍未退出，请稍后再试")
+            return
+
+        self.server_address = None
+        self.stream_code = None
+        self.capture_stats.clear()
+        self.flow_summary = []
+        self.memory_stats = {}
+        self.pipeline_stats = {}
+
+        context = multiprocessing.get_context("spawn")
+        self.events = context.Queue()
+        self.stop_event = context.Event()
+        self.process = context.Process(
+            target=run_capture_worker,
+            args=({"interfaces": list(interfaces)}, self.events, self.stop_event),
+            daemon=True,
+        )
+        self.is_capturing = True
+        LIFECYCLE.increment("workers_started")
+        self.process.start()
+        self.listener_thread = threading.Thread(
+            target=self._listen, args=(self.process, self.events, self.stop_event), daemon=True
+        )
+        self.listener_thread.start()
+        self.logger.info(f"已启动抓包子进程，接口: {', '.join(interfaces)}")
+
+    def enable_standby(self, interfaces):
+        """独立进程抓包每次开始捕获都会启动新的子进程，不支持热备句柄"""
+        if interfaces and not self.standby_interfaces:
+            self.logger.info("独立进程抓包不支持热备句柄，开始捕获时再打开接口")
+        self.standby_interfaces = list(interfaces)
+
+    def _listen(self, process, events, stop_event):
+        """读取子进程发回的事件，直到子进程退出
+
+        停止时的等待和强制结束也在这个线程中完成，stop() 只发出通知，不阻塞界面线程。
+        """
+        deadline = None
+        overdue = False
+        while True:
+            if deadline is None and stop_event.is_set():
+                deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+            elif deadline is not None and time.monotonic() >= deadline:
+                self.logger.error("抓包子进程未能在限定时间内退出，强制结束")
+                overdue = True
+                break
+            try:
+                event = events.get(timeout=EVENT_TIMEOUT)
+            except queue.Empty:
+                if not process.is_alive():
+                    break
+                continue
+            if event[0] == "stopped":
+                break
+            if stop_event.is_set() and event[0] in ("detected", "changed"):
+                continue  # 已经停止捕获，不再触发结果回调
+            self._handle_event(event)
+        if not overdue:
+            process.join(WORKER_STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join(WORKER_STOP_TIMEOUT)
+        LIFECYCLE.increment("workers_exited")
+        if self.process is process:
+            self.is_capturing = False
+        if stop_event.is_set():
+            # 日志经由事件总线回到界面线程
+            self.logger.info("抓包子进程已退出")
+
+    def _handle_event(self, event):
+        """处理一个子进程事件"""
+        kind = event[0]
+        if kind == "log":
+            _, level, message = event
+            if level == "error":
+                self.logger.error(message)
+            else:
+                self.logger.info(message)
+        elif kind == "stage":
+            _, stage, at = event
+            self._mark_at(stage, at)
+        elif kind == "stats":
+            _, capture_stats, flow_summary, memory_stats, pipeline_stats = event
+            self.capture_stats = capture_stats
+            self.flow_summary = flow_summary
+            self.memory_stats = memory_stats
+            self.pipeline_stats = pipeline_stats
+        elif kind == "changed":
+            _, self.server_address, self.stream_code = event
+            for callback in self.change_callbacks:
+                try:
+                    callback(self.server_address, self.stream_code)
+                except Exception as e:
+                    self.logger.error(f"执行回调函数时发生错误: {str(e)}")
+        elif kind == "detected":
+            _, self.server_address, self.stream_code = event
+            self.is_capturing = False
+            for callback in self.callbacks:
+                try:
+                    callback(self.server_address, self.stream_code)
+                except Exception as e:
+                    self.logger.error(f"执行回调函数时发生错误: {str(e)}")
+
+    def _mark_at(self, stage, at):
+        """把子进程上报的时间点记到当前会话的时间线上"""
+        timeline = self.timeline
+        if timeline is not None:
+            timeline.mark(stage, at)
+
+    def stop(self):
+        """通知子进程停止后立即返回
+
+        等待子进程退出、超时后强制结束都由事件监听线程完成（见 _listen），
+        子进程卡住时也不会阻塞调用方（通常是界面线程）。
+        """
+        if not self.is_capturing:
+            return
+
+        self.is_capturing = False
+        if self.process is not None:
+            self.stop_event.set()
+            self.logger.info("已通知抓包子进程停止")
+
+    def get_capture_stats(self):
+        """获取子进程最近一次上报的抓包统计"""
+        return {interface: dict(stats) for interface, stats in self.capture_stats.items()}
+
+    def get_flow_summary(self, limit=None):
+        """获取子进程最近一次上报的流汇总"""
+        return list(self.flow_summary)
+
+    def get_memory_stats(self):
+        """获取子进程最近一次上报的内存统计"""
+        return dict(self.memory_stats)
+
+    def get_pipeline_stats(self):
+        """获取子进程最近一次上报的检测队列统计"""
+        return dict(self.pipeline_stats)
+
+
+def create_capture(logger, isolation=None):
+    """按配置创建抓包对象
+
+    Args:
+        isolation: thread 或 process，默认读取配置 capture_isolation
+    """
+    if isolation is None:
+        from utils.config import get_config
+
+        isolation = get_config("capture_isolation") or ISOLATION_THREAD
+    if isolation == ISOLATION_PROCESS:
+        return ProcessCapture(logger)
+    return PacketCapture(logger)
@@ -0,0 +1,98 @@
+import re
+
+# 命令跨越 RTMP 块边界时，中间会插入一个 fmt3 块头字节（0xC0 | 块流 ID）。原先先按 UTF-8 解码（忽略无效字节）
+# 再匹配，这里改为在字节正则中允许出现块头字节：字面量的字符之间可选一个，字符类中直接包含 0xC0-0xFF。
+# 遇到合法的多字节 UTF-8 字符时匹配在其续字节处结束，取出结果时去掉无效字节，与原结果一致
+_CHUNK_HEADER = rb"\xc0-\xff"
+
+
+def _tolerant(literal):
+    """字面量的每两个字符之间允许插入一个块头字节"""
+    return (rb"[%s]?" % _CHUNK_HEADER).join(re.escape(bytes([byte])) for byte in literal)
+
+
+_SERVER = _tolerant(b"rtmp://") + rb"[a-zA-Z0-9\-.%s]+/[^/\x00]+" % _CHUNK_HEADER
+_PAIR = rb"[a-zA-Z0-9_%s]+" % _CHUNK_HEADER + _tolerant(b"=") + rb"[a-zA-Z0-9\-%s]+" % _CHUNK_HEADER
+_KEY = _tolerant(b"stream-") + rb"[0-9%s]+" % _CHUNK_HEADER + _tolerant(b"?") + _PAIR + rb"(?:" + _tolerant(b"&") + _PAIR + rb")*"
+
+SERVER_PATTERN = re.compile(_SERVER)
+KEY_PATTERN = re.compile(_KEY)
+CONNECT_MARKER = b"connect"
+PUBLISH_MARKER = b"FCPublish"
+
+
+class DetectionState:
+    """单个接口的检测进度
+
+    只由处理该接口报文的线程访问，无需加锁；推流地址和推流码都齐全后，
+    才由 PacketCapture 在一个很短的临界区内发布为最终结果。
+    """
+
+    __slots__ = ("server_address", "stream_code")
+
+    def __init__(self):
+        self.server_address = None
+        self.stream_code = None
+
+    def update(self, server_address, stream_code, monitor=False):
+        """合并一个报文的检测结果
+
+        Args:
+            server_address: 本报文中找到的推流地址
+            stream_code: 本报文中找到的推流码
+            monitor: 持续监控模式
+
+        Returns:
+            tuple: 需要发布的 (推流地址, 推流码)，尚不完整或没有新信息时返回 None
+        """
+        if server_address:
+            if monitor and not stream_code:
+                # 新的 connect：等待同一连接上的推流码后再发布，避免新旧信息混在一起
+                self.stream_code = None
+            self.server_address = server_address
+        if stream_code:
+            self.stream_code = stream_code
+        if not self.server_address or not self.stream_code:
+            return None
+        if monitor:
+            return (self.server_address, self.stream_code) if stream_code else None
+        if server_address or stream_code:
+            return self.server_address, self.stream_code
+        return None
+
+
+class StreamKeyDetector:
+    """直接在字节流上查找推流服务器地址和推流码，不对负载做解码
+
+    connect / FCPublish 标记用 bytes 子串查找（C 层 memmem），绝大多数背景流量
+    在这一步就被排除；命中标记的负载只用一个预编译的字节正则查找一遍，
+    被 RTMP 块头拆开的地址和推流码在正则中直接跳过块头字节，取出结果时再去掉。
+    """
+
+    def scan(self, data, need_server=True, need_key=True):
+        """扫描一段负载
+
+        Args:
+            data: bytes / bytearray / memoryview
+            need_server: 是否还需要查找推流服务器地址
+            need_key: 是否还需要查找推流码
+
+        Returns:
+            tuple: (服务器地址或 None, 推流码或 None)
+        """
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        server = key = None
+        if need_server and CONNECT_MARKER in data:
+            match = SERVER_PATTERN.search(data)
+            if match is not None:
+                # 块头字节和路径中的无效 UTF-8 字节在解码时丢弃
+                server = match.group().decode("utf-8", errors="ignore")
+        if need_key and PUBLISH_MARKER in data:
+            match = KEY_PATTERN.search(data)
+            if match is not None:
+                key = match.group().decode("utf-8", errors="ignore")
+                # 推流码后紧跟下一个 RTMP 块的 fmt1 块头 0x43（"C"）
+                if key.endswith("C"):
+                    key = key[:-1]
+        return server, key
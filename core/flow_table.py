@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class FlowRecord:
+    """单个 TCP 连接方向的汇总信息"""
+
+    __slots__ = ("packets", "bytes", "first_seen", "last_seen", "rtmp_candidate")
+
+    def __init__(self, now):
+        self.packets = 0
+        self.bytes = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.rtmp_candidate = False
+
+
+class FlowTable:
+    """按流汇总报文数和字节数，代替逐包输出日志
+
+    以（源地址, 源端口, 目的地址, 目的端口）为键（协议固定为 TCP），
+    超过 max_flows 时淘汰最久未活动的流。抓包线程更新、界面线程读取快照，
+    因此用一把锁保护。
+    """
+
+    def __init__(self, max_flows=1024):
+        self.max_flows = max_flows
+        self.flows = OrderedDict()  # 按最近活动时间排序
+        self.evicted = 0
+        self.lock = threading.Lock()
+
+    def update(self, flow_key, length, now=None, rtmp_candidate=False):
+        """记录一个报文
+
+        Args:
+            flow_key: 流标识
+            length: 负载长度
+            now: 当前时间戳（秒），默认取 time.time()
+            rtmp_candidate: 是否疑似 RTMP 连接
+        """
+        if now is None:
+            now = time.time()
+        with self.lock:
+            flows = self.flows
+            record = flows.get(flow_key)
+            if record is None:
+                record = flows[flow_key] = FlowRecord(now)
+                if len(flows) > self.max_flows:
+                    flows.popitem(last=False)
+                    self.evicted += 1
+            else:
+                flows.move_to_end(flow_key)
+            record.packets += 1
+            record.bytes += length
+            record.last_seen = now
+            if rtmp_candidate:
+                record.rtmp_candidate = True
+        return record
+
+    def mark_candidate(self, flow_key):
+        """把流标记为 RTMP 候选"""
+        with self.lock:
+            record = self.flows.get(flow_key)
+            if record is not None:
+                record.rtmp_candidate = True
+
+    def snapshot(self, limit=None):
+        """获取流汇总的快照，RTMP 候选优先，其余按字节数降序
+
+        Returns:
+            list: [(流标识, 报文数, 字节数, 首次时间, 最近时间, 是否 RTMP 候选)]
+        """
+        with self.lock:
+            rows = [
+                (key, r.packets, r.bytes, r.first_seen, r.last_seen, r.rtmp_candidate)
+                for key, r in self.flows.items()
+            ]
+        rows.sort(key=lambda row: (not row[5], -row[2]))
+        return rows[:limit] if limit else rows
+
+    def clear(self):
+        """清空所有流"""
+        with self.lock:
+            self.flows.clear()
+            self.evicted = 0
+
+
+def format_flow_rows(rows):
+    """把流汇总格式化为数据包监控中显示的文本行"""
+    lines = []
+    for (src_ip, src_port, dst_ip, dst_port), packets, total, first_seen, last_seen, candidate in rows:
+        first = datetime.fromtimestamp(first_seen).strftime("%H:%M:%S")
+        last = datetime.fromtimestamp(last_seen).strftime("%H:%M:%S")
+        mark = "[RTMP] " if candidate else ""
+        lines.append(
+            f"{mark}{src_ip}:{src_port} -> {dst_ip}:{dst_port}  "
+            f"{packets} 包 / {total / 1024:.1f} KB  {first} ~ {last}"
+        )
+    return lines
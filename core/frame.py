@@ -0,0 +1,145 @@
+import socket
+import struct
+
+# pcap 链路层类型（DLT）
+DLT_NULL = 0
+DLT_EN10MB = 1
+DLT_RAW = 12
+DLT_RAW_ALT = 101
+DLT_LOOP = 108
+DLT_LINUX_SLL = 113
+DLT_IPV4 = 228
+DLT_IPV6 = 229
+DLT_LINUX_SLL2 = 276
+
+# scapy 链路层类名到 DLT 的对应关系（recv_raw 返回的是类而不是编号）
+LINKTYPE_BY_LAYER = {
+    "Ether": DLT_EN10MB,
+    "Loopback": DLT_NULL,
+    "LoopbackOpenBSD": DLT_LOOP,
+    "CookedLinux": DLT_LINUX_SLL,
+    "CookedLinuxV2": DLT_LINUX_SLL2,
+    "IPv46": DLT_RAW,
+    "IP": DLT_IPV4,
+    "IPv6": DLT_IPV6,
+}
+
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+ETH_P_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPPROTO_TCP = 6
+# 可以直接跳过的 IPv6 扩展头：逐跳选项、路由、目的选项
+IPV6_SKIPPABLE_HEADERS = (0, 43, 60)
+
+_unpack_u16 = struct.Struct("!H").unpack_from
+# 版本/头长, 总长度, 标志/片偏移, 协议, 源地址, 目的地址
+_unpack_ipv4 = struct.Struct("!BxHxxHxBxx4s4s").unpack_from
+# 负载长度, 下一个头部, 源地址, 目的地址
+_unpack_ipv6 = struct.Struct("!4xHBx16s16s").unpack_from
+# 源端口, 目的端口, 序列号, 数据偏移, 标志位
+_unpack_tcp = struct.Struct("!HHI4xBB").unpack_from
+
+
+def linktype_of(layer):
+    """根据 scapy 链路层类获取 DLT 编号，未知时按以太网处理（非 scapy 后端直接给出 DLT 编号）"""
+    if layer is None:
+        return DLT_EN10MB
+    if isinstance(layer, int):
+        return layer
+    return LINKTYPE_BY_LAYER.get(layer.__name__, DLT_EN10MB)
+
+
+def _network_offset(view, linktype):
+    """返回网络层起始偏移和 IP 版本，无法识别时返回 (None, None)"""
+    length = len(view)
+    if linktype == DLT_EN10MB:
+        if length < 14:
+            return None, None
+        offset = 12
+        ethertype = _unpack_u16(view, offset)[0]
+        # 跳过 VLAN 标签
+        while ethertype in ETH_P_VLAN:
+            offset += 4
+            if length < offset + 2:
+                return None, None
+            ethertype = _unpack_u16(view, offset)[0]
+        offset += 2
+        if ethertype == ETH_P_IP:
+            return offset, 4
+        if ethertype == ETH_P_IPV6:
+            return offset, 6
+        return None, None
+
+    if linktype in (DLT_NULL, DLT_LOOP):
+        offset = 4
+    elif linktype == DLT_LINUX_SLL:
+        offset = 16
+    elif linktype == DLT_LINUX_SLL2:
+        offset = 20
+    elif linktype in (DLT_RAW, DLT_RAW_ALT, DLT_IPV4, DLT_IPV6):
+        offset = 0
+    else:
+        return None, None
+
+    if length <= offset:
+        return None, None
+    version = view[offset] >> 4
+    if version in (4, 6):
+        return offset, version
+    return None, None
+
+
+def parse_tcp_frame(frame, linktype=DLT_EN10MB):
+    """手工解析原始帧中的以太网/IP/TCP 头部，不构造 scapy 数据包
+
+    Args:
+        frame: 原始帧（bytes / bytearray / memoryview）
+        linktype: 链路层类型（DLT 编号）
+
+    Returns:
+        tuple: (源地址, 目的地址, 源端口, 目的端口, 序列号, TCP标志, 负载memoryview)，
+               地址为 4 或 16 字节的 bytes；非 TCP、分片或无负载时返回 None
+    """
+    try:
+        view = memoryview(frame)
+        offset, version = _network_offset(view, linktype)
+        if offset is None:
+            return None
+
+        if version == 4:
+            ver_ihl, total_length, frag, proto, src, dst = _unpack_ipv4(view, offset)
+            # 非 TCP 或非首个分片（后续分片没有 TCP 头）
+            if proto != IPPROTO_TCP or frag & 0x1FFF:
+                return None
+            header_length = (ver_ihl & 0x0F) << 2
+            # 本机发出的报文在网卡分段卸载时总长度可能为 0，此时以抓到的长度为准
+            end = offset + total_length if total_length >= header_length else len(view)
+            offset += header_length
+        else:
+            payload_length, next_header, src, dst = _unpack_ipv6(view, offset)
+            end = offset + 40 + payload_length
+            offset += 40
+            while next_header in IPV6_SKIPPABLE_HEADERS:
+                next_header = view[offset]
+                offset += (view[offset + 1] + 1) << 3
+            if next_header != IPPROTO_TCP:
+                return None
+
+        sport, dport, seq, data_offset, flags = _unpack_tcp(view, offset)
+        offset += (data_offset >> 4) << 2
+        # 以 IP 长度为准截掉以太网填充，同时不超过实际抓到的长度
+        end = min(end, len(view))
+        if end <= offset:
+            return None
+        return src, dst, sport, dport, seq, flags, view[offset:end]
+    except (struct.error, IndexError):
+        # 截断或畸形的报文
+        return None
+
+
+def format_address(address):
+    """将 4/16 字节地址格式化为字符串"""
+    if len(address) == 4:
+        return socket.inet_ntop(socket.AF_INET, address)
+    return socket.inet_ntop(socket.AF_INET6, address)
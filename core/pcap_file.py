@@ -0,0 +1,141 @@
+import struct
+
+from core.frame import DLT_EN10MB
+
+# pcap 文件头魔数（微秒 / 纳秒时间戳）
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+# pcapng 块类型
+PCAPNG_SECTION_HEADER = 0x0A0D0D0A
+PCAPNG_INTERFACE_DESCRIPTION = 0x00000001
+PCAPNG_PACKET = 0x00000002  # 已废弃的旧版报文块
+PCAPNG_SIMPLE_PACKET = 0x00000003
+PCAPNG_ENHANCED_PACKET = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_OPTION_TSRESOL = 9
+
+
+class PcapFormatError(ValueError):
+    """无法识别或已损坏的抓包文件"""
+
+
+def read_frames(path):
+    """逐个读取 pcap / pcapng 文件中的帧
+
+    Yields:
+        tuple: (时间戳秒, 链路层类型, 帧字节)
+    """
+    with open(path, "rb") as f:
+        head = f.read(4)
+        if len(head) < 4:
+            raise PcapFormatError(f"文件过短: {path}")
+        f.seek(0)
+        if struct.unpack("<I", head)[0] == PCAPNG_SECTION_HEADER:
+            yield from _read_pcapng(f)
+        else:
+            yield from _read_pcap(f)
+
+
+def _read_pcap(f):
+    """读取经典 pcap 格式"""
+    header = f.read(24)
+    if len(header) < 24:
+        raise PcapFormatError("pcap 文件头不完整")
+    for endian in ("<", ">"):
+        magic = struct.unpack(endian + "I", header[:4])[0]
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            break
+    else:
+        raise PcapFormatError("不是 pcap/pcapng 文件")
+
+    divisor = 1e9 if magic == PCAP_MAGIC_NS else 1e6
+    linktype = struct.unpack(endian + "I", header[20:24])[0] & 0x0FFFFFFF
+    record = struct.Struct(endian + "IIII")
+    while True:
+        record_header = f.read(16)
+        if len(record_header) < 16:
+            return
+        seconds, fraction, caplen, _ = record.unpack(record_header)
+        data = f.read(caplen)
+        if len(data) < caplen:
+            return  # 文件末尾被截断
+        yield seconds + fraction / divisor, linktype, data
+
+
+def _read_pcapng(f):
+    """读取 pcapng 格式（支持多个 section 和多个接口）"""
+    endian = "<"
+    interfaces = []  # [(链路层类型, 时间戳单位)]
+    while True:
+        block_head = f.read(8)
+        if len(block_head) < 8:
+            return
+        block_type = struct.unpack("<I", block_head[:4])[0]
+        if block_type == PCAPNG_SECTION_HEADER:
+            # 通过字节序魔数确定本 section 的字节序
+            byte_order = f.read(4)
+            endian = "<" if struct.unpack("<I", byte_order)[0] == PCAPNG_BYTE_ORDER_MAGIC else ">"
+            block_length = struct.unpack(endian + "I", block_head[4:8])[0]
+            body = byte_order + f.read(block_length - 12)
+            interfaces = []
+        else:
+            block_length = struct.unpack(endian + "I", block_head[4:8])[0]
+            if block_length < 12:
+                raise PcapFormatError("pcapng 块长度错误")
+            body = f.read(block_length - 8)
+        if len(body) < block_length - 8:
+            return  # 文件末尾被截断
+        body = body[:-4]  # 去掉尾部重复的块长度
+
+        if block_type == PCAPNG_INTERFACE_DESCRIPTION:
+            linktype = struct.unpack(endian + "H", body[:2])[0]
+            interfaces.append((linktype, _tsresol(body[8:], endian)))
+        elif block_type in (PCAPNG_ENHANCED_PACKET, PCAPNG_PACKET):
+            if block_type == PCAPNG_ENHANCED_PACKET:
+                interface_id, high, low, caplen = struct.unpack(endian + "IIII", body[:16])
+            else:
+                interface_id, _, high, low, caplen = struct.unpack(endian + "HHIII", body[:16])
+            linktype, resolution = interfaces[interface_id] if interface_id < len(interfaces) else (DLT_EN10MB, 1e-6)
+            yield ((high << 32) | low) * resolution, linktype, body[20:20 + caplen]
+        elif block_type == PCAPNG_SIMPLE_PACKET:
+            linktype = interfaces[0][0] if interfaces else DLT_EN10MB
+            yield 0.0, linktype, body[4:]
+
+
+def _tsresol(options, endian):
+    """解析接口描述块中的 if_tsresol 选项，默认微秒"""
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack(endian + "HH", options[offset:offset + 4])
+        if code == 0:
+            break
+        if code == PCAPNG_OPTION_TSRESOL and length >= 1:
+            value = options[offset + 4]
+            if value & 0x80:
+                return 2.0 ** -(value & 0x7F)
+            return 10.0 ** -value
+        offset += 4 + ((length + 3) & ~3)
+    return 1e-6
+
+
+def write_pcap(path, frames, linktype=DLT_EN10MB, start=0.0, interval=0.0):
+    """把帧写入经典 pcap 文件
+
+    Args:
+        frames: 帧字节的可迭代对象，或 (时间戳, 帧字节) 元组
+        start: 首个帧的时间戳（仅在 frames 不带时间戳时使用）
+        interval: 相邻帧的时间间隔（秒）
+    """
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", PCAP_MAGIC_US, 2, 4, 0, 0, 65535, linktype))
+        timestamp = start
+        for item in frames:
+            if isinstance(item, tuple):
+                timestamp, frame = item
+            else:
+                frame = item
+            # 先按微秒取整再拆分，避免微秒部分四舍五入为 1000000
+            seconds, micros = divmod(int(round(timestamp * 1e6)), 1000000)
+            f.write(struct.pack("<IIII", seconds, micros, len(frame), len(frame)))
+            f.write(frame)
+            timestamp += interval
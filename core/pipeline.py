@@ -0,0 +1,149 @@
+import threading
+from collections import deque
+
+# 队列满时的丢弃策略
+DROP_OLDEST = "drop_oldest"  # 丢弃队列中最旧的报文
+DROP_NON_RTMP = "drop_non_rtmp"  # 优先丢弃非 RTMP 报文，保住握手和命令报文
+DROP_POLICIES = (DROP_OLDEST, DROP_NON_RTMP)
+
+DEFAULT_CAPACITY = 4096
+# 检测线程每次从队列中取出的最大报文数
+TAKE_BATCH = 256
+# 队列为空时检测线程的等待超时（秒），同时决定停止检查的间隔
+WAIT_TIMEOUT = 0.2
+# drop_non_rtmp 策略下，为腾出位置最多向后查找的报文数
+PRIORITY_SCAN = 64
+
+
+class FramePipeline:
+    """抓包读取与检测之间的有界队列
+
+    读取线程只负责把报文放入队列，解析、重组、检测和回调都在独立的检测线程中完成，
+    检测偶尔变慢时只会让队列变长，不会让内核缓冲区溢出。队列满时按策略丢弃报文并计数。
+
+    统计满足：enqueued = processed + dropped + pending（停止时剩余的报文计入 discarded）。
+    """
+
+    def __init__(self, handler, capacity=DEFAULT_CAPACITY, policy=DROP_OLDEST, is_priority=None):
+        """
+        Args:
+            handler: 检测线程中处理单个报文的函数
+            capacity: 队列容量
+            policy: 队列满时的丢弃策略
+            is_priority: 判断报文是否为 RTMP 报文的函数，只在 drop_non_rtmp 策略下、队列满时调用
+        """
+        self.handler = handler
+        self.capacity = max(int(capacity), 1)
+        self.policy = policy if policy in DROP_POLICIES else DROP_OLDEST
+        self.is_priority = is_priority
+        self.queue = deque()
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.running = False
+        self.thread = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.dropped_rtmp = 0  # 被丢弃的 RTMP 报文（队列中全是 RTMP 报文时才会发生）
+        self.processed = 0
+        self.discarded = 0
+        self.high_watermark = 0
+
+    def start(self, name="capture_pipeline"):
+        """启动检测线程"""
+        self.running = True
+        self.thread = threading.Thread(target=self._consume, name=name, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def put(self, item):
+        """放入一个报文（读取线程调用）
+
+        Returns:
+            bool: 报文进入队列时返回 True，被丢弃时返回 False
+        """
+        with self.lock:
+            self.enqueued += 1
+            queue = self.queue
+            if len(queue) >= self.capacity and not self._make_room(item):
+                return False
+            queue.append(item)
+            if len(queue) > self.high_watermark:
+                self.high_watermark = len(queue)
+        return True
+
+    def _make_room(self, item):
+        """队列已满：按策略丢弃一个报文
+
+        Returns:
+            bool: 腾出位置时返回 True；新报文本身被丢弃时返回 False
+        """
+        queue = self.queue
+        self.dropped += 1
+        if self.policy == DROP_NON_RTMP and self.is_priority is not None:
+            if not self.is_priority(item):
+                return False  # 新报文是背景流量，直接丢弃
+            # 新报文是 RTMP 报文：丢弃最旧的一个背景报文
+            for index in range(min(len(queue), PRIORITY_SCAN)):
+                if not self.is_priority(queue[index]):
+                    del queue[index]
+                    return True
+            self.dropped_rtmp += 1
+        queue.popleft()
+        return True
+
+    def notify(self):
+        """唤醒检测线程（读取线程每读完一批报文调用一次）"""
+        self.ready.set()
+
+    def _consume(self):
+        queue = self.queue
+        while self.running:
+            with self.lock:
+                count = min(len(queue), TAKE_BATCH)
+                items = [queue.popleft() for _ in range(count)]
+                if not items:
+                    self.ready.clear()
+            if not items:
+                self.ready.wait(WAIT_TIMEOUT)
+                continue
+            for item in items:
+                if not self.running:
+                    # 停止后剩余的报文不再处理
+                    with self.lock:
+                        self.discarded += 1
+                    continue
+                self.handler(item)
+                self.processed += 1
+
+    def stop(self, timeout):
+        """停止检测线程，丢弃队列中剩余的报文
+
+        Returns:
+            bool: 线程已退出时返回 True
+        """
+        self.running = False
+        self.ready.set()
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            if thread.is_alive():
+                return False
+        with self.lock:
+            self.discarded += len(self.queue)
+            self.queue.clear()
+        return True
+
+    def stats(self):
+        """获取队列计数"""
+        with self.lock:
+            return {
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "dropped_rtmp": self.dropped_rtmp,
+                "processed": self.processed,
+                "discarded": self.discarded,
+                "pending": len(self.queue),
+                "high_watermark": self.high_watermark,
+                "capacity": self.capacity,
+                "policy": self.policy,
+            }
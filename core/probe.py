@@ -0,0 +1,153 @@
+import time
+
+from core.backend import ScapyBackend
+from core.capture_filter import CaptureFilter, FILTER_OFF, DEFAULT_RTMP_PORTS, set_nonblocking
+from core.frame import parse_tcp_frame, linktype_of
+
+# 探测的最长时间（秒）
+PROBE_DURATION = 3.0
+# 统计速率的最短窗口（秒）：所有接口都收到报文且超过该时间后提前结束
+PROBE_MIN_WINDOW = 1.0
+PROBE_SELECT_TIMEOUT = 0.1
+PROBE_READ_BATCH = 64
+RTMP_MARKERS = (b"rtmp://", b"connect", b"FCPublish")
+# RTMP 握手 C0（版本号 0x03）+ C1（1536 字节）
+RTMP_HANDSHAKE_SIZE = 1537
+
+
+def looks_like_rtmp(frame, linktype, ports=DEFAULT_RTMP_PORTS):
+    """粗略判断一个帧是否像 RTMP 流量：RTMP 端口、C0/C1 握手或命令字符串"""
+    segment = parse_tcp_frame(frame, linktype)
+    if segment is None:
+        return False
+    _, _, src_port, dst_port, _, _, payload = segment
+    if src_port in ports or dst_port in ports:
+        return True
+    if not payload:
+        return False
+    if len(payload) >= RTMP_HANDSHAKE_SIZE and payload[0] == 0x03:
+        return True
+    data = payload.tobytes()
+    return any(marker in data for marker in RTMP_MARKERS)
+
+
+def _new_result(interface):
+    return {
+        "interface": interface,
+        "usable": False,
+        "packets": 0,
+        "bytes": 0,
+        "pps": 0.0,
+        "bytes_per_sec": 0.0,
+        "rtmp_seen": False,
+        "first_packet_ms": None,
+        "error": None,
+    }
+
+
+def _rank_key(result):
+    """排序：可用优先，其次看到 RTMP 流量，再按包速率和字节速率"""
+    return (not result["usable"], not result["rtmp_seen"], -result["pps"], -result["bytes_per_sec"])
+
+
+def probe_interfaces(interfaces, logger, duration=PROBE_DURATION, min_window=PROBE_MIN_WINDOW, ports=None, backend=None):
+    """同时探测多个接口的流量
+
+    所有接口的句柄在同一个 select 循环中读取；每个接口收到第一个报文即判定可用，
+    之后只继续计数到 min_window 用于估算速率；所有接口都已可用时提前结束，
+    否则最多等待 duration 秒。
+
+    Args:
+        backend: 打开句柄的抓包后端，默认使用 scapy 后端
+
+    Returns:
+        list: 按推荐程度排序的探测结果，每项包含 interface、usable、packets、bytes、
+              pps、bytes_per_sec、rtmp_seen、first_packet_ms 和 error
+    """
+    from core.capture import LIFECYCLE
+
+    backend = backend or ScapyBackend()
+    ports = ports or DEFAULT_RTMP_PORTS
+    results = {interface: _new_result(interface) for interface in interfaces}
+    handles = {}
+    unfiltered = CaptureFilter(FILTER_OFF)
+    for interface in interfaces:
+        try:
+            sock, _ = backend.open(interface, unfiltered, logger)
+        except Exception as e:
+            results[interface]["error"] = str(e)
+            continue
+        LIFECYCLE.increment("handles_opened")
+        handles[sock] = interface
+
+    start = time.monotonic()
+    elapsed = 0.0
+    try:
+        if handles:
+            select = next(iter(handles)).select
+            batches = {sock: PROBE_READ_BATCH if set_nonblocking(sock) else 1 for sock in handles}
+            while True:
+                elapsed = time.monotonic() - start
+                if elapsed >= duration:
+                    break
+                if elapsed >= min_window and all(results[i]["usable"] for i in handles.values()):
+                    break
+                try:
+                    ready = select(list(handles), min(PROBE_SELECT_TIMEOUT, duration - elapsed))
+                except (OSError, ValueError):
+                    break
+                for sock in ready:
+                    _read_probe(sock, results[handles[sock]], batches[sock], start, ports)
+            elapsed = time.monotonic() - start
+    finally:
+        for sock in handles:
+            try:
+                sock.close()
+            except Exception:
+                pass
+            LIFECYCLE.increment("handles_closed")
+
+    for result in results.values():
+        if elapsed > 0:
+            result["pps"] = result["packets"] / elapsed
+            result["bytes_per_sec"] = result["bytes"] / elapsed
+    return sorted(results.values(), key=_rank_key)
+
+
+def _read_probe(sock, result, batch, start, ports):
+    """读取一个就绪句柄上的报文并计数"""
+    for _ in range(batch):
+        try:
+            layer, frame, _ = sock.recv_raw()
+        except BlockingIOError:
+            return
+        except Exception as e:
+            result["error"] = str(e)
+            return
+        if frame is None:
+            return
+        if not result["usable"]:
+            result["usable"] = True
+            result["first_packet_ms"] = (time.monotonic() - start) * 1000
+        result["packets"] += 1
+        result["bytes"] += len(frame)
+        if not result["rtmp_seen"] and looks_like_rtmp(frame, linktype_of(layer), ports):
+            result["rtmp_seen"] = True
+
+
+def format_probe_report(report):
+    """把探测结果格式化为日志文本行"""
+    lines = []
+    for rank, result in enumerate(report, 1):
+        if result["error"]:
+            lines.append(f"{rank}. {result['interface']}: 无法打开（{result['error']}）")
+            continue
+        if not result["usable"]:
+            lines.append(f"{rank}. {result['interface']}: 未检测到数据")
+            continue
+        rtmp = "，发现 RTMP 流量" if result["rtmp_seen"] else ""
+        lines.append(
+            f"{rank}. {result['interface']}: {result['pps']:.0f} 包/秒，"
+            f"{result['bytes_per_sec'] / 1024:.1f} KB/秒，首包 {result['first_packet_ms']:.0f} 毫秒{rtmp}"
+        )
+    return lines
@@ -0,0 +1,181 @@
+import time
+from collections import OrderedDict
+
+# TCP 标志位
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+
+_SEQ_MASK = 0xFFFFFFFF
+
+
+def _seq_diff(a, b):
+    """计算 a - b 的序列号差值，处理 32 位回绕"""
+    diff = (a - b) & _SEQ_MASK
+    return diff - 0x100000000 if diff & 0x80000000 else diff
+
+
+class _Flow:
+    """单个方向的 TCP 流状态"""
+
+    __slots__ = ("next_seq", "history", "pending", "pending_bytes", "last_seen")
+
+    def __init__(self, next_seq, now):
+        self.next_seq = next_seq
+        self.history = b""  # 最近的有序数据，用于跨报文匹配
+        self.pending = {}  # 乱序到达的报文 {seq: bytes}
+        self.pending_bytes = 0
+        self.last_seen = now
+
+
+class TcpReassembler:
+    """按流重组 TCP 字节流
+
+    每个流只保留最近 context 字节的有序数据和有限的乱序报文，
+    流数量超过 max_flows 时淘汰最久未活动的流，空闲超过 idle_timeout 的流会被清理，
+    因此无论背景流量多大，占用的内存都有上限。
+    """
+
+    def __init__(self, max_flows=512, context=1024, max_pending_bytes=65536, idle_timeout=30.0):
+        self.max_flows = max_flows
+        self.context = context
+        self.max_pending_bytes = max_pending_bytes
+        self.idle_timeout = idle_timeout
+        self.flows = OrderedDict()  # 按最近活动时间排序
+        self.stats = {
+            "evicted": 0,  # 因数量上限或空闲被淘汰的流
+            "retransmitted": 0,  # 完全重复的报文
+            "out_of_order": 0,  # 乱序到达并被缓存的报文
+            "gaps_skipped": 0,  # 缓存溢出后放弃等待的缺口
+        }
+
+    def feed(self, flow_key, seq, payload, flags=0, now=None, truncated=False):
+        """输入一个 TCP 报文
+
+        Args:
+            flow_key: 流标识（源地址, 源端口, 目的地址, 目的端口）
+            seq: TCP 序列号
+            payload: TCP 负载
+            flags: TCP 标志位
+            now: 当前时间（秒），默认取 time.monotonic()
+            truncated: 负载被 snaplen 截短
+
+        Returns:
+            bytes: 最近的有序上下文加上本次新增的连续数据，供命令匹配使用；
+                   报文为重复或乱序缓存时返回 None
+        """
+        if now is None:
+            now = time.monotonic()
+        flows = self.flows
+
+        if flags & (TCP_FIN | TCP_RST):
+            # 连接结束，不再需要保留状态
+            flow = flows.pop(flow_key, None)
+            window = bytes(payload)
+            if flow is not None and _seq_diff(seq, flow.next_seq) == 0:
+                window = flow.history + window
+            return window or None
+
+        flow = flows.get(flow_key)
+        if flow is None or flags & TCP_SYN:
+            if flags & TCP_SYN:
+                seq = (seq + 1) & _SEQ_MASK  # SYN 占用一个序列号
+            flow = _Flow(seq, now)
+            flows[flow_key] = flow
+            self._evict(now)
+        else:
+            flows.move_to_end(flow_key)
+            flow.last_seen = now
+
+        if not payload:
+            return None
+        if truncated:
+            # 截短报文之后的数据缺失，后续报文无法与它衔接：只检测本报文（有序时带上之前的上下文），
+            # 然后丢弃该流的状态，下一个报文作为新的起点
+            del flows[flow_key]
+            if _seq_diff(seq, flow.next_seq) == 0:
+                return flow.history + bytes(payload)
+            return bytes(payload)
+
+        offset = _seq_diff(flow.next_seq, seq)
+        if offset > 0:
+            # 与已接收的数据重叠：完全重复则丢弃，部分重叠则截掉重复部分
+            if offset >= len(payload):
+                self.stats["retransmitted"] += 1
+                return None
+            payload = payload[offset:]
+        elif offset < 0:
+            # 出现缺口，先缓存等待缺失的报文
+            return self._buffer_out_of_order(flow, seq, payload)
+
+        return self._append(flow, bytes(payload))
+
+    def _append(self, flow, data):
+        """追加有序数据，并合并已经连续的乱序报文"""
+        flow.next_seq = (flow.next_seq + len(data)) & _SEQ_MASK
+        while flow.pending:
+            segment = flow.pending.pop(flow.next_seq, None)
+            if segment is None:
+                if not self._trim_pending(flow):
+                    break
+                continue
+            flow.pending_bytes -= len(segment)
+            data += segment
+            flow.next_seq = (flow.next_seq + len(segment)) & _SEQ_MASK
+
+        window = flow.history + data
+        flow.history = window[-self.context:]
+        return window
+
+    def _trim_pending(self, flow):
+        """处理与已接收数据部分重叠的乱序报文，返回是否有可合并的报文"""
+        for pending_seq in list(flow.pending):
+            offset = _seq_diff(flow.next_seq, pending_seq)
+            if offset <= 0:
+                continue
+            segment = flow.pending.pop(pending_seq)
+            flow.pending_bytes -= len(segment)
+            if offset < len(segment):
+                flow.pending[flow.next_seq] = segment[offset:]
+                flow.pending_bytes += len(segment) - offset
+                return True
+        return False
+
+    def _buffer_out_of_order(self, flow, seq, payload):
+        """缓存乱序报文，超过上限时放弃缺口并从最早的缓存报文继续"""
+        if seq in flow.pending:
+            self.stats["retransmitted"] += 1
+            return None
+        data = bytes(payload)
+        flow.pending[seq] = data
+        flow.pending_bytes += len(data)
+        self.stats["out_of_order"] += 1
+        if flow.pending_bytes <= self.max_pending_bytes:
+            return None
+
+        # 缺失的报文可能已被内核丢弃，不再等待
+        self.stats["gaps_skipped"] += 1
+        earliest = min(flow.pending, key=lambda s: _seq_diff(s, flow.next_seq))
+        segment = flow.pending.pop(earliest)
+        flow.pending_bytes -= len(segment)
+        flow.next_seq = earliest
+        flow.history = b""
+        return self._append(flow, segment)
+
+    def _evict(self, now):
+        """淘汰空闲的流，以及超过数量上限时最久未活动的流"""
+        flows = self.flows
+        while flows:
+            flow_key, flow = next(iter(flows.items()))
+            if len(flows) <= self.max_flows and now - flow.last_seen < self.idle_timeout:
+                break
+            del flows[flow_key]
+            self.stats["evicted"] += 1
+
+    def clear(self):
+        """清空所有流"""
+        self.flows.clear()
+
+    def memory_bytes(self):
+        """估算当前缓存的数据量（字节）"""
+        return sum(len(flow.history) + flow.pending_bytes for flow in self.flows.values())
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+
+# RTMP 握手：C0/S0 为版本号 0x03，随后是 1536 字节的 C1/S1
+RTMP_VERSION = 0x03
+HANDSHAKE_SIZE = 1537
+# C0+C1 可能被 TCP 分段，第一个报文至少是一个最小 MSS
+MIN_HANDSHAKE_SEGMENT = 536
+# 等待服务端 S0 的客户端方向数量上限
+MAX_PENDING = 256
+# 已确认的连接、已完成检测的连接各自最多保留的数量，超出时淘汰最早的
+MAX_CONNECTIONS = 256
+# 已完成检测的连接上只检查是否出现新的发布命令（releaseStream / FCPublish / publish）
+PUBLISH_MARKER = b"ublish"
+
+# 识别到 RTMP 连接后的收窄方式
+NARROW_OFF = "off"  # 不收窄，所有报文都做重组和检测
+NARROW_WHITELIST = "whitelist"  # Python 侧只处理已识别的连接
+NARROW_BPF = "bpf"  # 在白名单基础上重新设置内核过滤器（后端不支持时只用白名单）
+NARROW_MODES = (NARROW_OFF, NARROW_WHITELIST, NARROW_BPF)
+
+# 只放行 TCP 负载第一个字节为 0x03 的报文，用于继续发现新的握手
+HANDSHAKE_FILTER = (
+    "((ip and tcp and tcp[((tcp[12]&0xf0)>>2)] = 3)"
+    " or (ip6 and ip6[6] = 6 and ip6[40 + ((ip6[52]&0xf0)>>2)] = 3))"
+)
+
+
+def is_handshake_start(payload):
+    """判断一个方向的第一个负载是否像 C0+C1 / S0+S1：版本号 0x03 且长度足够"""
+    return len(payload) >= MIN_HANDSHAKE_SEGMENT and payload[0] == RTMP_VERSION
+
+
+class RtmpFlowClassifier:
+    """根据握手识别任意端口上的 RTMP 连接，识别后只放行这些连接
+
+    单个 0x03 字节误判的概率不低，因此要求同一连接两个方向的第一个负载都是握手：
+    客户端先发出 C0+C1，服务端随后回复 S0+S1 时才确认。
+    确认之前放行所有报文；确认之后其他连接的报文直接跳过，不再重组和检测，
+    但新连接的第一个负载仍会检查，推流重连时可以被重新识别。
+    已检测到推流码的连接可以标记为完成（持续监控模式），之后只剩媒体数据，
+    只用一次子串查找检查是否在同一连接上重新发布。
+    连接结束（FIN / RST）时两个方向的状态都被删除；内核只放行带负载的报文时通常看不到
+    不带负载的 FIN / RST，所以已确认和已完成的连接都按 max_connections 淘汰最早的，状态不会无限增长。
+    同一接口只有一个检测线程，无需加锁。
+    """
+
+    def __init__(self, max_pending=MAX_PENDING, max_connections=MAX_CONNECTIONS):
+        self.max_pending = max_pending
+        self.max_connections = max_connections
+        self.pending = OrderedDict()  # 已发出 C0+C1、等待 S0 的客户端方向
+        self.flows = set()  # 已确认、仍需检测的连接（两个方向）
+        self.finished = OrderedDict()  # 已完成检测的连接（两个方向），按完成顺序排列
+        self.connections = OrderedDict()  # 已确认的连接，按客户端方向记录，按确认顺序排列
+        self.confirmed = 0  # 累计确认的连接数（包括已结束和已淘汰的）
+        self.latest = None  # 最近一次确认的连接（客户端方向）
+        self.narrowed = False
+        self.skipped = 0
+        # 需要检测的连接有变化，抓包线程据此重新设置内核过滤器
+        self.changed = False
+
+    def allow(self, flow_key, first_payload, payload):
+        """判断报文是否需要继续重组和检测
+
+        Args:
+            flow_key: (源地址, 源端口, 目的地址, 目的端口)
+            first_payload: 是否为该方向的第一个负载
+            payload: TCP 负载
+
+        Returns:
+            bool: 需要处理时返回 True
+        """
+        if flow_key in self.flows:
+            return True
+        if first_payload and is_handshake_start(payload):
+            self._observe_handshake(flow_key)
+            return True
+        if flow_key in self.finished and PUBLISH_MARKER in bytes(payload):
+            return True  # 同一连接上重新发布
+        if self.narrowed:
+            self.skipped += 1
+            return False
+        return True
+
+    def _observe_handshake(self, flow_key):
+        src_ip, src_port, dst_ip, dst_port = flow_key
+        reverse = (dst_ip, dst_port, src_ip, src_port)
+        if self.pending.pop(reverse, None) is not None:
+            # 对端已发出 C0+C1，本报文是 S0+S1
+            self.flows.add(flow_key)
+            self.flows.add(reverse)
+            self.connections[reverse] = True
+            self.confirmed += 1
+            self.latest = reverse
+            if len(self.connections) > self.max_connections:
+                self._forget(next(iter(self.connections)))
+            self.narrowed = True
+            self.changed = True
+            return
+        self.pending[flow_key] = True
+        if len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+
+    def finish(self, flow_key):
+        """把已检测到推流码的连接标记为完成，之后只对其做廉价的发布命令检查"""
+        src_ip, src_port, dst_ip, dst_port = flow_key
+        for key in (flow_key, (dst_ip, dst_port, src_ip, src_port)):
+            self.flows.discard(key)
+            self.finished[key] = True
+        # 两个方向各占一项
+        while len(self.finished) > self.max_connections * 2:
+            self.finished.popitem(last=False)
+        self.narrowed = True
+        self.changed = True
+
+    def close(self, flow_key):
+        """连接结束（FIN / RST）：删除两个方向的所有状态"""
+        self._forget(flow_key)
+
+    def _forget(self, flow_key):
+        src_ip, src_port, dst_ip, dst_port = flow_key
+        reverse = (dst_ip, dst_port, src_ip, src_port)
+        for key in (flow_key, reverse):
+            if key in self.flows:
+                self.flows.discard(key)
+                self.changed = True  # 内核过滤器中不再需要这个连接
+            self.finished.pop(key, None)
+            self.pending.pop(key, None)
+            self.connections.pop(key, None)
+
+    def narrow_expression(self, base_expression=None):
+        """生成只放行仍需检测的连接和新握手的 BPF 表达式，尚未收窄时返回 None
+
+        所有连接都已完成检测时只放行负载以 0x03 开头的报文：新连接的握手，
+        以及块流 ID 为 3 的命令消息（重新发布时的 FCPublish / publish）。
+
+        已完成的连接上的重新发布只能依靠 HANDSHAKE_FILTER 发现：报文必须以 fmt0 块头 0x03 开头。
+        推流端用 fmt1 / fmt2 块头（0x43 / 0x83）发送的发布命令会在内核中被丢弃，
+        这种情况只能靠推流端重新连接（新的握手）才能发现；需要可靠发现时使用白名单收窄（whitelist）。
+        """
+        if not self.narrowed:
+            return None
+        active = [connection for connection in self.connections if connection in self.flows]
+        expression = HANDSHAKE_FILTER
+        if active:
+            flows = " or ".join(
+                f"(host {src_ip} and host {dst_ip} and port {src_port} and port {dst_port})"
+                for src_ip, src_port, dst_ip, dst_port in active
+            )
+            expression = f"(tcp and ({flows})) or {HANDSHAKE_FILTER}"
+        if base_expression:
+            expression = f"{base_expression} and ({expression})"
+        return expression
@@ -0,0 +1,342 @@
+import struct
+
+from core.reassembly import _seq_diff
+
+# 客户端方向在块流之前是 C0+C1（1537 字节）和 C2（1536 字节）
+HANDSHAKE_BYTES = 1537 + 1536
+DEFAULT_CHUNK_SIZE = 128
+MAX_CHUNK_SIZE = 0xFFFFFF
+
+# 消息类型
+MSG_SET_CHUNK_SIZE = 1
+MSG_ABORT = 2
+MSG_AMF3_COMMAND = 17
+MSG_AMF0_COMMAND = 20
+MESSAGE_TYPES = frozenset((1, 2, 3, 4, 5, 6, 8, 9, 15, 16, 17, 18, 19, 20, 22))
+# 需要取出消息体的类型，其余（音视频、元数据等）按长度跳过
+COLLECTED_TYPES = frozenset((MSG_SET_CHUNK_SIZE, MSG_ABORT, MSG_AMF3_COMMAND, MSG_AMF0_COMMAND))
+# 命令消息的长度上限，超过时视为失去同步
+MAX_COMMAND_SIZE = 65536
+# 等待缺失报文时最多缓存的乱序报文数
+MAX_PENDING_SEGMENTS = 32
+# 每个接口同时解析的连接数上限
+MAX_PARSERS = 256
+
+# 块消息头长度（按 fmt 0~3）
+_HEADER_SIZES = (11, 7, 3, 0)
+_unpack_u16 = struct.Struct(">H").unpack_from
+_unpack_u32 = struct.Struct(">I").unpack_from
+_unpack_double = struct.Struct(">d").unpack_from
+
+# AMF0 类型标记
+AMF0_NUMBER = 0x00
+AMF0_BOOLEAN = 0x01
+AMF0_STRING = 0x02
+AMF0_OBJECT = 0x03
+AMF0_NULL = 0x05
+AMF0_UNDEFINED = 0x06
+AMF0_ECMA_ARRAY = 0x08
+AMF0_OBJECT_END = 0x09
+AMF0_STRICT_ARRAY = 0x0A
+AMF0_DATE = 0x0B
+AMF0_LONG_STRING = 0x0C
+
+
+class AmfError(ValueError):
+    """AMF0 数据不完整或格式错误"""
+
+
+def _read_utf8(data, offset, length):
+    end = offset + length
+    if end > len(data):
+        raise AmfError("字符串超出数据范围")
+    return bytes(data[offset:end]).decode("utf-8", errors="replace"), end
+
+
+def _decode_properties(data, offset):
+    """对象和 ECMA 数组的键值对，直到空键加对象结束标记"""
+    result = {}
+    while True:
+        if offset + 2 > len(data):
+            raise AmfError("对象没有结束标记")
+        length = _unpack_u16(data, offset)[0]
+        key, offset = _read_utf8(data, offset + 2, length)
+        if not length:
+            if offset >= len(data) or data[offset] != AMF0_OBJECT_END:
+                raise AmfError("对象结束标记错误")
+            return result, offset + 1
+        result[key], offset = decode_amf0(data, offset)
+
+
+def decode_amf0(data, offset=0):
+    """解码一个 AMF0 值
+
+    Returns:
+        tuple: (值, 下一个值的偏移)
+    """
+    if offset >= len(data):
+        raise AmfError("数据不完整")
+    marker = data[offset]
+    offset += 1
+    try:
+        if marker == AMF0_STRING:
+            return _read_utf8(data, offset + 2, _unpack_u16(data, offset)[0])
+        if marker == AMF0_NUMBER:
+            return _unpack_double(data, offset)[0], offset + 8
+        if marker == AMF0_OBJECT:
+            return _decode_properties(data, offset)
+        if marker in (AMF0_NULL, AMF0_UNDEFINED):
+            return None, offset
+        if marker == AMF0_BOOLEAN:
+            if offset >= len(data):
+                raise AmfError("数据不完整")
+            return data[offset] != 0, offset + 1
+        if marker == AMF0_ECMA_ARRAY:
+            return _decode_properties(data, offset + 4)
+        if marker == AMF0_STRICT_ARRAY:
+            count = _unpack_u32(data, offset)[0]
+            offset += 4
+            values = []
+            for _ in range(count):
+                value, offset = decode_amf0(data, offset)
+                values.append(value)
+            return values, offset
+        if marker == AMF0_DATE:
+            # 毫秒时间戳 + 2 字节时区
+            return _unpack_double(data, offset)[0], offset + 10
+        if marker == AMF0_LONG_STRING:
+            return _read_utf8(data, offset + 4, _unpack_u32(data, offset)[0])
+    except struct.error:
+        raise AmfError("数据不完整") from None
+    raise AmfError(f"不支持的 AMF0 类型 0x{marker:02x}")
+
+
+def decode_command(body):
+    """解码命令消息：命令名、事务 ID 和其余参数
+
+    Returns:
+        tuple: (命令名, 事务 ID, 参数列表)
+    """
+    name, offset = decode_amf0(body)
+    if not isinstance(name, str):
+        raise AmfError("命令名不是字符串")
+    transaction = None
+    values = []
+    if offset < len(body):
+        transaction, offset = decode_amf0(body, offset)
+    while offset < len(body):
+        value, offset = decode_amf0(body, offset)
+        values.append(value)
+    return name, transaction, values
+
+
+class _ChunkStream:
+    """一个块流 ID 上正在传输的消息"""
+
+    __slots__ = ("length", "type_id", "extended", "remaining", "body")
+
+    def __init__(self):
+        self.length = 0
+        self.type_id = 0
+        self.extended = False  # 上一个块头带扩展时间戳，fmt3 块头也会带
+        self.remaining = 0  # 当前消息还未到达的字节数
+        self.body = None  # 需要解码的消息体，其余类型为 None
+
+
+class RtmpCommandParser:
+    """增量解析客户端方向的 RTMP 块流，只解码命令消息
+
+    从 C0+C1 所在的第一个负载开始跟踪 TCP 序列号：跳过握手，之后逐个读取块头，
+    音视频等消息按块头中的长度直接跳过，不逐字节查找；只有命令消息和设置块大小消息
+    会取出消息体解码，从 connect 中得到 tcUrl / app，从 FCPublish / publish 中得到推流码。
+
+    无法继续跟踪时（缺失报文、块头不合法、命令无法解码）把 failed 置为 True，
+    调用方应改用重组加字节匹配的方式处理该连接。
+    """
+
+    def __init__(self, seq):
+        """
+        Args:
+            seq: C0 所在负载的 TCP 序列号
+        """
+        self.next_seq = seq
+        self.skip = HANDSHAKE_BYTES  # 需要跳过的字节数（握手或非命令消息的块数据）
+        self.collect = None  # 正在取出块数据的命令消息
+        self.collect_left = 0
+        self.partial = b""  # 不完整的块头
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        self.streams = {}
+        self.pending = {}  # 乱序到达的报文 {seq: bytes}
+        self.failed = False
+        self.tc_url = None
+        self.app = None
+        self.stream_name = None
+        self.commands = 0
+
+    def feed(self, seq, payload):
+        """输入一个 TCP 负载
+
+        Returns:
+            tuple: (本次解析到的推流地址 tcUrl 或 None, 本次解析到的推流码或 None)
+        """
+        if self.failed:
+            return None, None
+        offset = _seq_diff(self.next_seq, seq)
+        if offset > 0:
+            if offset >= len(payload):
+                return None, None  # 重传
+            payload = payload[offset:]
+        elif offset < 0:
+            if len(self.pending) >= MAX_PENDING_SEGMENTS:
+                self.failed = True
+            elif seq not in self.pending:
+                self.pending[seq] = bytes(payload)
+            return None, None
+
+        found = [None, None]
+        self._advance(payload, found)
+        while self.pending and not self.failed:
+            segment = self.pending.pop(self.next_seq, None)
+            if segment is None:
+                break
+            self._advance(segment, found)
+        return found[0], found[1]
+
+    def _advance(self, data, found):
+        self.next_seq = (self.next_seq + len(data)) & 0xFFFFFFFF
+        # 快速路径：整个报文都在要跳过的媒体数据中
+        if self.skip >= len(data):
+            self.skip -= len(data)
+            return
+        try:
+            self._parse(data, found)
+        except (AmfError, IndexError, struct.error):
+            self.failed = True
+
+    def _parse(self, data, found):
+        if self.partial:
+            data = self.partial + bytes(data)
+            self.partial = b""
+        position = 0
+        end = len(data)
+        while position < end and not self.failed:
+            if self.skip:
+                step = min(self.skip, end - position)
+                self.skip -= step
+                position += step
+                continue
+            if self.collect_left:
+                step = min(self.collect_left, end - position)
+                stream = self.collect
+                stream.body += data[position:position + step]
+                self.collect_left -= step
+                position += step
+                if not self.collect_left and not stream.remaining:
+                    self._complete(stream, found)
+                continue
+            header_end = self._read_header(data, position, end)
+            if header_end is None:
+                # 块头被 TCP 分段拆开，等待下一个报文
+                self.partial = bytes(data[position:end])
+                return
+            position = header_end
+
+    def _read_header(self, data, position, end):
+        """读取一个块头并设置随后的块数据如何处理，数据不足时返回 None"""
+        first = data[position]
+        fmt = first >> 6
+        csid = first & 0x3F
+        position += 1
+        if csid == 0:
+            if position + 1 > end:
+                return None
+            csid = data[position] + 64
+            position += 1
+        elif csid == 1:
+            if position + 2 > end:
+                return None
+            csid = data[position] + data[position + 1] * 256 + 64
+            position += 2
+        header_end = position + _HEADER_SIZES[fmt]
+        if header_end > end:
+            return None
+
+        stream = self.streams.get(csid)
+        if stream is None:
+            if fmt != 0:
+                # 没有见过的块流只能以 fmt0 开始
+                self.failed = True
+                return end
+            stream = self.streams[csid] = _ChunkStream()
+        if fmt < 3:
+            stream.extended = (
+                data[position] == 0xFF and data[position + 1] == 0xFF and data[position + 2] == 0xFF
+            )
+        if fmt < 2:
+            stream.length = (data[position + 3] << 16) | (data[position + 4] << 8) | data[position + 5]
+            stream.type_id = data[position + 6]
+            if stream.type_id not in MESSAGE_TYPES:
+                self.failed = True
+                return end
+            stream.remaining = 0  # fmt0 / fmt1 总是开始一个新消息
+        if stream.extended:
+            header_end += 4
+            if header_end > end:
+                return None
+
+        if not stream.remaining:
+            # 新消息
+            stream.remaining = stream.length
+            if stream.type_id in COLLECTED_TYPES:
+                if stream.length > MAX_COMMAND_SIZE:
+                    self.failed = True
+                    return end
+                stream.body = bytearray()
+            else:
+                stream.body = None
+            if not stream.length:
+                return header_end
+
+        size = min(self.chunk_size, stream.remaining)
+        stream.remaining -= size
+        if stream.body is None:
+            self.skip = size
+        else:
+            self.collect = stream
+            self.collect_left = size
+        return header_end
+
+    def _complete(self, stream, found):
+        """一个需要解码的消息已完整到达"""
+        body = stream.body
+        stream.body = None
+        type_id = stream.type_id
+        if type_id == MSG_SET_CHUNK_SIZE:
+            size = _unpack_u32(body, 0)[0] & 0x7FFFFFFF
+            if not 1 <= size <= MAX_CHUNK_SIZE:
+                self.failed = True
+                return
+            self.chunk_size = size
+            return
+        if type_id == MSG_ABORT:
+            aborted = self.streams.get(_unpack_u32(body, 0)[0])
+            if aborted is not None:
+                aborted.remaining = 0
+                aborted.body = None
+            return
+        if type_id == MSG_AMF3_COMMAND:
+            body = body[1:]  # AMF3 命令消息以一个格式字节开头，其后仍为 AMF0 编码
+        name, _, values = decode_command(body)
+        self.commands += 1
+        if name == "connect":
+            command = values[0] if values and isinstance(values[0], dict) else {}
+            app = command.get("app")
+            tc_url = command.get("tcUrl")
+            if isinstance(app, str):
+                self.app = app
+            if isinstance(tc_url, str) and tc_url:
+                self.tc_url = found[0] = tc_url
+        elif name in ("FCPublish", "publish"):
+            # 参数依次为命令对象（null）和流名称
+            if len(values) > 1 and isinstance(values[1], str) and values[1]:
+                self.stream_name = found[1] = values[1]
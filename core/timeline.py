@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import time
+
+# 一次捕获会话的阶段，按正常情况下发生的先后顺序排列
+STAGE_START = "start"  # 点击开始捕获
+STAGE_PROCESS_KILLED = "process_killed"  # 已尝试结束 MediaSDK_Server 进程
+STAGE_READY = "ready"  # 所有接口的句柄已就绪，开始读取报文
+STAGE_FIRST_PACKET = "first_packet"  # 任一接口送达第一个报文
+STAGE_RTMP_FLOW = "rtmp_flow"  # 识别到 RTMP 握手
+STAGE_SERVER_FOUND = "server_found"  # 找到推流地址
+STAGE_KEY_FOUND = "key_found"  # 找到推流码
+STAGE_CALLBACK = "callback"  # 界面收到完整结果
+STAGE_OBS_WRITTEN = "obs_written"  # OBS 推流配置（service.json）已写入
+STAGES = (
+    STAGE_START,
+    STAGE_PROCESS_KILLED,
+    STAGE_READY,
+    STAGE_FIRST_PACKET,
+    STAGE_RTMP_FLOW,
+    STAGE_SERVER_FOUND,
+    STAGE_KEY_FOUND,
+    STAGE_CALLBACK,
+    STAGE_OBS_WRITTEN,
+)
+STAGE_LABELS = {
+    STAGE_START: "开始",
+    STAGE_PROCESS_KILLED: "结束进程",
+    STAGE_READY: "抓包就绪",
+    STAGE_FIRST_PACKET: "首个报文",
+    STAGE_RTMP_FLOW: "RTMP 连接",
+    STAGE_SERVER_FOUND: "推流地址",
+    STAGE_KEY_FOUND: "推流码",
+    STAGE_CALLBACK: "界面回调",
+    STAGE_OBS_WRITTEN: "写入 OBS",
+}
+
+# 本地耗时历史：每行一次会话，只保留最近的 HISTORY_LIMIT 次
+HISTORY_FILE = os.path.expanduser("~/.douyin-rtmp/timeline.jsonl")
+HISTORY_LIMIT = 200
+
+
+class CaptureTimeline:
+    """一次捕获会话各阶段的时间点
+
+    时间取自 time.perf_counter：Windows（QueryPerformanceCounter）和 Linux（CLOCK_MONOTONIC）上
+    都是系统范围的时钟，抓包子进程上报的时间点可以直接比较。每个阶段只记录第一次，
+    抓包线程、检测线程和界面线程都可以直接调用 mark（dict.setdefault 是原子操作）。
+    """
+
+    def __init__(self, mode="packet"):
+        self.mode = mode  # packet 为抓包模式，log 为日志模式
+        self.wall = time.time()
+        self.started = time.perf_counter()
+        self.marks = {STAGE_START: self.started}
+
+    def mark(self, stage, at=None):
+        """记录阶段的时间点
+
+        Returns:
+            bool: 该阶段是第一次记录时返回 True
+        """
+        if stage in self.marks:
+            return False
+        self.marks.setdefault(stage, time.perf_counter() if at is None else at)
+        return True
+
+    def has(self, stage):
+        return stage in self.marks
+
+    def offsets(self):
+        """各阶段相对开始时间的毫秒数，按 STAGES 顺序"""
+        return {
+            stage: (self.marks[stage] - self.started) * 1000 for stage in STAGES if stage in self.marks
+        }
+
+    def to_record(self):
+        """导出为历史记录中的一行（开始的墙钟时间作为会话标识）"""
+        return {
+            "t": round(self.wall, 3),
+            "mode": self.mode,
+            "ms": {stage: round(offset, 1) for stage, offset in self.offsets().items()},
+        }
+
+
+def percentile(values, percent):
+    """最近秩法百分位，values 须已排序"""
+    if not values:
+        return None
+    index = max(math.ceil(len(values) * percent / 100) - 1, 0)
+    return values[index]
+
+
+def summarize(records, percents=(50, 90)):
+    """按阶段汇总历史记录
+
+    每个阶段统计两种耗时：total 为从开始到该阶段的毫秒数，step 为从上一个已记录阶段到该阶段的毫秒数
+    （用于判断哪个阶段最慢）。
+
+    Returns:
+        dict: {阶段: {"count": 次数, "total": {百分位: 毫秒}, "step": {百分位: 毫秒}}}，按 STAGES 顺序
+    """
+    totals = {stage: [] for stage in STAGES}
+    steps = {stage: [] for stage in STAGES}
+    for record in records:
+        offsets = record.get("ms") or {}
+        previous = None
+        for stage in STAGES:
+            offset = offsets.get(stage)
+            if offset is None:
+                continue
+            totals[stage].append(offset)
+            if previous is not None:
+                steps[stage].append(max(offset - previous, 0.0))
+            previous = offset
+    summary = {}
+    for stage in STAGES[1:]:
+        values = sorted(totals[stage])
+        if not values:
+            continue
+        step_values = sorted(steps[stage])
+        summary[stage] = {
+            "count": len(values),
+            "total": {percent: percentile(values, percent) for percent in percents},
+            "step": {percent: percentile(step_values, percent) for percent in percents},
+        }
+    return summary
+
+
+def format_summary_lines(records):
+    """把历史记录格式化为界面中的文本行（p50 / p90，单位毫秒）"""
+    summary = summarize(records)
+    if not summary:
+        return []
+    slowest = max(summary, key=lambda stage: summary[stage]["step"][50] or 0)
+    parts = []
+    for stage, item in summary.items():
+        text = f"{STAGE_LABELS[stage]} {item['total'][50]:.0f}/{item['total'][90]:.0f}"
+        if stage == slowest and item["step"][50]:
+            text += f"（最慢，+{item['step'][50]:.0f}）"
+        parts.append(text)
+    return [f"最近 {len(records)} 次，从开始计 p50/p90 毫秒: " + "，".join(parts)]
+
+
+class TimelineHistory:
+    """本地的捕获耗时历史（JSON Lines），同一会话再次保存时替换原来的一行"""
+
+    def __init__(self, path=HISTORY_FILE, limit=HISTORY_LIMIT):
+        self.path = path
+        self.limit = limit
+
+    def load(self):
+        """读取历史记录，损坏的行直接跳过"""
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict):
+                        records.append(record)
+        except OSError:
+            pass
+        return records[-self.limit:]
+
+    def save(self, timeline):
+        """保存（或更新）一次会话
+
+        Returns:
+            list: 保存后的全部历史记录，写入失败时返回 None
+        """
+        record = timeline.to_record()
+        records = [item for item in self.load() if item.get("t") != record["t"]]
+        records.append(record)
+        records = records[-self.limit:]
+        temp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for item in records:
+                    f.write(json.dumps(item, separators=(",", ":")) + "\n")
+            os.replace(temp_path, self.path)
+        except OSError:
+            return None
+        return records
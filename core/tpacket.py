@@ -0,0 +1,157 @@
+import mmap
+import select as select_module
+import socket
+import struct
+from collections import deque
+
+from core.frame import DLT_EN10MB, DLT_RAW
+
+# <linux/if_packet.h> / <linux/if_ether.h>
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+ETH_P_ALL = 0x0003
+# 没有链路层头部的设备（tun 等），帧直接从 IP 头开始
+ARPHRD_NONE = 0xFFFE
+
+# 环形缓冲区默认参数：32 个 1 MB 的块，块内报文按 16 字节对齐紧密排列
+DEFAULT_BLOCK_SIZE = 1 << 20
+DEFAULT_BLOCK_COUNT = 32
+DEFAULT_FRAME_SIZE = 2048
+# 块未写满时内核交给用户态的超时（毫秒），决定低流量时的最大延迟
+DEFAULT_BLOCK_TIMEOUT = 20
+
+# tpacket_req3: block_size, block_nr, frame_size, frame_nr, retire_blk_tov, sizeof_priv, feature_req_word
+_pack_req3 = struct.Struct("7I").pack
+# tpacket_block_desc: version, offset_to_priv, 然后是 tpacket_hdr_v1 的 block_status, num_pkts, offset_to_first_pkt
+_unpack_block = struct.Struct("8xIII").unpack_from
+BLOCK_STATUS_OFFSET = 8
+_pack_status = struct.Struct("I").pack_into
+# tpacket3_hdr: tp_next_offset, tp_sec, tp_nsec, tp_snaplen, tp_len, tp_status, tp_mac
+_unpack_packet = struct.Struct("I8xI8xH").unpack_from
+
+
+def select_handles(sockets, remain=None):
+    """等待多个句柄就绪（与 scapy SuperSocket.select 的约定相同）
+
+    TpacketRing 中已取出但尚未读完的报文不会让文件描述符可读，这些句柄直接视为就绪。
+    """
+    buffered = [sock for sock in sockets if getattr(sock, "frames", None)]
+    ready = select_module.select(sockets, [], [], 0 if buffered else remain)[0]
+    return buffered + [sock for sock in ready if sock not in buffered]
+
+
+class TpacketRing:
+    """Linux AF_PACKET + TPACKET_V3 内存映射环形缓冲区
+
+    内核把报文直接写入与用户态共享的块中，一个块写满或超时后整块交给用户态，
+    每个块只需要一次唤醒，不再为每个报文调用 recvfrom。读取时按块批量取出帧
+    （每个帧从共享内存中切出一份，之后立即把块还给内核），不构造 scapy 数据包。
+    """
+
+    nonblocking_socket = True  # 没有就绪的块时 recv_raw 立即返回空结果
+    select = staticmethod(select_handles)
+
+    def __init__(
+        self,
+        interface,
+        block_size=DEFAULT_BLOCK_SIZE,
+        block_count=DEFAULT_BLOCK_COUNT,
+        frame_size=DEFAULT_FRAME_SIZE,
+        block_timeout=DEFAULT_BLOCK_TIMEOUT,
+        snaplen=None,
+    ):
+        """
+        Args:
+            snaplen: 每个帧最多取出的字节数（内核仍把完整的帧写入环形缓冲区，只减少复制到 Python 的字节数），
+                     为空时取出完整的帧
+        """
+        self.interface = interface
+        self.snaplen = snaplen
+        self.block_size = block_size
+        self.block_count = block_count
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            sock.setsockopt(
+                SOL_PACKET,
+                PACKET_RX_RING,
+                _pack_req3(block_size, block_count, frame_size, block_size * block_count // frame_size, block_timeout, 0, 0),
+            )
+            self.ring = mmap.mmap(
+                sock.fileno(), block_size * block_count, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE
+            )
+            sock.bind((interface, ETH_P_ALL))
+        except Exception:
+            sock.close()
+            raise
+        # read_kernel_stats / set_nonblocking 通过 ins 识别 AF_PACKET 套接字
+        self.ins = sock
+        hatype = sock.getsockname()[3]
+        self.linktype = DLT_RAW if hatype == ARPHRD_NONE else DLT_EN10MB
+        self.block = 0
+        self.frames = deque()  # recv_raw 逐个读取时，已从块中取出的帧
+        self.blocks_read = 0
+
+    def fileno(self):
+        return self.ins.fileno()
+
+    def set_filter(self, expression):
+        """编译 BPF 表达式并挂到套接字上（需要 libpcap 或 tcpdump 编译表达式），失败时抛出异常"""
+        from scapy.arch.linux import attach_filter
+
+        attach_filter(self.ins, expression, self.interface)
+
+    def recv_block(self, limit=None):
+        """取出已就绪的块中的所有帧
+
+        Args:
+            limit: 取到这么多帧后不再取下一个块（当前块总是完整取出），为空时取完所有就绪的块
+
+        Returns:
+            list: 帧字节串，没有就绪的块时为空列表
+        """
+        ring = self.ring
+        block_size = self.block_size
+        limit_length = self.snaplen
+        frames = []
+        while limit is None or len(frames) < limit:
+            base = self.block * block_size
+            status, count, offset = _unpack_block(ring, base)
+            if not status & TP_STATUS_USER:
+                break
+            position = base + offset
+            for _ in range(count):
+                next_offset, snaplen, mac = _unpack_packet(ring, position)
+                if limit_length is not None and snaplen > limit_length:
+                    snaplen = limit_length
+                start = position + mac
+                frames.append(ring[start:start + snaplen])
+                position += next_offset
+            # 帧已复制出来，立即把块还给内核
+            _pack_status(ring, base + BLOCK_STATUS_OFFSET, TP_STATUS_KERNEL)
+            self.block = (self.block + 1) % self.block_count
+            self.blocks_read += 1
+        return frames
+
+    def recv_raw(self):
+        """逐个读取帧（与 scapy 句柄的 recv_raw 约定相同），链路层类型以 DLT 编号代替 scapy 类"""
+        frames = self.frames
+        if not frames:
+            frames.extend(self.recv_block(1))
+            if not frames:
+                return None, None, None
+        return self.linktype, frames.popleft(), None
+
+    def close(self):
+        """关闭套接字并解除内存映射（重复调用安全）"""
+        ring = self.ring
+        if ring is not None:
+            self.ring = None
+            try:
+                ring.close()
+            finally:
+                self.ins.close()
@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
-import requests
 import webbrowser
 from utils.config import GITHUB_CONFIG
 from utils.content_config import ADVERTISEMENT_TEXT
@@ -111,6 +110,8 @@ class AdPanel:
 
         def fetch_content():
             try:
+                import requests
+
                 response = requests.get(
                     "https://10.192.168101.xyz/ads",
                     timeout=5,
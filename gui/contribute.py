@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
 import json
-import requests
 from tkinter import messagebox
 
 class ContributeDialog:
@@ -103,6 +102,8 @@ class ContributeDialog:
     def load_contribute_data(self):
         """加载贡献数据"""
         try:
+            import requests
+
             response = requests.get(
                 "https://10.192.168101.xyz/contribute.json"
             )
@@ -1,26 +1,56 @@
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from functools import partial
+from tkinter import ttk, messagebox, filedialog
 from utils.network import NetworkInterface
-from core.capture import PacketCapture
 from core.log_capture import LogCapture
-import psutil
+from core.capture_stats import format_stats_lines
+from core.timeline import (
+    CaptureTimeline,
+    TimelineHistory,
+    format_summary_lines,
+    STAGE_PROCESS_KILLED,
+    STAGE_CALLBACK,
+    STAGE_OBS_WRITTEN,
+)
+from utils.event_bus import EVENTS, EVENT_DETECTED, EVENT_CHANGED, DISPATCH_LATEST
+
+# 数据包监控中流汇总的刷新间隔（毫秒）
+FLOW_REFRESH_INTERVAL = 1000
+
 
 class ControlPanel:
     def __init__(self, gui):
         self.gui = gui
         self.network_interface = NetworkInterface(self.gui.logger)
-        self.capture = PacketCapture(self.gui.logger)
-        self.capture.add_callback(self.update_stream_url)
+        # 抓包对象（以及 scapy）在第一次开始捕获或检测时才创建
+        self.capture = None
         self.log_capture = LogCapture(self.gui.logger)
-        self.log_capture.add_callback(self.update_stream_url)
+        # 抓包和日志监视线程只发布事件，由主线程定时批量更新界面
+        EVENTS.subscribe(EVENT_DETECTED, self.update_stream_url)
+        EVENTS.subscribe(EVENT_CHANGED, self.on_stream_changed, DISPATCH_LATEST)
+        self.log_capture.add_callback(partial(EVENTS.publish, EVENT_DETECTED))
 
         # 状态变量 - 移到frame创建之前
         self.is_capturing = False
         self.status_text = tk.StringVar(value="待开始")
         self.selected_interface = tk.StringVar()  # 确保在使用前初始化
-
+        # 下拉列表显示名称 -> 接口名称，顺序与下拉列表一致
+        self.interface_names = {}
+        self.stats_text = tk.StringVar(value="尚未开始抓包")
+        # 上一次刷新时的统计，用于计算当前包速率
+        self.last_capture_stats = None
+        self.last_stats_time = None
+        # 当前（最近一次）捕获会话的各阶段时间点，保存到本地历史后在界面中汇总为百分位
+        self.timeline = None
+        self.timeline_history = TimelineHistory()
+        self.timeline_text = tk.StringVar(value="暂无记录")
+        # 后台加载完抓包模块后才允许打开热备句柄（见 start_standby）
+        self.standby_allowed = False
+
+        # 网络接口列表由主窗口在窗口显示后加载
         self.frame = self.create_control_panel()
-        self.load_interfaces()
 
     def create_control_panel(self):
         """创建控制面板"""
@@ -38,6 +68,7 @@ class ControlPanel:
             frame, textvariable=self.selected_interface, state="readonly", width=50
         )
         self.interface_combo.grid(row=0, column=1, columnspan=1, sticky=(tk.W, tk.E), padx=5)
+        self.interface_combo.bind("<<ComboboxSelected>>", lambda event: self.update_standby())
 
         # 刷新按钮
         self.refresh_btn = ttk.Button(
@@ -84,6 +115,28 @@ class ControlPanel:
         )
         self.file_mode_check.pack(side=tk.LEFT)
 
+        # 独立进程抓包复选框
+        self.process_mode = tk.BooleanVar(value=False)
+        self.load_process_mode_config()
+        self.process_mode_check = ttk.Checkbutton(
+            button_frame,
+            text="独立进程抓包",
+            variable=self.process_mode,
+            command=self.process_mode_changed,
+        )
+        self.process_mode_check.pack(side=tk.LEFT)
+
+        # 持续监控复选框
+        self.monitor_mode = tk.BooleanVar(value=False)
+        self.load_monitor_mode_config()
+        self.monitor_mode_check = ttk.Checkbutton(
+            button_frame,
+            text="持续监控",
+            variable=self.monitor_mode,
+            command=self.monitor_mode_changed,
+        )
+        self.monitor_mode_check.pack(side=tk.LEFT)
+
         # 服务器地址显示（第三行）
         ttk.Label(frame, text="推流服务器:").grid(
             row=2, column=0, sticky=tk.W, pady=5, padx=5
@@ -124,14 +177,50 @@ class ControlPanel:
             width=8,
         ).pack(side=tk.LEFT, padx=2)
 
+        # 抓包统计（第五行）
+        ttk.Label(frame, text="抓包统计:").grid(
+            row=4, column=0, sticky=(tk.W, tk.N), pady=5, padx=5
+        )
+        ttk.Label(
+            frame, textvariable=self.stats_text, justify=tk.LEFT, wraplength=520
+        ).grid(row=4, column=1, sticky=(tk.W, tk.E), padx=5)
+        ttk.Button(
+            frame, text="导出统计", command=self.export_capture_stats, width=8
+        ).grid(row=4, column=2, padx=5, sticky=tk.N)
+
+        # 捕获耗时（第六行）
+        ttk.Label(frame, text="捕获耗时:").grid(
+            row=5, column=0, sticky=(tk.W, tk.N), pady=5, padx=5
+        )
+        ttk.Label(
+            frame, textvariable=self.timeline_text, justify=tk.LEFT, wraplength=520
+        ).grid(row=5, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=5)
+        self.refresh_timeline_summary()
+
         return frame
 
-    def load_interfaces(self):
-        """加载网络接口列表"""
+    def load_interfaces(self, force=False, on_loaded=None):
+        """在后台线程中加载网络接口列表，完成后在主线程中更新下拉列表
+
+        查询系统接口会导入 scapy.arch.windows，与启动时的后台预加载争用导入锁，
+        放在界面线程中会让刚显示的窗口卡住。
+
+        Args:
+            force: 为 True 时忽略接口缓存重新查询系统
+            on_loaded: 更新下拉列表后在主线程中调用
+        """
         self.gui.log_to_console("\n正在加载网络接口列表...")
 
-        result = self.network_interface.load_interfaces()
+        def query():
+            result = self.network_interface.load_interfaces(force=force)
+            EVENTS.call(self.show_interfaces, result, on_loaded)
+
+        threading.Thread(target=query, daemon=True).start()
+
+    def show_interfaces(self, result, on_loaded=None):
+        """把查询到的接口填入下拉列表并选择默认接口（主线程）"""
         interfaces = result["interfaces"]
+        self.interface_names = dict(zip(interfaces, result["names"]))
 
         if interfaces:
             # 更新下拉列表
@@ -149,12 +238,15 @@ class ControlPanel:
             self.gui.log_to_console(f"其中活动接口 {result['active_count']} 个")
         else:
             self.gui.log_to_console("未找到可用的网络接口")
+        # 预加载先于接口列表完成时，热备句柄要等接口就绪后才能打开
+        self.update_standby()
+        if on_loaded is not None:
+            on_loaded()
 
     def refresh_interfaces(self):
         """刷新网络接口列表"""
         self.gui.log_to_console("\n正在刷新网络接口列表...")
-        self.load_interfaces()
-        self.gui.log_to_console("网络接口列表刷新完成")
+        self.load_interfaces(force=True, on_loaded=lambda: self.gui.log_to_console("网络接口列表刷新完成"))
 
     def toggle_capture(self):
         """切换捕获状态"""
@@ -171,10 +263,11 @@ class ControlPanel:
             self.is_capturing = True
             self.capture_btn.configure(text="停止捕获")
             self.interface_combo.configure(state=tk.DISABLED)
-            self.status_text.set("正在捕获")
+            self.status_text.set("正在监控" if self.monitor_mode.get() and not self.file_mode.get() else "正在捕获")
 
             # 清空原有推流地址和推流码
             self.update_stream_url("", "")
+            self.timeline = CaptureTimeline("log" if self.file_mode.get() else "packet")
 
             if self.file_mode.get():
                 # 启动日志模式抓取推流码
@@ -184,32 +277,33 @@ class ControlPanel:
                 self.gui.log_to_console("已开启抓包模式抓取推流")
                 # 结束 MediaSDK_Server 进程
                 try:
+                    import psutil
+
                     for proc in psutil.process_iter(['name']):
                         if proc.info['name'] == 'MediaSDK_Server.exe':
                             proc.kill()
                             self.gui.log_to_console("已终止 MediaSDK_Server 进程")
                 except Exception as e:
                     self.gui.log_to_console(f"（可忽略该报错）尝试终止 MediaSDK_Server 进程时出错: {str(e)}")
+                self.timeline.mark(STAGE_PROCESS_KILLED)
 
                 if self.listening_all.get():
-                    # 获取所有接口的实际名称
-                    selected_interfaces = []
-                    for iface_display in self.interface_combo['values']:
-                        # 从显示名称中提取实际的接口名称
-                        actual_name = iface_display.split(" [")[0].strip()
-                        selected_interfaces.append(actual_name)
                     # 启动多接口捕获
-                    self.capture.start_multi(selected_interfaces)
+                    self.ensure_packet_capture()
+                    self.capture.timeline = self.timeline
+                    self.capture.start_multi(list(self.interface_names.values()))
                 else:
                     # 获取选中接口的实际名称
-                    selected_display = self.selected_interface.get()
-                    if not selected_display:
+                    actual_name = self.interface_names.get(self.selected_interface.get())
+                    if not actual_name:
                         messagebox.showerror("错误", "请先选择网络接口")
                         return
-                    # 从显示名称中提取实际的接口名称
-                    actual_name = selected_display.split(" [")[0].strip()
                     # 启动单接口捕获
+                    self.ensure_packet_capture()
+                    self.capture.timeline = self.timeline
                     self.capture.start(actual_name)
+                self.last_capture_stats = None
+                self.gui.root.after(FLOW_REFRESH_INTERVAL, self.refresh_flow_summary)
         else:
             self.is_capturing = False
             self.capture_btn.configure(text="开始捕获")
@@ -221,9 +315,58 @@ class ControlPanel:
             else:
                 self.gui.log_to_console("已停止抓包模式抓取推流")
                 self.capture.stop()
+                self.refresh_capture_stats()
+            self.save_timeline()
             
             
 
+    def refresh_flow_summary(self):
+        """定期刷新数据包监控中的流汇总和抓包统计，界面开销只与流数量有关"""
+        lines = self.capture.get_flow_summary()
+        if lines:
+            self.gui.logger.packet_summary(lines)
+        self.refresh_capture_stats()
+        if self.is_capturing and self.capture.is_capturing:
+            self.gui.root.after(FLOW_REFRESH_INTERVAL, self.refresh_flow_summary)
+
+    def refresh_capture_stats(self):
+        """刷新抓包统计面板"""
+        stats = self.capture.get_capture_stats()
+        now = time.monotonic()
+        interval = now - self.last_stats_time if self.last_capture_stats else None
+        lines = format_stats_lines(stats, self.last_capture_stats, interval)
+        pipeline = self.capture.get_pipeline_stats()
+        if pipeline:
+            lines.append(
+                f"检测队列: 入队 {pipeline['enqueued']}，丢弃 {pipeline['dropped']}，"
+                f"积压 {pipeline['pending']}/{pipeline['capacity']}"
+            )
+        latency = self.capture.start_latency
+        if latency:
+            lines.append(
+                f"抓包就绪: {latency['seconds'] * 1000:.1f} 毫秒（热备句柄 {latency['standby']}/{latency['handles']}）"
+            )
+        self.stats_text.set("\n".join(lines) if lines else "暂无数据")
+        self.last_capture_stats = stats
+        self.last_stats_time = now
+
+    def export_capture_stats(self):
+        """把抓包统计导出为 JSON 文件，便于反馈问题"""
+        path = filedialog.asksaveasfilename(
+            title="导出抓包统计",
+            defaultextension=".json",
+            initialfile=f"capture_stats_{time.strftime('%Y%m%d_%H%M%S')}.json",
+            filetypes=[("JSON 文件", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            self.ensure_packet_capture()
+            self.capture.dump_stats(path)
+            self.gui.log_to_console(f"抓包统计已导出到: {path}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出抓包统计失败: {str(e)}")
+
     def copy_to_clipboard(self, text):
         """复制内容到剪贴板"""
         if not text.strip():
@@ -252,6 +395,7 @@ class ControlPanel:
 
         # 如果获取到了地址和推流码，更新界面状态
         if server_address and stream_code:
+            self.mark_timeline(STAGE_CALLBACK)
             self.is_capturing = False
             self.capture_btn.configure(text="开始捕获")
             self.on_listening_changed()  # 重置接口选择状态
@@ -259,6 +403,8 @@ class ControlPanel:
 
     def check_douyin_live_running(self):
         """检查抖音直播伴侣是否正在运行"""
+        import psutil
+
         for proc in psutil.process_iter(["name", "cmdline"]):
             try:
                 # 检查进程名和命令行参数
@@ -313,10 +459,129 @@ class ControlPanel:
         """文件模式改变时的回调"""
         from utils.config import set_config
         set_config("file_mode", self.file_mode.get())
+        self.update_standby()
+
+    def select_best_interface(self, report):
+        """根据探测报告预先选中排名第一的可用接口
+
+        监听所有接口时下拉列表不可用，选中的接口不会生效，因此同时切换为单接口捕获。
+        """
+        if not report or not report[0]["usable"]:
+            return
+        best = report[0]["interface"]
+        for iface_display, name in self.interface_names.items():
+            if name == best:
+                self.selected_interface.set(iface_display)
+                if self.listening_all.get():
+                    self.listening_all.set(False)
+                    self.on_listening_changed()
+                    self.gui.log_to_console(f"已根据探测结果切换为单接口捕获，选择接口: {iface_display}")
+                else:
+                    self.update_standby()
+                    self.gui.log_to_console(f"已根据探测结果选择接口: {iface_display}")
+                return
+
+    def ensure_packet_capture(self):
+        """第一次用到时创建抓包对象（后台预加载尚未完成时会等待 scapy 加载完毕）"""
+        if self.capture is None:
+            self.create_packet_capture()
+
+    def create_packet_capture(self):
+        """按配置的隔离模式（线程/子进程）创建抓包对象"""
+        from core.capture_worker import create_capture
+
+        self.capture = create_capture(self.gui.logger)
+        self.capture.add_callback(partial(EVENTS.publish, EVENT_DETECTED))
+        self.capture.add_change_callback(partial(EVENTS.publish, EVENT_CHANGED))
+
+    def on_stream_changed(self, server_address, stream_code):
+        """持续监控模式下推流信息变化的回调：只更新显示，不停止抓包"""
+        self.gui.server_address.set(server_address)
+        self.gui.stream_code.set(stream_code)
+        self.gui.log_to_console("推流信息已更新，继续监控中")
+        self.mark_timeline(STAGE_CALLBACK)
+
+    def start_standby(self):
+        """抓包模块加载完成后由主窗口调用，按配置开始准备热备句柄"""
+        self.standby_allowed = True
+        self.update_standby()
+
+    def update_standby(self):
+        """配置了 capture_standby 时在后台为将要抓包的接口打开热备句柄，未配置时关闭热备
+
+        热备句柄挂着不放行任何报文的过滤器，开始捕获时只需换上抓包过滤器即可读取。
+        """
+        from utils.config import get_config
+
+        if not self.standby_allowed or self.is_capturing:
+            return
+        if not get_config("capture_standby") or self.file_mode.get():
+            if self.capture is not None:
+                self.capture.disable_standby()
+            return
+        if self.listening_all.get():
+            interfaces = list(self.interface_names.values())
+        else:
+            interfaces = [name for name in (self.interface_names.get(self.selected_interface.get()),) if name]
+        self.ensure_packet_capture()
+        self.capture.enable_standby(interfaces)
+
+    def on_obs_written(self):
+        """OBS 推流配置写入后的回调：记为最近一次已获取到结果的会话的最后阶段"""
+        if self.timeline is not None and self.timeline.has(STAGE_CALLBACK):
+            self.mark_timeline(STAGE_OBS_WRITTEN)
+
+    def mark_timeline(self, stage):
+        """在当前会话的时间线上记录阶段，第一次记录时保存到本地历史"""
+        if self.timeline is not None and self.timeline.mark(stage):
+            self.save_timeline()
+
+    def save_timeline(self):
+        """保存当前会话并刷新捕获耗时汇总"""
+        if self.timeline is None:
+            return
+        records = self.timeline_history.save(self.timeline)
+        if records is not None:
+            self.show_timeline_summary(records)
+
+    def refresh_timeline_summary(self):
+        """从本地历史加载捕获耗时汇总"""
+        self.show_timeline_summary(self.timeline_history.load())
+
+    def show_timeline_summary(self, records):
+        lines = format_summary_lines(records)
+        self.timeline_text.set("\n".join(lines) if lines else "暂无记录")
+
+    def load_monitor_mode_config(self):
+        """加载持续监控配置"""
+        from utils.config import get_config
+        self.monitor_mode.set(bool(get_config("capture_monitor")))
+
+    def monitor_mode_changed(self):
+        """持续监控设置改变时的回调，下次开始捕获时生效"""
+        from utils.config import set_config
+        set_config("capture_monitor", self.monitor_mode.get())
+
+    def load_process_mode_config(self):
+        """加载抓包隔离模式配置"""
+        from utils.config import get_config
+        from core.capture_worker import ISOLATION_PROCESS
+        self.process_mode.set(get_config("capture_isolation") == ISOLATION_PROCESS)
+
+    def process_mode_changed(self):
+        """抓包隔离模式改变时的回调，下次开始捕获时生效"""
+        from utils.config import set_config
+        from core.capture_worker import ISOLATION_PROCESS, ISOLATION_THREAD
+        set_config("capture_isolation", ISOLATION_PROCESS if self.process_mode.get() else ISOLATION_THREAD)
+        if not self.is_capturing and self.capture is not None and not self.capture.is_capturing:
+            self.capture.disable_standby()
+            self.create_packet_capture()
+            self.update_standby()
 
     def on_listening_changed(self):
         """监听设置改变时的回调"""
         self.save_listening_config()
+        self.update_standby()
 
         # 根据监听所有接口的状态设置接口选择和刷新按钮的状态
         if self.listening_all.get():
@@ -350,10 +615,11 @@ class ControlPanel:
         self.capture_btn.configure(state="disabled")
         self.gui.log_to_console("\n开始检测接口...")
 
-        def on_test_complete(has_data):
+        def on_test_complete(has_data, report=None):
             self.status_text.set("待开始")
             self.test_btn.configure(state="normal")
             self.capture_btn.configure(state="normal")
+            self.select_best_interface(report)
             if has_data:
                 messagebox.showinfo("检测结果", "接口可用，已检测到数据流。工具可正常使用，如果不能捕获到推流码，请检查本地是否开了过多软件（如浏览器看直播、视频等），或请尝试勾选日志模式后抓取推流信息。")
             else:
@@ -361,17 +627,14 @@ class ControlPanel:
 
         # 获取要测试的接口
         if self.listening_all.get():
-            selected_interfaces = []
-            for iface_display in self.interface_combo['values']:
-                actual_name = iface_display.split(" [")[0].strip()
-                selected_interfaces.append(actual_name)
             # 启动多接口测试
-            self.capture.test_capture(selected_interfaces, on_test_complete)
+            self.ensure_packet_capture()
+            self.capture.test_capture(list(self.interface_names.values()), partial(EVENTS.call, on_test_complete))
         else:
-            selected_display = self.selected_interface.get()
-            if not selected_display:
+            actual_name = self.interface_names.get(self.selected_interface.get())
+            if not actual_name:
                 messagebox.showerror("错误", "请先选择网络接口")
                 return
-            actual_name = selected_display.split(" [")[0].strip()
             # 启动单接口测试
-            self.capture.test_capture([actual_name], on_test_complete)
+            self.ensure_packet_capture()
+            self.capture.test_capture([actual_name], partial(EVENTS.call, on_test_complete))
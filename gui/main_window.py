@@ -2,7 +2,6 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import webbrowser
 import sys
-from scapy.arch.windows import get_windows_if_list
 from core.npcap import NpcapManager
 from utils.logger import Logger
 from utils.network import NetworkInterface
@@ -22,7 +21,11 @@ from utils.resource import resource_path
 from utils.config import get_config, set_config
 from gui.contribute import ContributeDialog
 import json
-import requests
+from utils.preload import PRELOADER
+from utils.event_bus import EVENTS
+
+# 检查后台预加载是否完成的间隔（毫秒）
+PRELOAD_CHECK_INTERVAL = 200
 
 
 class StreamCaptureGUI:
@@ -41,8 +44,9 @@ class StreamCaptureGUI:
         except tk.TclError:
             print("无法加载图标文件")
 
-        # 初始化基础组件
-        self.logger = Logger()
+        # 初始化基础组件：其他线程的日志和抓包结果经事件总线交给主线程批量处理
+        EVENTS.attach(self.root)
+        self.logger = Logger(EVENTS)
 
         # 创建主框架
         self.main_frame = ttk.Frame(self.root, padding="10")
@@ -65,9 +69,26 @@ class StreamCaptureGUI:
             self.check_and_install_npcap()
             sys.exit(1)
 
+        # 窗口已显示：在后台加载 scapy 和抓包引擎，同时在另一个后台线程中加载网络接口列表
+        PRELOADER.start()
+        self.control_panel.load_interfaces()
+        self.root.after(PRELOAD_CHECK_INTERVAL, self.check_preload)
+
         # 检查更新
         self.root.after(1000, self.async_check_updates)
 
+    def check_preload(self):
+        """后台预加载完成后记录耗时"""
+        if not PRELOADER.done.is_set():
+            self.root.after(PRELOAD_CHECK_INTERVAL, self.check_preload)
+            return
+        if PRELOADER.error is not None:
+            self.logger.error(PRELOADER.summary())
+        else:
+            self.logger.info(PRELOADER.summary())
+            # 配置了热备时在后台为将要抓包的接口打开句柄
+            self.control_panel.start_standby()
+
     def setup_basic_ui(self):
         # 设置网格权重
         self.root.grid_rowconfigure(0, weight=1)
@@ -309,6 +330,8 @@ class StreamCaptureGUI:
 
     def get_helper_center_url(self):
         """获取帮助中心URL"""
+        import requests
+
         try:
             response = requests.get("https://10.192.168101.xyz/helper.json")
             data = response.json()
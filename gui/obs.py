@@ -4,8 +4,6 @@ import os
 import json
 from utils.config import load_obs_config
 from utils.content_config import OBS_HELP_TEXT
-import psutil
-from utils.process import ProcessThreadManager
 
 
 class OBSPanel:
@@ -30,6 +28,7 @@ class OBSPanel:
 
         self.obs_utils = OBSUtils()
         self.obs_utils.set_logger(self.logger)
+        self.obs_utils.set_config_written_callback(self.parent.control_panel.on_obs_written)
 
         # 添加自动初始化
         self.auto_initialize()
@@ -140,6 +139,8 @@ class OBSPanel:
         self.logger.info("开始处理重连问题...")
         
         try:
+            from utils.process import ProcessThreadManager
+
             # 创建进程管理器实例
             process_manager = ProcessThreadManager()
             # 设置日志器
@@ -165,6 +166,8 @@ class OBSPanel:
         
     def kill_media_sdk_server(self):
         self.logger.info("正在清除一键解决重连...")
+        from utils.process import ProcessThreadManager
+
         process_manager = ProcessThreadManager()
         process_manager.kill_process_by_name("MediaSDK_Server.exe")
         self.logger.info("一键解决重连状态已清除")
@@ -1,3 +1,4 @@
+import multiprocessing
 import tkinter as tk
 from tkinter import messagebox
 from gui.main_window import StreamCaptureGUI
@@ -14,4 +15,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # 打包后的程序以子进程方式抓包时需要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
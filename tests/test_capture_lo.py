@@ -0,0 +1,85 @@
+"""在 Linux 回环接口上走一遍真实的开始捕获流程（接口解析、打开句柄、检测）
+
+不替换接口查询，需要 Linux 和 root 权限，其他环境跳过。
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or os.geteuid() != 0, reason="需要 Linux 和 root 权限"
+)
+
+SERVER_PORT = 19351
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.errors = []
+
+    def info(self, message):
+        pass
+
+    def error(self, message):
+        self.errors.append(message)
+
+    def packet(self, message):
+        pass
+
+
+def serve_once(server):
+    """模拟推流服务器：完成握手后读到连接关闭为止"""
+    conn, _ = server.accept()
+    with conn:
+        conn.recv(1537, socket.MSG_WAITALL)
+        conn.sendall(b"\x03" + os.urandom(3072))
+        while conn.recv(65536):
+            pass
+
+
+def test_start_on_loopback_detects_stream():
+    from core.capture import PacketCapture
+    from traffic import DEFAULT_SERVER, DEFAULT_STREAM_KEY, rtmp_publish_session
+
+    logger = RecordingLogger()
+    capture = PacketCapture(logger)
+    detected = threading.Event()
+    results = []
+    capture.add_callback(lambda server, key: (results.append((server, key)), detected.set()))
+
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", SERVER_PORT))
+    server.listen()
+    threading.Thread(target=serve_once, args=(server,), daemon=True).start()
+    try:
+        capture.start("lo")
+        assert capture.is_capturing, logger.errors
+        assert list(capture.interface_status) == ["lo"]
+        time.sleep(0.5)
+
+        session = rtmp_publish_session(DEFAULT_SERVER, DEFAULT_STREAM_KEY)
+        with socket.create_connection(("127.0.0.1", SERVER_PORT)) as client:
+            client.sendall(session[0])
+            client.recv(3073, socket.MSG_WAITALL)
+            for packet in session[1:]:
+                client.sendall(packet)
+                time.sleep(0.05)
+            assert detected.wait(10), logger.errors
+    finally:
+        capture.stop()
+        server.close()
+
+    assert results == [(DEFAULT_SERVER, DEFAULT_STREAM_KEY)]
+    thread = capture.capture_thread
+    if thread is not None:
+        thread.join(5)
+        assert not thread.is_alive()
@@ -0,0 +1,143 @@
+import threading
+import traceback
+from collections import deque
+
+# 事件类型
+EVENT_DETECTED = "detected"  # 获取到推流地址和推流码，参数为 (推流地址, 推流码)
+EVENT_CHANGED = "changed"  # 持续监控中推流信息变化，参数为 (推流地址, 推流码)
+EVENT_LOG = "log"  # 日志行，参数为 (级别, 消息)
+EVENT_CALL = "call"  # 在主线程中执行的函数，参数为 (函数, 参数元组)
+
+# 分发方式
+DISPATCH_EACH = "each"  # 每个事件调用一次处理函数
+DISPATCH_LATEST = "latest"  # 每批只用最后一个事件调用一次（只关心最新值）
+DISPATCH_BATCH = "batch"  # 每批调用一次，参数为该类型所有事件参数的列表
+
+# Tk 主线程取出事件的间隔（毫秒）
+DRAIN_INTERVAL = 250
+# 队列中最多积压的事件数，超过后丢弃新的日志事件（其他事件总是保留）
+MAX_PENDING = 10000
+
+
+class EventBus:
+    """线程安全的事件总线
+
+    抓包、检测、日志监视和子进程事件监听等工作线程只调用 publish 把事件放入队列，
+    Tk 主线程通过 after() 定时调用 drain 批量取出并分发给订阅者：同一批中的日志行合并为
+    一次插入，只关心最新值的事件只分发最后一个。工作线程不再直接操作 Tk 控件，
+    界面更新的次数只取决于取出间隔，与报文数量无关。
+    """
+
+    def __init__(self, max_pending=MAX_PENDING):
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.queue = deque()
+        self.handlers = {}  # {事件类型: [(处理函数, 分发方式)]}
+        self.root = None
+        self.interval = DRAIN_INTERVAL
+        self.main_thread = None
+        self.published = 0
+        self.dropped = 0
+        self.dropped_reported = 0
+        self.batches = 0
+        self.dispatched = 0  # 处理函数的调用次数
+        self.coalesced = 0  # 被同一批中更新的值覆盖的事件数
+
+    def subscribe(self, event, handler, mode=DISPATCH_EACH):
+        """订阅一种事件（在主线程中调用）"""
+        self.handlers.setdefault(event, []).append((handler, mode))
+
+    def publish(self, event, *args):
+        """发布一个事件（任意线程）
+
+        Returns:
+            bool: 事件进入队列时返回 True，积压过多被丢弃时返回 False
+        """
+        with self.lock:
+            self.published += 1
+            if event == EVENT_LOG and len(self.queue) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.queue.append((event, args))
+        return True
+
+    def call(self, func, *args):
+        """让主线程在下一批中执行 func(*args)（任意线程）"""
+        self.publish(EVENT_CALL, func, args)
+
+    def on_main_thread(self):
+        """当前是否在已关联的 Tk 主线程中（尚未关联时视为是，直接操作控件）"""
+        return self.main_thread is None or threading.current_thread() is self.main_thread
+
+    def attach(self, root, interval=DRAIN_INTERVAL):
+        """关联 Tk 根窗口并开始定时取出事件（在主线程中调用）"""
+        self.root = root
+        self.interval = interval
+        self.main_thread = threading.current_thread()
+        root.after(interval, self._tick)
+
+    def _tick(self):
+        try:
+            self.drain()
+        finally:
+            self.root.after(self.interval, self._tick)
+
+    def drain(self):
+        """取出当前积压的所有事件，按类型合并后分发（在主线程中调用）
+
+        Returns:
+            int: 取出的事件数
+        """
+        with self.lock:
+            events = self.queue
+            if not events:
+                return 0
+            self.queue = deque()
+            dropped = self.dropped - self.dropped_reported
+            self.dropped_reported = self.dropped
+        self.batches += 1
+
+        # 按类型分组，类型之间保持第一次出现的顺序
+        grouped = {}
+        for event, args in events:
+            grouped.setdefault(event, []).append(args)
+        if dropped:
+            grouped.setdefault(EVENT_LOG, []).append(("info", f"日志输出过快，已省略 {dropped} 条"))
+        for event, items in grouped.items():
+            if event == EVENT_CALL:
+                for func, args in items:
+                    self._invoke(func, args)
+                continue
+            for handler, mode in self.handlers.get(event, ()):
+                if mode == DISPATCH_BATCH:
+                    self._invoke(handler, (items,))
+                elif mode == DISPATCH_LATEST:
+                    self.coalesced += len(items) - 1
+                    self._invoke(handler, items[-1])
+                else:
+                    for args in items:
+                        self._invoke(handler, args)
+        return len(events)
+
+    def _invoke(self, handler, args):
+        self.dispatched += 1
+        try:
+            handler(*args)
+        except Exception:
+            # 不能再写日志控件（可能正是日志处理函数出错），只输出到标准错误
+            traceback.print_exc()
+
+    def stats(self):
+        """导出为可序列化的字典"""
+        return {
+            "published": self.published,
+            "dropped": self.dropped,
+            "pending": len(self.queue),
+            "batches": self.batches,
+            "dispatched": self.dispatched,
+            "coalesced": self.coalesced,
+        }
+
+
+# 界面与工作线程共享的事件总线
+EVENTS = EventBus()
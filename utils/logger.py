@@ -1,10 +1,22 @@
 from datetime import datetime
 import tkinter as tk
+from utils.event_bus import EVENT_LOG, DISPATCH_BATCH
+
+# 数据包控制台最多保留的行数，超出后删除最早的行，避免长时间抓包时控件无限增长
+MAX_PACKET_LINES = 2000
+
 
 class Logger:
-    def __init__(self):
+    def __init__(self, bus=None):
+        """
+        Args:
+            bus: 事件总线；设置后，其他线程的日志通过总线交给 Tk 主线程批量写入控件
+        """
         self.console = None
         self.packet_console = None
+        self.bus = bus
+        if bus is not None:
+            bus.subscribe(EVENT_LOG, self._write_batch, DISPATCH_BATCH)
 
     def set_consoles(self, console, packet_console):
         """设置日志输出控件"""
@@ -14,37 +26,68 @@ class Logger:
     def info(self, message):
         """输出普通日志"""
         if self.console:
-            self._log_to_console(message)
+            self._emit("info", message)
 
     def packet(self, message):
         """输出数据包日志"""
         if self.packet_console:
-            self._log_to_packet_console(message)
+            self._emit("packet", message)
+
+    def packet_summary(self, lines):
+        """用流汇总整体替换数据包控制台内容"""
+        if not self.packet_console:
+            return
+        try:
+            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            text = "\n".join([f"[{current_time}] 连接汇总"] + lines[:MAX_PACKET_LINES])
+            self.packet_console.delete(1.0, tk.END)
+            self.packet_console.insert(tk.END, f"{text}\n")
+        except Exception as e:
+            print(f"数据包日志输出错误: {str(e)}")
 
     def error(self, message):
         """输出错误日志"""
         if self.console:
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self._log_to_console(f"[{current_time}] {message}")
+            self._emit("info", f"[{current_time}] {message}")
+
+    def _emit(self, level, message):
+        """主线程中直接写入控件，其他线程交给事件总线"""
+        if level == "info" and not message.startswith('[20'):  # 如果消息不是以时间戳开头
+            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            message = f"[{current_time}] {message}"
+        if self.bus is not None and not self.bus.on_main_thread():
+            self.bus.publish(EVENT_LOG, level, message)
+        elif level == "packet":
+            self._log_to_packet_console([message])
+        else:
+            self._log_to_console([message])
+
+    def _write_batch(self, items):
+        """事件总线分发的一批日志：每个控件只插入一次"""
+        console_lines = [message for level, message in items if level != "packet"]
+        packet_lines = [message for level, message in items if level == "packet"]
+        if console_lines and self.console:
+            self._log_to_console(console_lines)
+        if packet_lines and self.packet_console:
+            self._log_to_packet_console(packet_lines)
 
-    def _log_to_console(self, message):
+    def _log_to_console(self, lines):
         """向主控制台输出日志"""
         try:
-            if not message.startswith('[20'):  # 如果消息不是以时间戳开头
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                message = f"[{current_time}] {message}"
-            self.console.insert(tk.END, f"{message}\n")
+            self.console.insert(tk.END, "".join(f"{line}\n" for line in lines))
             self.console.see(tk.END)
         except Exception as e:
             print(f"日志输出错误: {str(e)}")
 
-    def _log_to_packet_console(self, message):
+    def _log_to_packet_console(self, lines):
         """向数据包控制台输出日志"""
         try:
-            self.packet_console.insert(tk.END, f"{message}\n")
+            self.packet_console.insert(tk.END, "".join(f"{line}\n" for line in lines))
+            self._trim_lines(self.packet_console, MAX_PACKET_LINES)
             self.packet_console.see(tk.END)
             # 自动切换到数据包监控标签页
-            if ">>> 发现" in message:
+            if any(">>> 发现" in line for line in lines):
                 if hasattr(self.packet_console.master, 'master'):
                     notebook = self.packet_console.master.master
                     if hasattr(notebook, 'select'):
@@ -52,6 +95,12 @@ class Logger:
         except Exception as e:
             print(f"数据包日志输出错误: {str(e)}")
 
+    def _trim_lines(self, widget, max_lines):
+        """删除超出行数上限的最早内容"""
+        line_count = int(widget.index("end-1c").split(".")[0])
+        if line_count > max_lines:
+            widget.delete("1.0", f"{line_count - max_lines + 1}.0")
+
     def clear_console(self):
         """清除主控制台内容"""
         if self.console:
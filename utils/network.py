@@ -1,106 +1,253 @@
-from scapy.arch.windows import get_windows_if_list
 import subprocess
+import sys
+import threading
+import time
 import traceback
 
+# 接口列表缓存的有效期（秒）：超时后下次使用时重新查询系统
+INTERFACE_TTL = 30.0
+# 描述中包含这些关键字的接口视为虚拟接口，不在界面列表中显示
+VIRTUAL_KEYWORDS = ("loopback", "vmware", "virtualbox", "hyper-v", "bluetooth")
+# 描述中包含这些关键字的接口视为 VPN/虚拟网卡，不作为默认接口
+VPN_KEYWORDS = ("vpn", "virtual", "虚拟")
+
+
+def _is_valid_ip(ip):
+    """检查是否为有效的普通IP地址"""
+    try:
+        # 排除特殊IP地址
+        if not ip or ':' in ip:  # 排除IPv6
+            return False
+
+        parts = ip.split('.')
+        if len(parts) != 4:
+            return False
+
+        # 检查每个部分是否为0-255的数字
+        if not all(part.isdigit() and 0 <= int(part) <= 255 for part in parts):
+            return False
+
+        # 排除特殊IP地址范围
+        if (
+            ip.startswith('0.') or      # 0.0.0.0/8
+            ip.startswith('127.') or    # 127.0.0.0/8 (本地回环)
+            ip.startswith('169.254.') or # 169.254.0.0/16 (链路本地)
+            ip.startswith('224.') or    # 224.0.0.0/4 (组播地址)
+            ip.startswith('240.') or    # 240.0.0.0/4 (保留地址)
+            ip == '255.255.255.255'     # 广播地址
+        ):
+            return False
+
+        return True
+    except:
+        return False
+
+
+def _query_windows_interfaces():
+    """查询系统网络接口（scapy 在第一次用到时才加载）"""
+    from scapy.arch.windows import get_windows_if_list
+
+    return get_windows_if_list()
+
+
+def _query_posix_interfaces():
+    """非 Windows 系统上查询网络接口，结果整理成与 get_windows_if_list 相同的字段"""
+    import scapy.all  # noqa: F401  加载 scapy 时注册本平台的接口提供者
+    from scapy.config import conf
+
+    return [
+        {
+            "name": iface.name,
+            "description": iface.description or iface.name,
+            "ips": list(iface.ips.get(4, [])) + list(iface.ips.get(6, [])),
+            "mac": iface.mac or "",
+        }
+        for iface in conf.ifaces.values()
+    ]
+
+
+def _query_interfaces():
+    """按平台选择接口查询方式"""
+    if sys.platform == "win32":
+        return _query_windows_interfaces()
+    return _query_posix_interfaces()
+
+
+class InterfaceRecord:
+    """一个网络接口的精简信息，由 get_windows_if_list（或其他平台上同样字段的查询结果）转换而来"""
+
+    __slots__ = ("name", "description", "ips", "ipv4", "mac", "is_vpn", "is_active")
+
+    def __init__(self, name, description="", ips=(), mac=""):
+        self.name = name
+        self.description = description
+        self.ips = tuple(ips)
+        # 第一个有效的普通 IPv4 地址，没有时接口视为未连接
+        self.ipv4 = next((ip for ip in self.ips if _is_valid_ip(ip)), None)
+        self.mac = mac
+        lower = description.lower()
+        self.is_vpn = any(keyword in lower for keyword in VPN_KEYWORDS)
+        self.is_active = self.ipv4 is not None
+
+    @property
+    def is_virtual(self):
+        """回环、虚拟机、蓝牙等接口"""
+        lower = self.description.lower()
+        return any(keyword in lower for keyword in VIRTUAL_KEYWORDS)
+
+    def display_name(self):
+        """界面下拉列表中显示的名称：name [状态] - 描述"""
+        desc = self.description
+        display_desc = desc[:47] + '...' if len(desc) > 50 else desc
+        return f"{self.name} [{'已连接' if self.is_active else '未连接'}] - {display_desc}"
+
+
+class InterfaceRegistry:
+    """系统网络接口的缓存
+
+    get_windows_if_list 需要查询系统，开销较大。查询结果转换为 InterfaceRecord 并按名称建立索引，
+    在有效期内重复使用；超时、手动刷新或按名称查找不到时才重新查询。
+    每次查询结果与上一次不同（接口增减、IP 变化）时 version 加一，界面据此判断列表是否需要更新。
+    """
+
+    def __init__(self, ttl=INTERFACE_TTL, query=_query_interfaces):
+        self.ttl = ttl
+        self.query = query
+        self.lock = threading.Lock()
+        self.records = []
+        self.by_name = {}
+        self.loaded_at = None
+        self.signature = None
+        self.version = 0
+        self.queries = 0
+
+    def _expired(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl
+
+    def refresh(self, force=False):
+        """需要时重新查询系统接口
+
+        Args:
+            force: 为 True 时忽略有效期立即重新查询
+
+        Returns:
+            list: 所有接口记录
+        """
+        with self.lock:
+            if not force and not self._expired():
+                return self.records
+            records = [
+                InterfaceRecord(
+                    iface.get("name", ""),
+                    iface.get("description", ""),
+                    iface.get("ips") or (),
+                    iface.get("mac", ""),
+                )
+                for iface in self.query()
+            ]
+            self.queries += 1
+            self.loaded_at = time.monotonic()
+            signature = tuple((record.name, record.ips) for record in records)
+            if signature != self.signature:
+                self.signature = signature
+                self.version += 1
+            self.records = records
+            self.by_name = {record.name: record for record in records}
+            return records
+
+    def invalidate(self):
+        """使缓存失效，下次使用时重新查询"""
+        with self.lock:
+            self.loaded_at = None
+
+    def get(self, name):
+        """按名称查找接口，找不到时返回 None"""
+        self.refresh()
+        return self.by_name.get(name)
+
+    def resolve(self, names):
+        """从接口名称中找出系统中存在的接口（去重并保持顺序）
+
+        缓存中找不到某个名称时（接口可能是刚出现的）重新查询一次。
+        """
+        self.refresh()
+        if any(name not in self.by_name for name in names):
+            self.refresh(force=True)
+        by_name = self.by_name
+        found = []
+        seen = set()
+        for name in names:
+            if name in by_name and name not in seen:
+                seen.add(name)
+                found.append(name)
+        return found
+
+
+# 进程内共享的接口缓存，界面和抓包引擎共用
+INTERFACES = InterfaceRegistry()
+
+
 class NetworkInterface:
-    def __init__(self, logger):
+    def __init__(self, logger, registry=INTERFACES):
         """
         初始化网络接口管理器
         @param logger: Logger实例
+        @param registry: 接口缓存，默认使用共享实例
         """
         self.logger = logger
+        self.registry = registry
         
         # 创建通用的 startupinfo 对象
         self.startupinfo = subprocess.STARTUPINFO()
         self.startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
         self.startupinfo.wShowWindow = subprocess.SW_HIDE
 
-    def _is_valid_ip(self, ip):
-        """检查是否为有效的普通IP地址"""
-        try:
-            # 排除特殊IP地址
-            if not ip or ':' in ip:  # 排除IPv6
-                return False
-            
-            parts = ip.split('.')
-            if len(parts) != 4:
-                return False
-            
-            # 检查每个部分是否为0-255的数字
-            if not all(part.isdigit() and 0 <= int(part) <= 255 for part in parts):
-                return False
-            
-            # 排除特殊IP地址范围
-            if (
-                ip.startswith('0.') or      # 0.0.0.0/8
-                ip.startswith('127.') or    # 127.0.0.0/8 (本地回环)
-                ip.startswith('169.254.') or # 169.254.0.0/16 (链路本地)
-                ip.startswith('224.') or    # 224.0.0.0/4 (组播地址)
-                ip.startswith('240.') or    # 240.0.0.0/4 (保留地址)
-                ip == '255.255.255.255'     # 广播地址
-            ):
-                return False
-            
-            return True
-        except:
-            return False
+    def load_interfaces(self, force=False):
+        """加载网络接口列表
+
+        Args:
+            force: 为 True 时忽略缓存重新查询系统（刷新按钮）
 
-    def load_interfaces(self):
-        """加载网络接口列表"""
+        Returns:
+            dict: interfaces 为显示名称，names 为对应的接口名称（顺序一致），
+                  default 为默认接口的显示名称
+        """
         try:
-            # 获取 scapy 的接口列表
-            scapy_interfaces = get_windows_if_list()
-            
             active_interfaces = []
             inactive_interfaces = []
             default_interface = None
 
-            for iface in scapy_interfaces:
-                # 跳过没有IP地址的接口
-                if not iface.get('ips'):
-                    continue
-                    
-                # 获取接口基本信息
-                name = iface.get('name', '')
-                desc = iface.get('description', '')
-                
-                # 跳过虚拟接口
-                if any(keyword in desc.lower() 
-                      for keyword in ['loopback', 'vmware', 'virtualbox', 'hyper-v', 'bluetooth']):
+            for record in self.registry.refresh(force=force):
+                # 跳过没有IP地址的接口和虚拟接口
+                if not record.ips or record.is_virtual:
                     continue
-                
-                # 获取有效的IPv4地址
-                ipv4_addr = next((ip for ip in iface.get('ips', []) if self._is_valid_ip(ip)), None)
-                is_active = bool(ipv4_addr)
-                is_vpn = any(vpn_keyword in desc.lower() for vpn_keyword in ['vpn', 'virtual', '虚拟'])
-                
-                # 构建显示名称
-                display_desc = desc[:47] + '...' if len(desc) > 50 else desc
-                display_name = f"{name} [{'已连接' if is_active else '未连接'}] - {display_desc}"
 
+                desc = record.description
                 # 处理接口状态
-                if is_active:
-                    active_interfaces.append(display_name)
+                if record.is_active:
+                    active_interfaces.append(record)
                     # 设置默认接口（优先选择以太网）
-                    if not default_interface and not is_vpn and (
+                    if not default_interface and not record.is_vpn and (
                         "ethernet" in desc.lower() or "以太网" in desc.lower()
                     ):
-                        default_interface = display_name
+                        default_interface = record.display_name()
                 else:
-                    inactive_interfaces.append(display_name)
+                    inactive_interfaces.append(record)
 
                 # 记录接口信息
                 self.logger.info(
-                    f"\n   接口: {name}\n"
+                    f"\n   接口: {record.name}\n"
                     f"   描述: {desc}\n"
-                    f"   类型: {'VPN/虚拟' if is_vpn else '物理'}\n"
-                    f"   状态: {'已连接' if is_active else '未连接'}\n"
-                    f"   IP地址: {ipv4_addr or '无'}\n"
-                    f"   MAC地址: {iface.get('mac', '')}"
+                    f"   类型: {'VPN/虚拟' if record.is_vpn else '物理'}\n"
+                    f"   状态: {'已连接' if record.is_active else '未连接'}\n"
+                    f"   IP地址: {record.ipv4 or '无'}\n"
+                    f"   MAC地址: {record.mac}"
                 )
 
+            records = active_interfaces + inactive_interfaces
             return {
-                'interfaces': active_interfaces + inactive_interfaces,
+                'interfaces': [record.display_name() for record in records],
+                'names': [record.name for record in records],
                 'default': default_interface,
                 'active_count': len(active_interfaces)
             }
@@ -108,4 +255,4 @@ class NetworkInterface:
         except Exception as e:
             self.logger.error(f"加载网络接口失败: {str(e)}")
             self.logger.error(traceback.format_exc())
-            return {'interfaces': [], 'default': None, 'active_count': 0}
+            return {'interfaces': [], 'names': [], 'default': None, 'active_count': 0}
@@ -1,23 +1,26 @@
 import os
-import requests
 import zipfile
 from pathlib import Path
 from tkinter import messagebox
 from utils.config import load_obs_config
 import tkinter as tk
 from tkinter import ttk
-import psutil
 
 
 class OBSUtils:
     def __init__(self):
         self._installing = False
         self.logger = None  # 添加logger属性
+        self.config_written_callback = None  # 推流配置写入后调用（在询问是否重启 OBS 之前）
 
     def set_logger(self, logger):
         """设置logger"""
         self.logger = logger
 
+    def set_config_written_callback(self, callback):
+        """设置推流配置写入后的回调函数（无参数）"""
+        self.config_written_callback = callback
+
     def get_obs_path(self):
         """获取OBS安装路径"""
         obs_path, _, _ = load_obs_config()
@@ -137,6 +140,8 @@ class OBSUtils:
             progress_window.update()
             
             # 开始下载
+            import requests
+
             response = requests.get(download_url, stream=True)
             if response.status_code != 200:
                 messagebox.showerror("错误", "下载文件失败！")
@@ -251,6 +256,8 @@ class OBSUtils:
 
     def is_obs_running(self):
         """检查OBS是否正在运行"""
+        import psutil
+
         for proc in psutil.process_iter(['name']):
             if proc.info['name'] and 'obs64.exe' in proc.info['name'].lower():
                 return True
@@ -258,6 +265,8 @@ class OBSUtils:
 
     def kill_obs_process(self):
         """结束OBS进程"""
+        import psutil
+
         for proc in psutil.process_iter(['name']):
             if proc.info['name'] and 'obs64.exe' in proc.info['name'].lower():
                 proc.kill()
@@ -354,6 +363,8 @@ class OBSUtils:
             # 保存更新后的配置
             with open(stream_config_path, "w", encoding="utf-8") as f:
                 json.dump(service_config, f, indent=4)
+            if self.config_written_callback:
+                self.config_written_callback()
 
             if self.logger:
                 self.logger.info("推流配置同步成功")
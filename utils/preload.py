@@ -0,0 +1,54 @@
+import importlib
+import threading
+import time
+
+# 窗口显示后在后台预先加载的模块：scapy 和抓包引擎（scapy.all 单独加载就需要数秒）
+PRELOAD_MODULES = ("scapy.all", "core.capture_worker")
+
+
+class ModulePreloader:
+    """在后台线程中预先导入耗时的模块
+
+    界面线程第一次用到这些模块时，如果预加载尚未完成，import 会等待后台线程导入完毕
+    （模块导入锁保证同一模块只执行一次），不会重复加载。
+    """
+
+    def __init__(self, modules=PRELOAD_MODULES):
+        self.modules = modules
+        self.timings = {}  # {模块名: 导入耗时（秒）}
+        self.error = None
+        self.done = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """启动预加载线程，重复调用不会再次启动"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="module_preload", daemon=True)
+            self.thread.start()
+        return self.thread
+
+    def _run(self):
+        try:
+            for name in self.modules:
+                start = time.perf_counter()
+                importlib.import_module(name)
+                self.timings[name] = time.perf_counter() - start
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def wait(self, timeout=None):
+        """等待预加载完成，超时返回 False"""
+        return self.done.wait(timeout)
+
+    def summary(self):
+        """预加载结果的单行描述"""
+        if self.error is not None:
+            return f"后台加载抓包模块失败: {self.error}"
+        timings = "，".join(f"{name} {seconds:.2f} 秒" for name, seconds in self.timings.items())
+        return f"抓包模块已在后台加载完成（{timings}）"
+
+
+# 进程内共享的预加载器
+PRELOADER = ModulePreloader()
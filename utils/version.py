@@ -1,4 +1,3 @@
-import requests
 from tkinter import messagebox
 import webbrowser
 from .config import VERSION, GITHUB_CONFIG
@@ -12,6 +11,8 @@ def check_for_updates():
         - clicked_yes: 如果存在更新，用户是否点击了确认更新
     """
     try:
+        import requests
+
         response = requests.get(GITHUB_CONFIG["API_URL"], timeout=10)
         if response.status_code == 200:
             latest_release = response.json()